@@ -0,0 +1,79 @@
+"""Upload parse throughput: pandas' C engine vs the pyarrow ingestion path.
+
+    python benchmarks/bench_parse.py --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import time
+
+import pandas as pd
+import pyarrow as pa
+from starlette.datastructures import UploadFile
+
+from insights_generator.io_utils import SCHEMA_CACHE, load_dataframe_from_upload
+from insights_generator.synthetic import make_sales_frame
+
+
+def zstd_compress(data: bytes) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(sink, "zstd") as stream:
+        stream.write(data)
+    return sink.getvalue().to_pybytes()
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(label: str, seconds: float, raw_bytes: int, rows: int) -> None:
+    mb = raw_bytes / (1024 * 1024)
+    print(f"{label:<28} {seconds * 1000:9.1f} ms  {mb / seconds:8.1f} MB/s  {rows / seconds / 1e6:6.2f} Mrows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    csv_bytes = make_sales_frame(args.rows).to_csv(index=False).encode("utf-8")
+    payloads = {
+        "csv": csv_bytes,
+        "csv.gz": gzip.compress(csv_bytes, compresslevel=6),
+        "csv.zst": zstd_compress(csv_bytes),
+    }
+    print(f"{args.rows} rows, {len(csv_bytes) / (1024 * 1024):.1f} MB uncompressed CSV")
+
+    report(
+        "pandas.read_csv (csv)",
+        best_of(args.repeat, lambda: pd.read_csv(io.BytesIO(csv_bytes))),
+        len(csv_bytes),
+        args.rows,
+    )
+    report(
+        "pandas.read_csv (csv.gz)",
+        best_of(args.repeat, lambda: pd.read_csv(io.BytesIO(payloads["csv.gz"]), compression="gzip")),
+        len(csv_bytes),
+        args.rows,
+    )
+    for name, data in payloads.items():
+        SCHEMA_CACHE.clear()
+        cold = best_of(1, lambda: load_dataframe_from_upload(UploadFile(io.BytesIO(data), filename=f"bench.{name}")))
+        warm = best_of(
+            args.repeat,
+            lambda: load_dataframe_from_upload(UploadFile(io.BytesIO(data), filename=f"bench.{name}")),
+        )
+        report(f"upload ({name}, cold schema)", cold, len(csv_bytes), args.rows)
+        report(f"upload ({name}, cached)", warm, len(csv_bytes), args.rows)
+
+
+if __name__ == "__main__":
+    main()
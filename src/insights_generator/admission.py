@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from insights_generator.config import AdmissionConfig, load_config
+from insights_generator.io_utils import UploadInfo
+
+
+# Peak resident bytes per byte of decoded input, covering the Arrow table,
+# the pandas frame built from it and the analytics working copies.
+CSV_EXPANSION = 3.0
+PARQUET_EXPANSION = 2.5
+# Arrow uploads are memory-mapped; only strings and analytics copies are resident.
+ARROW_EXPANSION = 1.0
+# Decoded/encoded size ratios used when the container does not record them.
+COMPRESSION_RATIOS = {"gzip": 5.0, "zstd": 6.0}
+PARQUET_COMPRESSION_RATIO = 4.0
+DEFAULT_BUDGET_BYTES = 4 * 1024 * 1024 * 1024
+OVERFLOW_POLICIES = ("sample", "reject")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after_seconds: int) -> None:
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class UploadTooLarge(Exception):
+    """The upload's estimated peak exceeds the whole budget; retrying cannot help."""
+
+    def __init__(self, message: str, estimated_bytes: int) -> None:
+        super().__init__(message)
+        self.estimated_bytes = estimated_bytes
+
+
+def default_budget_bytes() -> int:
+    """Half of physical memory, so one worker cannot exhaust the host."""
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2)
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_BUDGET_BYTES
+
+
+def estimate_peak_bytes(info: UploadInfo) -> int:
+    """Rough peak memory for loading and analysing an upload in full."""
+    decoded = info.uncompressed_bytes
+    if not decoded:
+        ratio = COMPRESSION_RATIOS.get(info.compression or "", 1.0)
+        if info.format == "parquet":
+            ratio *= PARQUET_COMPRESSION_RATIO
+        decoded = int(info.size_bytes * ratio)
+
+    if info.format == "parquet":
+        return int(decoded * PARQUET_EXPANSION)
+    if info.format in ("arrow", "arrow_stream", "feather"):
+        return int(decoded * ARROW_EXPANSION)
+    return int(decoded * CSV_EXPANSION)
+
+
+class MemoryReservation:
+    """Bytes held against the budget until released (idempotent)."""
+
+    def __init__(self, controller: AdmissionController, nbytes: int, mode: str, estimated_bytes: int) -> None:
+        self.controller = controller
+        self.nbytes = nbytes
+        self.mode = mode
+        self.estimated_bytes = estimated_bytes
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller._release(self.nbytes)
+
+    def __enter__(self) -> MemoryReservation:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+    def describe(self) -> dict[str, Any]:
+        return {"mode": self.mode, "estimated_bytes": self.estimated_bytes, "reserved_bytes": self.nbytes}
+
+
+class AdmissionController:
+    """Global memory budget for in-flight analyses.
+
+    Requests reserve their estimated peak before loading. When the budget is
+    full they wait in FIFO order for up to ``max_wait_seconds``; after that
+    they are downgraded to a streamed sample (``overflow_policy="sample"``),
+    which reserves only a small slice of the budget, or rejected. Uploads
+    larger than the whole budget skip the wait: they are sampled when that is
+    allowed and refused as ``UploadTooLarge`` otherwise. Memory that
+    outlives a request (stored datasets) is counted through ``hold``.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        max_wait_seconds: float = 10.0,
+        retry_after_seconds: int = 5,
+        overflow_policy: str = "sample",
+        sample_fraction: float = 0.1,
+    ) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy '{overflow_policy}'. Use one of {list(OVERFLOW_POLICIES)}.")
+        self.budget_bytes = budget_bytes
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.overflow_policy = overflow_policy
+        self.sample_fraction = sample_fraction
+        self._cond = threading.Condition()
+        self._waiters: deque[object] = deque()
+        self._in_use = 0
+        self._held = 0
+        self._active = 0
+        self._peak = 0
+        self._counters = {"admitted": 0, "waited": 0, "downgraded": 0, "rejected": 0}
+
+    def acquire(self, nbytes: int, timeout: float | None, fifo: bool = True) -> int | None:
+        """Reserve ``nbytes``, waiting behind earlier requests; None on timeout.
+
+        Non-FIFO callers (small sampled slices) may pass queued large requests.
+        """
+        nbytes = max(int(nbytes), 0)
+        if nbytes > self.budget_bytes:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = object()
+        with self._cond:
+            if fifo:
+                self._waiters.append(waiter)
+            waited = False
+            try:
+                while (fifo and self._waiters[0] is not waiter) or self._in_use + nbytes > self.budget_bytes:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    waited = True
+                    self._cond.wait(remaining)
+                self._in_use += nbytes
+                self._active += 1
+                self._peak = max(self._peak, self._in_use)
+                if waited:
+                    self._counters["waited"] += 1
+                return nbytes
+            finally:
+                if fifo:
+                    self._waiters.remove(waiter)
+                    self._cond.notify_all()
+
+    def _release(self, nbytes: int) -> None:
+        with self._cond:
+            self._in_use -= nbytes
+            self._active -= 1
+            self._cond.notify_all()
+
+    def hold(self, delta: int) -> None:
+        """Count (or, with a negative ``delta``, stop counting) resident bytes
+        that belong to no reservation, such as stored datasets."""
+        with self._cond:
+            self._in_use += delta
+            self._held += delta
+            self._peak = max(self._peak, self._in_use)
+            if delta < 0:
+                self._cond.notify_all()
+
+    def admit(self, info: UploadInfo, allow_sample: bool = True, wait_indefinitely: bool = False) -> MemoryReservation:
+        """Reserve memory for an upload, downgrading or raising.
+
+        ``AdmissionRejected`` means the budget is busy right now and a retry may
+        succeed; ``UploadTooLarge`` means the upload can never be loaded in full.
+        Background jobs pass ``wait_indefinitely`` since nobody is blocked on them.
+        """
+        wait = None if wait_indefinitely else self.max_wait_seconds
+        estimate = estimate_peak_bytes(info)
+        if estimate <= self.budget_bytes and self.acquire(estimate, wait) is not None:
+            with self._cond:
+                self._counters["admitted"] += 1
+            return MemoryReservation(self, estimate, "full", estimate)
+
+        can_sample = allow_sample and self.overflow_policy == "sample"
+        if can_sample:
+            slice_bytes = min(estimate, int(self.budget_bytes * self.sample_fraction))
+            if self.acquire(slice_bytes, 0.0, fifo=False) is not None:
+                with self._cond:
+                    self._counters["downgraded"] += 1
+                return MemoryReservation(self, slice_bytes, "sampled", estimate)
+
+        with self._cond:
+            self._counters["rejected"] += 1
+        if estimate > self.budget_bytes and not can_sample:
+            raise UploadTooLarge(
+                f"Upload needs an estimated {estimate} bytes, more than the server's "
+                f"{self.budget_bytes}-byte memory budget.",
+                estimate,
+            )
+        raise AdmissionRejected(
+            f"Server memory budget exhausted (estimated {estimate} bytes needed); retry later.",
+            self.retry_after_seconds,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "in_use_bytes": self._in_use,
+                "held_bytes": self._held,
+                "peak_in_use_bytes": self._peak,
+                "utilization": round(self._in_use / self.budget_bytes, 4) if self.budget_bytes else 0.0,
+                "active": self._active,
+                "queued": len(self._waiters),
+                **self._counters,
+            }
+
+
+_CONTROLLER: AdmissionController | None = None
+_CONTROLLER_LOCK = threading.Lock()
+
+
+def _build_controller(config: AdmissionConfig) -> AdmissionController:
+    return AdmissionController(
+        budget_bytes=config.memory_budget_bytes or default_budget_bytes(),
+        max_wait_seconds=config.max_wait_seconds,
+        retry_after_seconds=config.retry_after_seconds,
+        overflow_policy=config.overflow_policy,
+    )
+
+
+def get_admission_controller() -> AdmissionController:
+    global _CONTROLLER
+    with _CONTROLLER_LOCK:
+        if _CONTROLLER is None:
+            _CONTROLLER = _build_controller(load_config().admission)
+        return _CONTROLLER
+
+
+def set_admission_controller(controller: AdmissionController | None) -> None:
+    global _CONTROLLER
+    with _CONTROLLER_LOCK:
+        _CONTROLLER = controller
@@ -1,5 +1,6 @@
 __all__ = [
     "intent_agent",
+    "planner_agent",
     "analytics_agent",
     "visualization_agent",
     "insight_agent",
@@ -1,71 +1,98 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import numpy as np
 import pandas as pd
-
+import pyarrow as pa
+
+from insights_generator.analytics.anomalies import METHOD_FLAGS, detect_anomalies
+from insights_generator.analytics.backends import AnalyticsBackend, get_analytics_backend
+from insights_generator.analytics.correlation import top_correlated_pairs
+from insights_generator.analytics.rolling import rolling_analytics
+from insights_generator.analytics.sampling import confidence_intervals
+from insights_generator.agents.planner_agent import METRIC_GROUPS, full_plan
+from insights_generator.analytics.thresholds import (
+    HIGH_VARIANCE_CV_THRESHOLD,
+    IQR_MULTIPLIER,
+    LONG_TAIL_SKEW_THRESHOLD,
+)
+from insights_generator.anomaly_store import AnomalyRecord, put_anomalies
+from insights_generator.frame_registry import state_frame
 from insights_generator.state import GraphState
 
 
-IQR_MULTIPLIER = 1.5
-LONG_TAIL_SKEW_THRESHOLD = 1.0
-HIGH_VARIANCE_CV_THRESHOLD = 1.0
-
-
-def _safe_mode(series: pd.Series) -> list[Any]:
-    modes = series.mode(dropna=True)
-    return modes.head(3).tolist() if not modes.empty else []
-
-
-def _numeric_column_analytics(df: pd.DataFrame, col: str) -> dict[str, Any]:
-    series = pd.to_numeric(df[col], errors="coerce").dropna()
-    if series.empty:
+ANOMALY_EXAMPLE_ROWS = 10
+MODE_LIMIT = 3
+# Per-column keys each optional metric group adds to the summary statistics.
+METRIC_GROUP_KEYS = {
+    "variance": ("cv", "high_variance"),
+    "distribution": ("skew", "long_tail_detected", "iqr", "iqr_bounds"),
+    "anomalies": ("iqr", "iqr_bounds", "anomaly_count", "anomaly_rate", "anomaly_examples", "anomaly_example_rows"),
+}
+
+
+def _numeric_column_analytics(
+    df: pd.DataFrame,
+    col: str,
+    metrics: set[str] | None = None,
+    backend: AnalyticsBackend | None = None,
+) -> dict[str, Any]:
+    """Per-column statistics; ``metrics`` limits the work to the planned groups."""
+    backend = backend or get_analytics_backend()
+    values = backend.numeric_values(df, col)
+    count = backend.count(values)
+    if count == 0:
         return {}
+    wanted = set(METRIC_GROUPS) if metrics is None else metrics
 
-    q1 = float(series.quantile(0.25))
-    q3 = float(series.quantile(0.75))
-    iqr = q3 - q1
-    lower = q1 - IQR_MULTIPLIER * iqr
-    upper = q3 + IQR_MULTIPLIER * iqr
-    outliers = series[(series < lower) | (series > upper)]
-
-    mean_val = float(series.mean())
-    std_val = float(series.std(ddof=0))
-    cv = std_val / mean_val if mean_val else float("inf")
-
-    return {
-        "count": int(series.count()),
+    mean_val = backend.mean(values)
+    std_val = backend.std(values)
+    minimum, maximum = backend.min_max(values)
+    info: dict[str, Any] = {
+        "count": count,
         "mean": mean_val,
         "average": mean_val,
-        "median": float(series.median()),
-        "mode": _safe_mode(series),
+        "median": backend.median(values),
+        "mode": backend.mode(values, MODE_LIMIT),
         "std": std_val,
-        "variance": float(series.var(ddof=0)),
-        "cv": cv,
-        "high_variance": bool(cv > HIGH_VARIANCE_CV_THRESHOLD),
-        "skew": float(series.skew()),
-        "long_tail_detected": bool(abs(float(series.skew())) > LONG_TAIL_SKEW_THRESHOLD),
-        "iqr": iqr,
-        "iqr_bounds": {"lower": lower, "upper": upper},
-        "anomaly_count": int(outliers.count()),
-        "anomaly_rate": float(outliers.count() / max(series.count(), 1)),
-        "anomaly_examples": outliers.head(10).tolist(),
-        "min": float(series.min()),
-        "max": float(series.max()),
-    }
-
-
-def run_analytics_agent(state: GraphState) -> GraphState:
-    df = state["dataframe"]
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
-
-    numeric_analytics: dict[str, Any] = {
-        col: _numeric_column_analytics(df, col)
-        for col in numeric_cols
+        "variance": backend.variance(values),
+        "min": minimum,
+        "max": maximum,
     }
 
+    if "variance" in wanted:
+        cv = std_val / mean_val if mean_val else float("inf")
+        info["cv"] = cv
+        info["high_variance"] = bool(cv > HIGH_VARIANCE_CV_THRESHOLD)
+    if "distribution" in wanted:
+        skew = backend.skew(values)
+        info["skew"] = skew
+        info["long_tail_detected"] = bool(abs(skew) > LONG_TAIL_SKEW_THRESHOLD)
+    if "distribution" in wanted or "anomalies" in wanted:
+        q1, q3 = backend.quantiles(values, (0.25, 0.75))
+        iqr = q3 - q1
+        lower = q1 - IQR_MULTIPLIER * iqr
+        upper = q3 + IQR_MULTIPLIER * iqr
+        info["iqr"] = iqr
+        info["iqr_bounds"] = {"lower": lower, "upper": upper}
+        if "anomalies" in wanted:
+            outliers = backend.select(values, backend.outside(values, lower, upper))
+            outlier_count = backend.count(outliers)
+            info["anomaly_count"] = outlier_count
+            info["anomaly_rate"] = float(outlier_count / max(count, 1))
+            info["anomaly_examples"] = backend.head(outliers, 10)
+    return info
+
+
+def build_analytics_summary(
+    row_count: int,
+    column_count: int,
+    numeric_cols: list[str],
+    categorical_cols: list[str],
+    numeric_analytics: dict[str, Any],
+) -> dict[str, Any]:
     high_variance_columns = [
         col for col, info in numeric_analytics.items() if info and info.get("high_variance")
     ]
@@ -73,13 +100,14 @@ def run_analytics_agent(state: GraphState) -> GraphState:
         col for col, info in numeric_analytics.items() if info and info.get("long_tail_detected")
     ]
     anomaly_summary = {
-        col: info.get("anomaly_count", 0)
+        col: info["anomaly_count"]
         for col, info in numeric_analytics.items()
+        if info and "anomaly_count" in info
     }
 
-    state["analytics"] = {
-        "row_count": int(len(df)),
-        "column_count": int(df.shape[1]),
+    return {
+        "row_count": row_count,
+        "column_count": column_count,
         "numeric_columns": numeric_cols,
         "categorical_columns": categorical_cols,
         "numeric_analytics": numeric_analytics,
@@ -87,4 +115,105 @@ def run_analytics_agent(state: GraphState) -> GraphState:
         "long_tail_columns": long_tail_columns,
         "anomaly_summary": anomaly_summary,
     }
+
+
+def run_analytics_agent(state: GraphState) -> GraphState:
+    df = state_frame(state)
+    all_numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
+    plan = state.get("execution_plan") or full_plan(all_numeric_cols)
+    numeric_cols = [col for col in plan["columns"] if col in all_numeric_cols]
+    metrics = set(plan["metrics"])
+
+    backend = get_analytics_backend()
+    if backend.parallel_columns and len(numeric_cols) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(numeric_cols), pa.cpu_count())) as pool:
+            per_column = list(pool.map(lambda col: _numeric_column_analytics(df, col, metrics, backend), numeric_cols))
+        numeric_analytics: dict[str, Any] = dict(zip(numeric_cols, per_column))
+    else:
+        numeric_analytics = {col: _numeric_column_analytics(df, col, metrics, backend) for col in numeric_cols}
+
+    rolling = rolling_analytics(df, numeric_cols) if "rolling" in metrics else None
+
+    anomaly_index = None
+    if "anomalies" in metrics:
+        anomaly_index = detect_anomalies(
+            df, numeric_cols, local_outliers=rolling.local_outliers if rolling is not None else None
+        )
+        for col, info in numeric_analytics.items():
+            if info:
+                info["anomaly_example_rows"] = anomaly_index.rows_for(col, "iqr")[:ANOMALY_EXAMPLE_ROWS].tolist()
+        if state.get("session_id"):
+            put_anomalies(state["session_id"], AnomalyRecord.from_frame(anomaly_index, df))
+
+    analytics = build_analytics_summary(
+        row_count=int(len(df)),
+        column_count=int(df.shape[1]),
+        numeric_cols=numeric_cols,
+        categorical_cols=categorical_cols,
+        numeric_analytics=numeric_analytics,
+    )
+    analytics["plan"] = plan
+    if anomaly_index is not None:
+        analytics["anomalies"] = {
+            "methods": list(METHOD_FLAGS),
+            "by_column": anomaly_index.summary(),
+        }
+    if rolling is not None:
+        analytics["rolling"] = rolling.summary
+    if "correlations" in metrics:
+        analytics["correlations"] = top_correlated_pairs(df, numeric_cols)
+    sampling = state.get("sampling")
+    if sampling:
+        analytics["sample"] = sampling
+        analytics["confidence_intervals"] = confidence_intervals(
+            df, numeric_cols, sampling["population_rows"], anomaly_index
+        )
+    state["analytics"] = analytics
     return state
+
+
+def project_analytics(analytics: dict[str, Any], plan: dict[str, Any]) -> dict[str, Any]:
+    """Cut the analytics of one plan out of analytics computed for a wider plan.
+
+    Batch runs compute analytics once for the union of their prompts' plans
+    (see ``merge_plans``) and hand each prompt its share. Per-column results
+    do not depend on which other columns were analysed, so the share matches
+    a run with ``plan`` alone. The one exception is the anomaly index: it
+    includes ``local_iqr`` flags whenever the wider plan had rolling analytics.
+    """
+    metrics = set(plan["metrics"])
+    numeric_cols = [col for col in plan["columns"] if col in analytics["numeric_analytics"]]
+    kept = {key for group in metrics for key in METRIC_GROUP_KEYS.get(group, ())}
+    dropped = {key for keys in METRIC_GROUP_KEYS.values() for key in keys} - kept
+    projected = build_analytics_summary(
+        row_count=analytics["row_count"],
+        column_count=analytics["column_count"],
+        numeric_cols=numeric_cols,
+        categorical_cols=analytics["categorical_columns"],
+        numeric_analytics={
+            col: {key: value for key, value in analytics["numeric_analytics"][col].items() if key not in dropped}
+            for col in numeric_cols
+        },
+    )
+    projected["plan"] = plan
+    if "anomalies" in metrics and "anomalies" in analytics:
+        by_column = analytics["anomalies"]["by_column"]
+        projected["anomalies"] = {
+            "methods": analytics["anomalies"]["methods"],
+            "by_column": {col: by_column[col] for col in numeric_cols if col in by_column},
+        }
+    if "rolling" in metrics and "rolling" in analytics:
+        rolling = analytics["rolling"]
+        projected["rolling"] = {
+            "window": rolling["window"],
+            "by_column": {col: rolling["by_column"][col] for col in numeric_cols if col in rolling["by_column"]},
+            "change_point_columns": [col for col in numeric_cols if col in rolling["change_point_columns"]],
+        }
+    if "correlations" in metrics and "correlations" in analytics:
+        projected["correlations"] = analytics["correlations"]
+    if "sample" in analytics:
+        intervals = analytics["confidence_intervals"]
+        projected["sample"] = analytics["sample"]
+        projected["confidence_intervals"] = {col: intervals[col] for col in numeric_cols if col in intervals}
+    return projected
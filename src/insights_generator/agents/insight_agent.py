@@ -10,6 +10,30 @@ def _top_anomaly_columns(anomaly_summary: dict[str, int], limit: int = 3) -> lis
     return sorted(anomaly_summary.items(), key=lambda kv: kv[1], reverse=True)[:limit]
 
 
+def _format_pairs(pairs: list[dict]) -> str:
+    return ", ".join(
+        f"{pair['x']} ~ {pair['y']} (pearson={pair['pearson']}, spearman={pair['spearman']})"
+        for pair in pairs
+    )
+
+
+def _format_change_points(rolling: dict, limit: int = 3) -> str:
+    parts = []
+    for col in rolling.get("change_point_columns", [])[:limit]:
+        for point in rolling["by_column"][col]["change_points"]:
+            parts.append(f"{col} at row {point['row']} ({point['mean_before']:.4g} -> {point['mean_after']:.4g})")
+    return ", ".join(parts)
+
+
+def _drift_columns(rolling: dict, limit: int = 3) -> list[tuple[str, int, int]]:
+    drift = [
+        (col, info["drift_flagged_count"], info["local_anomaly_count"])
+        for col, info in rolling.get("by_column", {}).items()
+        if info["drift_flagged_count"]
+    ]
+    return sorted(drift, key=lambda item: item[1], reverse=True)[:limit]
+
+
 def _heuristic_insight(state: GraphState) -> str:
     analytics = state.get("analytics", {})
     anomaly_summary = analytics.get("anomaly_summary", {})
@@ -17,25 +41,57 @@ def _heuristic_insight(state: GraphState) -> str:
     long_tail = analytics.get("long_tail_columns", [])
     row_count = analytics.get("row_count", 0)
 
+    rolling = analytics.get("rolling", {})
     anomaly_top = _top_anomaly_columns(anomaly_summary)
 
     lines: list[str] = []
     lines.append(f"Dataset contains {row_count} rows and {analytics.get('column_count', 0)} columns.")
+    sample = analytics.get("sample")
+    if sample:
+        follow_up = (
+            "the server was at its memory budget, so no exact run follows"
+            if sample.get("reason") == "memory_budget"
+            else "exact results will follow"
+        )
+        lines.append(
+            f"Quick estimate from a {sample['method']} sample of {sample['sample_rows']} of "
+            f"{sample['population_rows']} rows; see confidence_intervals, {follow_up}."
+        )
     if anomaly_top:
         lines.append(
             "Top anomaly-heavy columns by IQR count: "
             + ", ".join([f"{col} ({count})" for col, count in anomaly_top])
             + "."
         )
+    drift = _drift_columns(rolling)
+    if drift:
+        lines.append(
+            f"Against rolling {rolling['window']}-row IQR fences, global outliers are mostly drift: "
+            + ", ".join(f"{col} ({flagged} normal for their period, {local} local anomalies)" for col, flagged, local in drift)
+            + "."
+        )
+    change_points = _format_change_points(rolling)
+    if change_points:
+        lines.append("Level shifts (change points): " + change_points + ".")
+    metrics = set(analytics.get("plan", {}).get("metrics", ["variance", "distribution"]))
     if high_variance:
         lines.append("High variance detected in: " + ", ".join(high_variance) + ".")
-    else:
+    elif "variance" in metrics:
         lines.append("No numeric column crossed the high-variance threshold (CV > 1.0).")
     if long_tail:
         lines.append("Long-tail behavior detected in: " + ", ".join(long_tail) + ".")
-    else:
+    elif "distribution" in metrics:
         lines.append("No strong long-tail behavior detected from skew threshold.")
-    lines.append("Generated visualizations include trend, distribution, anomaly, and variance charts.")
+    top_pairs = analytics.get("correlations", {}).get("top_pairs", [])
+    if top_pairs:
+        lines.append("Strongest correlations: " + _format_pairs(top_pairs[:3]) + ".")
+    chart_names = [
+        chart["name"]
+        for chart in state.get("visualizations", [])
+        if chart.get("meta", {}).get("status", "ok") == "ok"
+    ]
+    if chart_names:
+        lines.append("Generated visualizations: " + ", ".join(chart_names) + ".")
     return "\n".join(lines)
 
 
@@ -72,6 +128,15 @@ def _build_insight_prompt(state: GraphState, prompt_cfg: dict) -> str:
 
     lines.append(f"Intent: {state.get('intent', {})}")
     lines.append(f"Analytics summary: {state.get('analytics', {})}")
+    top_pairs = state.get("analytics", {}).get("correlations", {}).get("top_pairs", [])
+    if top_pairs:
+        lines.append(f"Top correlated column pairs: {_format_pairs(top_pairs)}")
+    change_points = _format_change_points(state.get("analytics", {}).get("rolling", {}), limit=5)
+    if change_points:
+        lines.append(
+            "Change points (rolling-window mean shifts; judge anomalies against the level of each period): "
+            + change_points
+        )
     lines.append(f"Available chart artifacts: {state.get('visualizations', [])}")
     return "\n".join(lines).strip()
 
@@ -86,3 +151,77 @@ def build_insight_agent(chat_client: ChatClient, prompt_cfg: dict):
         return state
 
     return run_insight_agent
+
+
+def _format_change(name: str, change: dict) -> str:
+    if change.get("delta_pct") is None:
+        return f"{name} {change['baseline']} -> {change['current']}"
+    return f"{name} {change['baseline']:.4g} -> {change['current']:.4g} ({change['delta_pct']:+.1f}%)"
+
+
+def _heuristic_comparison_insight(comparison: dict) -> str:
+    rows = comparison["row_count"]
+    lines = [f"Rows: {rows['baseline']} -> {rows['current']} ({rows['delta']:+d})."]
+    columns = comparison["columns"]
+    for col in comparison["shifted_columns"][:5]:
+        info = columns[col]
+        lines.append(
+            f"{col}: {info['shift']} distribution shift (PSI={info['psi']:.3f}, KS={info['ks']:.3f}); "
+            + _format_change("mean", info["mean"])
+            + ", "
+            + _format_change("median", info["quantiles"]["p50"])
+            + "."
+        )
+    if not comparison["shifted_columns"] and columns:
+        lines.append(f"No column crossed the PSI shift threshold ({comparison['psi_thresholds']['moderate']}).")
+    rate_jumps = sorted(
+        ((col, info["anomaly_rate"]) for col, info in columns.items() if (info["anomaly_rate"]["delta"] or 0) > 0),
+        key=lambda item: item[1]["delta"],
+        reverse=True,
+    )[:3]
+    if rate_jumps:
+        lines.append(
+            "Anomaly rate rose in: "
+            + ", ".join(f"{col} ({rate['baseline']:.2%} -> {rate['current']:.2%})" for col, rate in rate_jumps)
+            + "."
+        )
+    if comparison["added_columns"] or comparison["removed_columns"]:
+        added = ", ".join(comparison["added_columns"]) or "none"
+        removed = ", ".join(comparison["removed_columns"]) or "none"
+        lines.append(f"Schema changed: added {added}; removed {removed}.")
+    return "\n".join(lines)
+
+
+def _build_comparison_prompt(comparison: dict, user_prompt: str, prompt_cfg: dict) -> str:
+    system_instructions = prompt_cfg.get(
+        "system_instructions",
+        "You are a senior analytics consultant explaining what changed between two versions of a dataset.",
+    )
+    business_logic = prompt_cfg.get("business_logic", [])
+    output_instructions = prompt_cfg.get(
+        "output_instructions",
+        "Write concise lines on the biggest shifts, anomaly-rate changes, schema changes, and next action.",
+    )
+
+    lines: list[str] = [str(system_instructions).strip()]
+    if isinstance(business_logic, list) and business_logic:
+        lines.append("Business logic constraints:")
+        for rule in business_logic:
+            lines.append(f"- {rule}")
+    if output_instructions:
+        lines.append("Output instructions:")
+        lines.append(str(output_instructions).strip())
+    if user_prompt:
+        lines.append(f"Analyst question: {user_prompt}")
+    lines.append(f"Columns with a distribution shift (largest PSI first): {comparison['shifted_columns']}")
+    lines.append(f"Comparison (baseline -> current): {json.dumps(comparison)}")
+    return "\n".join(lines).strip()
+
+
+def build_comparison_insight(chat_client: ChatClient, prompt_cfg: dict):
+    def run_comparison_insight(comparison: dict, user_prompt: str = "") -> str:
+        heuristic = _heuristic_comparison_insight(comparison)
+        llm_text = chat_client.invoke_text(_build_comparison_prompt(comparison, user_prompt, prompt_cfg))
+        return llm_text if llm_text else heuristic
+
+    return run_comparison_insight
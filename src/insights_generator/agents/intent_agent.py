@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import json
 import re
+import zlib
 from typing import Any
 
-from insights_generator.model_router import ChatClient
+from insights_generator.intent_cache import IntentCache, get_intent_cache
+from insights_generator.model_router import ChatClient, current_llm_tenant
 from insights_generator.state import GraphState
 
 
@@ -25,6 +27,7 @@ def _infer_visualization_preferences(text: str) -> list[str]:
         "histogram": ["distribution", "hist", "spread", "long tail"],
         "scatter": ["scatter", "outlier", "anomaly"],
         "box": ["variance", "box", "dispersion"],
+        "heatmap": ["heatmap", "correlat"],
     }
     for chart, words in keyword_map.items():
         if any(word in lowered for word in words):
@@ -52,6 +55,7 @@ def _heuristic_intent(combined: str) -> dict[str, Any]:
         "anomaly": ["anomaly", "outlier", "unusual"],
         "variance": ["variance", "volatile", "dispersion", "stability"],
         "distribution": ["distribution", "long tail", "tail", "skew"],
+        "correlation": ["correlat", "relationship", "driver", "related to"],
         "summary": ["summary", "overview", "kpi", "basic stats", "statistics"],
     }
     for label, keys in focus_map.items():
@@ -107,12 +111,24 @@ def _build_intent_prompt(combined: str, prompt_cfg: dict[str, Any]) -> str:
     return "\n".join(lines).strip()
 
 
-def _llm_intent(client: ChatClient, combined: str, prompt_cfg: dict[str, Any]) -> dict[str, Any]:
+def _llm_intent(
+    client: ChatClient,
+    combined: str,
+    prompt_cfg: dict[str, Any],
+    cache: IntentCache | None = None,
+    namespace: str = "",
+) -> dict[str, Any]:
+    if cache is not None:
+        hit = cache.lookup(combined, namespace)
+        if hit is not None:
+            # The matched request is another user's text; only the score leaves the cache.
+            return {**hit.intent, "cache": {"similarity": hit.similarity}}
+
     prompt = _build_intent_prompt(combined, prompt_cfg)
     output = client.invoke_text(prompt)
     try:
         parsed = json.loads(output)
-        return {
+        intent = {
             "requested_focus": parsed.get("requested_focus") or ["summary"],
             "visualization_preferences": parsed.get("visualization_preferences") or [],
             "needs_clarification": bool(parsed.get("needs_clarification", False)),
@@ -120,16 +136,24 @@ def _llm_intent(client: ChatClient, combined: str, prompt_cfg: dict[str, Any]) -
         }
     except Exception:
         return _heuristic_intent(combined)
+    # Only real model answers are cached; the heuristic fallback is cheaper to recompute.
+    if cache is not None:
+        cache.put(combined, intent, namespace)
+    return intent
 
 
 def build_intent_agent(chat_client: ChatClient, prompt_cfg: dict[str, Any]):
+    # Cached intents are only valid for the prompt pack that produced them,
+    # and are never shared between tenants.
+    pack = format(zlib.crc32(json.dumps(prompt_cfg, sort_keys=True, default=str).encode("utf-8")), "08x")
+
     def run_intent_agent(state: GraphState) -> GraphState:
         prompt = (state.get("user_prompt") or "").strip()
         clarification = (state.get("clarification") or "").strip()
         combined = f"{prompt} {clarification}".strip()
 
         parsed = (
-            _llm_intent(chat_client, combined, prompt_cfg)
+            _llm_intent(chat_client, combined, prompt_cfg, get_intent_cache(), f"{pack}:{current_llm_tenant()}")
             if combined
             else _heuristic_intent(combined)
         )
@@ -143,6 +167,8 @@ def build_intent_agent(chat_client: ChatClient, prompt_cfg: dict[str, Any]):
             "visualization_preferences": parsed["visualization_preferences"],
             "column_hints": column_hints,
         }
+        if "cache" in parsed:
+            state["intent"]["cache"] = parsed["cache"]
         return state
 
     return run_intent_agent
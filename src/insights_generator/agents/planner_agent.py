@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from insights_generator.frame_registry import state_frame
+from insights_generator.state import GraphState
+
+
+METRIC_GROUPS = ("summary", "distribution", "variance", "anomalies", "rolling", "correlations")
+CHART_NAMES = ("distribution", "anomaly", "variance", "trend", "correlation")
+
+# What each requested focus needs computed and drawn. "summary" is the
+# catch-all overview, so it keeps the full plan.
+FOCUS_PLAN: dict[str, dict[str, tuple[str, ...]]] = {
+    "summary": {"metrics": METRIC_GROUPS, "charts": CHART_NAMES},
+    "trend": {"metrics": ("summary", "rolling"), "charts": ("trend",)},
+    "anomaly": {"metrics": ("summary", "anomalies", "rolling"), "charts": ("anomaly",)},
+    "variance": {"metrics": ("summary", "variance"), "charts": ("variance",)},
+    "distribution": {"metrics": ("summary", "distribution"), "charts": ("distribution",)},
+    "correlation": {"metrics": ("summary", "correlations"), "charts": ("correlation",)},
+}
+PREFERENCE_CHARTS = {
+    "line": "trend",
+    "histogram": "distribution",
+    "scatter": "anomaly",
+    "box": "variance",
+    "bar": "variance",
+    "heatmap": "correlation",
+}
+CHART_METRICS = {
+    "anomaly": "anomalies",
+    "trend": "rolling",
+    "variance": "variance",
+    "distribution": "distribution",
+    "correlation": "correlations",
+}
+
+
+def full_plan(numeric_cols: list[str]) -> dict[str, Any]:
+    return {
+        "columns": list(numeric_cols),
+        "primary_column": numeric_cols[0] if numeric_cols else None,
+        "metrics": list(METRIC_GROUPS),
+        "charts": list(CHART_NAMES),
+        "pruned": False,
+    }
+
+
+def _match_columns(column_hints: list[str], numeric_cols: list[str]) -> list[str]:
+    by_lower = {col.lower(): col for col in numeric_cols}
+    matched = [by_lower[hint.lower()] for hint in column_hints if hint.lower() in by_lower]
+    return list(dict.fromkeys(matched))
+
+
+def build_execution_plan(intent: dict[str, Any], numeric_cols: list[str]) -> dict[str, Any]:
+    """Smallest set of columns, metric groups and charts that answers the intent."""
+    focus = [item for item in intent.get("requested_focus", []) if item in FOCUS_PLAN] or ["summary"]
+    if "summary" in focus:
+        plan = full_plan(numeric_cols)
+    else:
+        metrics: list[str] = []
+        charts: list[str] = []
+        for item in focus:
+            metrics.extend(FOCUS_PLAN[item]["metrics"])
+            charts.extend(FOCUS_PLAN[item]["charts"])
+        for preference in intent.get("visualization_preferences", []):
+            chart = PREFERENCE_CHARTS.get(preference)
+            if chart:
+                charts.append(chart)
+                if chart in CHART_METRICS:
+                    metrics.append(CHART_METRICS[chart])
+        metrics = [group for group in METRIC_GROUPS if group in metrics]
+        charts = [name for name in CHART_NAMES if name in charts]
+        plan = {
+            "columns": list(numeric_cols),
+            "primary_column": numeric_cols[0] if numeric_cols else None,
+            "metrics": metrics,
+            "charts": charts,
+            "pruned": True,
+        }
+
+    hinted = _match_columns(intent.get("column_hints", []), numeric_cols)
+    if hinted:
+        plan["primary_column"] = hinted[0]
+        # Correlations need partner columns, so they keep the full set.
+        if "correlations" not in plan["metrics"]:
+            plan["columns"] = hinted
+            plan["pruned"] = plan["pruned"] or len(hinted) < len(numeric_cols)
+    return plan
+
+
+def merge_plans(plans: list[dict[str, Any]], numeric_cols: list[str]) -> dict[str, Any]:
+    """One plan covering every column, metric group and chart of ``plans``."""
+    columns = {col for plan in plans for col in plan["columns"]}
+    metrics = {group for plan in plans for group in plan["metrics"]}
+    charts = {name for plan in plans for name in plan["charts"]}
+    merged_columns = [col for col in numeric_cols if col in columns]
+    return {
+        "columns": merged_columns,
+        "primary_column": merged_columns[0] if merged_columns else None,
+        "metrics": [group for group in METRIC_GROUPS if group in metrics],
+        "charts": [name for name in CHART_NAMES if name in charts],
+        "pruned": len(merged_columns) < len(numeric_cols) or len(metrics) < len(METRIC_GROUPS),
+    }
+
+
+def run_planner_agent(state: GraphState) -> GraphState:
+    numeric_cols = state_frame(state).select_dtypes(include=[np.number]).columns.tolist()
+    state["execution_plan"] = build_execution_plan(state.get("intent", {}), numeric_cols)
+    return state
@@ -1,77 +1,372 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable
 
 import numpy as np
+import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 
+from insights_generator.agents.planner_agent import full_plan
+from insights_generator.analytics.correlation import correlation_matrix, heatmap_columns
+from insights_generator.analytics.rolling import rolling_bands
+from insights_generator.artifact_store import ArtifactStore, get_artifact_store
+from insights_generator.config import load_config
+from insights_generator.frame_registry import state_frame
+from insights_generator.mcp_charts import build_chart_specs, execute_chart_specs
+from insights_generator.profiling import attached_thread
+from insights_generator.repl_pool import SharedFrame, get_repl_pool
 from insights_generator.state import GraphState
 from insights_generator.templates.chart_templates import CHART_TEMPLATES
 
+try:
+    import orjson  # type: ignore  # noqa: F401
 
-def _write_figure(fig, out_dir: Path, name: str) -> dict[str, Any]:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    html_path = out_dir / f"{name}.html"
-    json_path = out_dir / f"{name}.json"
-    fig.write_html(html_path)
-    json_path.write_text(fig.to_json(), encoding="utf-8")
+    JSON_ENGINE = "orjson"
+except Exception:  # pragma: no cover - optional dependency
+    JSON_ENGINE = "json"
+
+
+PLOTLYJS_NAME = "plotly.min.js"
+_HTML_TEMPLATE = """<html>
+<head><meta charset="utf-8" /></head>
+<body>
+<div id="{div_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>
+<script src="{plotlyjs}"></script>
+<script>
+var figure = {figure};
+Plotly.newPlot("{div_id}", figure.data, figure.layout, {{"responsive": true}});
+</script>
+</body>
+</html>
+"""
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _warm_plotly_template() -> None:
+    # plotly.express reads trace defaults from the shared default template, and
+    # plotly creates those child objects lazily on first access. Concurrent
+    # first reads race and fail with "Invalid value", so materialize them once.
+    template = pio.templates[pio.templates.default]
+    for trace_type in template.data._valid_props:
+        for trace in getattr(template.data, trace_type) or ():
+            for child_name in ("marker", "line"):
+                child = getattr(trace, child_name, None)
+                for prop in ("color", "symbol", "dash"):
+                    if child is not None and prop in child._valid_props:
+                        getattr(child, prop)
+    template.layout.colorway
+
+
+def _chart_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _warm_plotly_template()
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(load_config().chart_render_workers, 1),
+                thread_name_prefix="chart-render",
+            )
+        return _EXECUTOR
+
+
+@lru_cache(maxsize=1)
+def _plotlyjs_bytes() -> bytes:
+    from plotly.offline import get_plotlyjs
+
+    return get_plotlyjs().encode("utf-8")
+
+
+def _figure_html(figure_json: str, name: str) -> str:
+    # Serialize once and embed that JSON, instead of letting to_html encode the
+    # figure a second time. "</" is escaped so data cannot close the script tag.
+    # The HTML loads plotly.js from next to it rather than inlining ~4.8 MB per
+    # chart; the store keeps a single deduplicated copy of that script.
+    return _HTML_TEMPLATE.format(
+        div_id=f"chart-{name}",
+        plotlyjs=PLOTLYJS_NAME,
+        figure=figure_json.replace("</", "<\\/"),
+    )
+
+
+def _render_chart(
+    build: Callable[[], Any],
+    store: ArtifactStore,
+    session_id: str,
+    name: str,
+    artifact_name: str | None = None,
+) -> dict[str, Any]:
+    with attached_thread(session_id):
+        started = time.perf_counter()
+        fig = build()
+        built = time.perf_counter()
+        figure_json = pio.to_json(fig, validate=False, engine=JSON_ENGINE)
+        html = _figure_html(figure_json, name)
+        serialized = time.perf_counter()
+        chart = _store_chart(store, session_id, name, figure_json, html, artifact_name)
+        written = time.perf_counter()
+    chart["meta"] = {
+        "json_engine": JSON_ENGINE,
+        "timing_ms": {
+            "build": round((built - started) * 1000, 3),
+            "serialize": round((serialized - built) * 1000, 3),
+            "write": round((written - serialized) * 1000, 3),
+            "total": round((written - started) * 1000, 3),
+        },
+    }
+    return chart
+
+
+def _store_chart(
+    store: ArtifactStore,
+    session_id: str,
+    name: str,
+    figure_json: str,
+    html: str,
+    artifact_name: str | None = None,
+) -> dict[str, Any]:
+    artifact_name = artifact_name or name
+    html_ref = store.put(session_id, f"{artifact_name}.html", html.encode("utf-8"), "text/html; charset=utf-8")
+    json_ref = store.put(session_id, f"{artifact_name}.json", figure_json.encode("utf-8"), "application/json")
     return {
         "name": name,
-        "html_path": str(html_path),
-        "json_path": str(json_path),
+        "html_url": html_ref["url"],
+        "json_url": json_ref["url"],
+        "sha256": {"html": html_ref["sha256"], "json": json_ref["sha256"]},
         "template": CHART_TEMPLATES.get(name, {}),
     }
 
 
-def _try_python_repl_plotly(state: GraphState) -> None:
-    if not state.get("use_python_repl"):
-        return
-    try:
-        from langchain_experimental.utilities import PythonREPL  # type: ignore
-    except Exception:
-        return
+DEFAULT_REPL_CODE = """\
+fig = px.histogram(df, x=primary_column, marginal="box", nbins=50, title=f"Custom view of {primary_column}")
+"""
+
+
+def _run_repl_chart(state: GraphState, store: ArtifactStore, primary_numeric: str) -> dict[str, Any]:
+    """Run ``DEFAULT_REPL_CODE`` in a pre-warmed REPL worker; ``fig`` becomes the chart."""
+    with SharedFrame(state_frame(state)) as frame:
+        result = get_repl_pool().execute(DEFAULT_REPL_CODE, frame, variables={"primary_column": primary_numeric})
+    if not result.ok or result.figure_json is None:
+        error = result.error or "Code ran but did not assign a Plotly figure to `fig`."
+        return {"name": "repl", "template": CHART_TEMPLATES.get("repl", {}), "meta": {**result.to_dict(), "error": error}}
+    chart = _store_chart(store, state["session_id"], "repl", result.figure_json, _figure_html(result.figure_json, "repl"))
+    chart["meta"] = result.to_dict()
+    return chart
+
+
+def _run_mcp_charts(
+    state: GraphState,
+    store: ArtifactStore,
+    plan: dict[str, Any],
+    analytics: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Render planned charts on the configured MCP servers from aggregated specs."""
+    mcp = load_config().mcp
+    if not mcp.servers:
+        return [{"name": "mcp", "template": {}, "meta": {"status": "not_configured"}}]
+
+    charts = []
+    specs = build_chart_specs(state_frame(state), analytics, plan)
+    for call in execute_chart_specs(specs, mcp):
+        name = f"mcp_{call['chart']}"
+        result = call["result"]
+        if isinstance(result, dict) and "data" in result and "layout" in result:
+            # A Plotly figure comes back: store it like a locally rendered chart.
+            figure_json = pio.to_json(result, validate=False, engine=JSON_ENGINE)
+            chart = _store_chart(store, state["session_id"], name, figure_json, _figure_html(figure_json, name))
+        else:
+            chart = {"name": name, "template": CHART_TEMPLATES.get(call["chart"], {}), "result": result}
+        chart["meta"] = call["meta"]
+        charts.append(chart)
+    return charts
+
+
+def _column_values(df: pd.DataFrame, column: str) -> np.ndarray:
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
 
-    repl = PythonREPL()
-    repl.run("ready = True")
+
+def _add_rolling_band(fig: go.Figure, bands: dict[str, np.ndarray], window: int) -> None:
+    x = np.arange(bands["median"].shape[0])
+    fig.add_trace(
+        go.Scatter(x=x, y=bands["upper"], mode="lines", line={"width": 0}, showlegend=False, hoverinfo="skip")
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=bands["lower"],
+            mode="lines",
+            line={"width": 0},
+            fill="tonexty",
+            fillcolor="rgba(99, 110, 250, 0.15)",
+            name="rolling IQR band",
+        )
+    )
+    fig.add_trace(go.Scatter(x=x, y=bands["median"], mode="lines", name=f"rolling median ({window} rows)"))
+
+
+def _trend_figure(df: pd.DataFrame, column: str, rolling: dict[str, Any] | None) -> go.Figure:
+    fig = px.line(df.reset_index(), x="index", y=column, title=f"Trend of {column}")
+    info = (rolling or {}).get("by_column", {}).get(column)
+    if info is None:
+        return fig
+    _add_rolling_band(fig, rolling_bands(_column_values(df, column), rolling["window"]), rolling["window"])
+    for point in info["change_points"]:
+        fig.add_vline(x=point["row"], line_dash="dash", line_color="firebrick")
+    return fig
+
+
+def _anomaly_figure(df: pd.DataFrame, column: str, rolling: dict[str, Any] | None) -> go.Figure:
+    title = f"Anomaly View for {column}"
+    if column not in (rolling or {}).get("by_column", {}):
+        return px.scatter(df.reset_index(), x="index", y=column, title=title)
+    values = _column_values(df, column)
+    bands = rolling_bands(values, rolling["window"])
+    # Color by the local fences, so seasonal highs are not painted as outliers.
+    with np.errstate(invalid="ignore"):
+        outside = (values < bands["lower"]) | (values > bands["upper"])
+    points = pd.DataFrame(
+        {"index": np.arange(values.shape[0]), column: values, "flag": np.where(outside, "local outlier", "normal")}
+    )
+    fig = px.scatter(points, x="index", y=column, color="flag", title=title)
+    _add_rolling_band(fig, bands, rolling["window"])
+    return fig
+
+
+def _chart_builders(
+    df: pd.DataFrame,
+    analytics: dict[str, Any],
+    plan: dict[str, Any],
+) -> list[tuple[str, tuple[Any, ...], Callable[[], Any]]]:
+    """``(name, key, build)`` for each planned chart, in plan order.
+
+    The key holds everything besides the frame that the chart is drawn from,
+    so equal keys over the same frame give the same figure.
+    """
+    numeric_cols = analytics.get("numeric_columns", [])
+    charts = set(plan["charts"])
+    primary_numeric = plan.get("primary_column") or numeric_cols[0]
+    has_rolling = "rolling" in analytics
+
+    builders: list[tuple[str, tuple[Any, ...], Callable[[], Any]]] = []
+    if "distribution" in charts:
+        builders.append(
+            (
+                "distribution",
+                ("distribution", primary_numeric),
+                lambda: px.histogram(df, x=primary_numeric, nbins=50, title=f"Distribution of {primary_numeric}"),
+            )
+        )
+    rolling = analytics.get("rolling")
+    if "anomaly" in charts:
+        builders.append(
+            ("anomaly", ("anomaly", primary_numeric, has_rolling), lambda: _anomaly_figure(df, primary_numeric, rolling))
+        )
+    if "variance" in charts:
+        builders.append(
+            (
+                "variance",
+                ("variance", tuple(numeric_cols)),
+                lambda: px.box(
+                    df[numeric_cols].melt(var_name="metric", value_name="value"),
+                    x="metric",
+                    y="value",
+                    title="Variance Overview",
+                ),
+            )
+        )
+    if "trend" in charts:
+        builders.append(
+            ("trend", ("trend", primary_numeric, has_rolling), lambda: _trend_figure(df, primary_numeric, rolling))
+        )
+
+    top_pairs = analytics.get("correlations", {}).get("top_pairs", [])
+    if "correlation" in charts and top_pairs:
+        heat_cols = heatmap_columns(top_pairs)
+        builders.append(
+            (
+                "correlation",
+                ("correlation", tuple(heat_cols)),
+                lambda: px.imshow(
+                    correlation_matrix(df, heat_cols),
+                    x=heat_cols,
+                    y=heat_cols,
+                    zmin=-1,
+                    zmax=1,
+                    color_continuous_scale="RdBu_r",
+                    title="Strongest Correlations",
+                ),
+            )
+        )
+    return builders
+
+
+def render_shared_charts(
+    df: pd.DataFrame,
+    session_id: str,
+    requests: list[tuple[dict[str, Any], dict[str, Any]]],
+) -> list[list[dict[str, Any]]]:
+    """Charts for several ``(analytics, plan)`` pairs over one frame.
+
+    Charts with equal keys are rendered and stored once and listed for every
+    request that planned them; a second variant of a chart name is stored as
+    ``<name>-2`` and so on.
+    """
+    store = get_artifact_store()
+    executor = _chart_executor()
+    rendered: dict[tuple[Any, ...], Any] = {}
+    variants: dict[str, int] = {}
+    planned: list[list[Any]] = []
+    for analytics, plan in requests:
+        futures = []
+        if analytics.get("numeric_columns") and plan["charts"]:
+            if not rendered:
+                store.put(session_id, PLOTLYJS_NAME, _plotlyjs_bytes(), "application/javascript")
+            for name, key, build in _chart_builders(df, analytics, plan):
+                if key not in rendered:
+                    variants[name] = variants.get(name, 0) + 1
+                    artifact_name = name if variants[name] == 1 else f"{name}-{variants[name]}"
+                    rendered[key] = executor.submit(_render_chart, build, store, session_id, name, artifact_name)
+                futures.append(rendered[key])
+        planned.append(futures)
+    return [[dict(future.result()) for future in futures] for futures in planned]
 
 
 def run_visualization_agent(state: GraphState) -> GraphState:
-    df = state["dataframe"]
+    df = state_frame(state)
     analytics = state.get("analytics", {})
     numeric_cols = analytics.get("numeric_columns", [])
-    out_dir = Path("artifacts") / state["session_id"]
-
-    _try_python_repl_plotly(state)
+    session_id = state["session_id"]
+    store = get_artifact_store()
 
+    plan = state.get("execution_plan") or full_plan(numeric_cols)
     visualizations: list[dict[str, Any]] = []
-    if not numeric_cols:
+    if not numeric_cols or not plan["charts"]:
         state["visualizations"] = visualizations
         return state
 
-    primary_numeric = numeric_cols[0]
+    store.put(session_id, PLOTLYJS_NAME, _plotlyjs_bytes(), "application/javascript")
+    primary_numeric = plan.get("primary_column") or numeric_cols[0]
 
-    hist = px.histogram(df, x=primary_numeric, nbins=50, title=f"Distribution of {primary_numeric}")
-    visualizations.append(_write_figure(hist, out_dir, "distribution"))
+    # Build, serialize and store charts concurrently; results keep plan order.
+    executor = _chart_executor()
+    futures = [
+        executor.submit(_render_chart, build, store, session_id, name)
+        for name, _key, build in _chart_builders(df, analytics, plan)
+    ]
+    visualizations.extend(future.result() for future in futures)
 
-    scatter = px.scatter(df.reset_index(), x="index", y=primary_numeric, title=f"Anomaly View for {primary_numeric}")
-    visualizations.append(_write_figure(scatter, out_dir, "anomaly"))
-
-    melted = df[numeric_cols].melt(var_name="metric", value_name="value")
-    box = px.box(melted, x="metric", y="value", title="Variance Overview")
-    visualizations.append(_write_figure(box, out_dir, "variance"))
-
-    line = px.line(df.reset_index(), x="index", y=primary_numeric, title=f"Trend of {primary_numeric}")
-    visualizations.append(_write_figure(line, out_dir, "trend"))
+    if state.get("use_python_repl"):
+        visualizations.append(_run_repl_chart(state, store, primary_numeric))
 
     if state.get("use_mcp"):
-        visualizations.append(
-            {
-                "name": "mcp_hook",
-                "template": {"description": "MCP execution hook requested."},
-                "meta": {"status": "ready_for_mcp_chart_execution"},
-            }
-        )
+        visualizations.extend(_run_mcp_charts(state, store, plan, analytics))
 
     state["visualizations"] = visualizations
     return state
@@ -0,0 +1,11 @@
+__all__ = [
+    "anomalies",
+    "backends",
+    "compare",
+    "correlation",
+    "incremental",
+    "moments",
+    "rolling",
+    "sampling",
+    "thresholds",
+]
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.analytics.thresholds import IQR_MULTIPLIER
+
+
+ROBUST_Z_THRESHOLD = 3.5
+ROLLING_WINDOW = 50
+ROLLING_Z_THRESHOLD = 3.0
+
+METHOD_FLAGS = {
+    "iqr": 1,
+    "robust_z": 2,
+    "rolling": 4,
+    "local_iqr": 8,
+}
+
+
+def _methods_for(flag: int) -> list[str]:
+    return [name for name, bit in METHOD_FLAGS.items() if flag & bit]
+
+
+@dataclass
+class AnomalyIndex:
+    """Compact per-column index of anomalous row positions.
+
+    For every column, ``positions`` holds sorted row positions (``iloc``) and
+    ``flags`` the matching bitmask of methods that flagged the row.
+    """
+
+    row_count: int
+    positions: dict[str, np.ndarray]
+    flags: dict[str, np.ndarray]
+    _union_cache: dict[int, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.positions)
+
+    def _mask(self, column: str, method: str | None) -> np.ndarray:
+        flags = self.flags[column]
+        if method is None:
+            return np.ones(flags.shape, dtype=bool)
+        return (flags & METHOD_FLAGS[method]) != 0
+
+    def rows_for(self, column: str | None = None, method: str | None = None) -> np.ndarray:
+        if method is not None and method not in METHOD_FLAGS:
+            raise ValueError(f"Unknown anomaly method '{method}'. Use one of {sorted(METHOD_FLAGS)}.")
+        if column is not None:
+            if column not in self.positions:
+                raise KeyError(column)
+            return self.positions[column][self._mask(column, method)]
+
+        cache_key = METHOD_FLAGS.get(method, 0) if method else 0
+        cached = self._union_cache.get(cache_key)
+        if cached is None:
+            parts = [self.positions[col][self._mask(col, method)] for col in self.positions]
+            cached = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            self._union_cache[cache_key] = cached
+        return cached
+
+    def count(self, column: str, method: str | None = None) -> int:
+        return int(self._mask(column, method).sum())
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        return {
+            col: {
+                **{method: self.count(col, method) for method in METHOD_FLAGS},
+                "any": int(self.positions[col].size),
+            }
+            for col in self.positions
+        }
+
+    def row_details(self, rows: np.ndarray) -> dict[int, dict[str, list[str]]]:
+        """Map each row position to the columns and methods that flagged it."""
+        details: dict[int, dict[str, list[str]]] = {int(row): {} for row in rows}
+        for col, positions in self.positions.items():
+            if positions.size == 0:
+                continue
+            hits = np.minimum(np.searchsorted(positions, rows), positions.size - 1)
+            found = positions[hits] == rows
+            for row, flag in zip(rows[found].tolist(), self.flags[col][hits[found]].tolist()):
+                details[int(row)][col] = _methods_for(int(flag))
+        return details
+
+
+def _numeric_matrix(df: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    block = df[columns]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+        block = block.apply(pd.to_numeric, errors="coerce")
+    return block.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _rolling_flags(values: np.ndarray, window: int, threshold: float) -> np.ndarray:
+    """Flag points far from the mean of the valid points in the preceding ``window`` rows.
+
+    NaN rows stay in the window but do not count; a point is only judged when
+    at least half of its window is valid. Window sums come from cumulative
+    sums, so the cost is O(rows) per column regardless of window size.
+    """
+    n = values.shape[0]
+    if n <= window:
+        return np.zeros(values.shape, dtype=bool)
+
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-NaN columns have no mean; they have no valid points to flag either.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centered = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    zeros = np.zeros((1, values.shape[1]))
+    csum = np.vstack([zeros, np.cumsum(centered, axis=0)])
+    csq = np.vstack([zeros, np.cumsum(centered * centered, axis=0)])
+    ccount = np.vstack([zeros, np.cumsum(valid, axis=0)])
+
+    end = np.arange(n)
+    start = np.maximum(end - window, 0)
+    count = ccount[end] - ccount[start]
+    total = csum[end] - csum[start]
+    squares = csq[end] - csq[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+        z = np.abs(centered - mean) / std
+    return valid & (count >= window // 2) & (std > 0) & (z > threshold)
+
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    columns: list[str],
+    rolling_window: int = ROLLING_WINDOW,
+    local_outliers: np.ndarray | None = None,
+) -> AnomalyIndex:
+    """Run IQR, robust z-score (MAD) and rolling deviation over all columns at once.
+
+    ``local_outliers`` is the ``(rows, columns)`` mask from rolling analytics;
+    when given, its rows are flagged as ``local_iqr``.
+    """
+    if not columns:
+        return AnomalyIndex(row_count=int(len(df)), positions={}, flags={})
+
+    values = _numeric_matrix(df, columns)
+    # All-NaN columns get NaN fences and flag nothing; numpy would warn about each.
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+        iqr_hit = (values < q1 - IQR_MULTIPLIER * iqr) | (values > q3 + IQR_MULTIPLIER * iqr)
+
+        median = np.nanmedian(values, axis=0)
+        mad = np.nanmedian(np.abs(values - median), axis=0)
+        robust_z = 0.6745 * np.abs(values - median) / mad
+        mad_hit = (mad > 0) & (robust_z > ROBUST_Z_THRESHOLD)
+
+    rolling_hit = _rolling_flags(values, rolling_window, ROLLING_Z_THRESHOLD)
+
+    flags = (
+        iqr_hit.astype(np.uint8) * METHOD_FLAGS["iqr"]
+        | mad_hit.astype(np.uint8) * METHOD_FLAGS["robust_z"]
+        | rolling_hit.astype(np.uint8) * METHOD_FLAGS["rolling"]
+    )
+    if local_outliers is not None:
+        flags |= local_outliers.astype(np.uint8) * METHOD_FLAGS["local_iqr"]
+
+    position_dtype = np.int32 if len(df) < np.iinfo(np.int32).max else np.int64
+    col_idx, row_idx = np.nonzero(flags.T)
+    bounds = np.searchsorted(col_idx, np.arange(len(columns) + 1))
+    positions: dict[str, np.ndarray] = {}
+    column_flags: dict[str, np.ndarray] = {}
+    for j, col in enumerate(columns):
+        rows = row_idx[bounds[j]:bounds[j + 1]]
+        positions[col] = rows.astype(position_dtype)
+        column_flags[col] = flags[rows, j]
+
+    return AnomalyIndex(row_count=int(len(df)), positions=positions, flags=column_flags)
+
+
+def flagged_rows(index: AnomalyIndex, df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of the rows any method flagged, indexed by row position."""
+    rows = index.rows_for()
+    return df.iloc[rows].set_axis(pd.Index(rows, name="row"))
+
+
+def page_anomalies(
+    index: AnomalyIndex,
+    rows_frame: pd.DataFrame,
+    column: str | None = None,
+    method: str | None = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> dict[str, Any]:
+    """Page through flagged rows; ``rows_frame`` comes from ``flagged_rows``."""
+    rows = index.rows_for(column, method)
+    selected = rows[offset:offset + limit]
+    details = index.row_details(selected)
+    frame = rows_frame.loc[selected]
+    records = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+    return {
+        "total": int(rows.size),
+        "offset": offset,
+        "limit": limit,
+        "rows": [
+            {"row": int(row), "flags": details[int(row)], "values": record}
+            for row, record in zip(selected.tolist(), records)
+        ],
+    }
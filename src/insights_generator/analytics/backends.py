@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Protocol, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from insights_generator.config import load_config
+
+
+class AnalyticsBackend(Protocol):
+    """Column reductions behind the analytics agent's per-column statistics.
+
+    ``numeric_values`` returns the column's non-null numeric values in the
+    backend's own representation; every other method takes that value (or a
+    subset of it from ``select``). Variance and standard deviation are
+    population (ddof=0); quantiles interpolate linearly, as pandas does.
+    """
+
+    name: str
+    # Whether reductions release the GIL, so columns can be analysed in parallel threads.
+    parallel_columns: bool
+
+    def numeric_values(self, df: pd.DataFrame, col: str) -> Any: ...
+
+    def count(self, values: Any) -> int: ...
+
+    def min_max(self, values: Any) -> tuple[float, float]: ...
+
+    def mean(self, values: Any) -> float: ...
+
+    def variance(self, values: Any) -> float: ...
+
+    def std(self, values: Any) -> float: ...
+
+    def median(self, values: Any) -> float: ...
+
+    def quantiles(self, values: Any, qs: Sequence[float]) -> list[float]: ...
+
+    def mode(self, values: Any, limit: int) -> list[Any]: ...
+
+    def skew(self, values: Any) -> float: ...
+
+    def outside(self, values: Any, lower: float, upper: float) -> Any: ...
+
+    def select(self, values: Any, mask: Any) -> Any: ...
+
+    def head(self, values: Any, n: int) -> list[Any]: ...
+
+
+class PandasBackend:
+    """Reference implementation on pandas Series."""
+
+    name = "pandas"
+    parallel_columns = False
+
+    def numeric_values(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return pd.to_numeric(df[col], errors="coerce").dropna()
+
+    def count(self, values: pd.Series) -> int:
+        return int(values.count())
+
+    def min_max(self, values: pd.Series) -> tuple[float, float]:
+        return float(values.min()), float(values.max())
+
+    def mean(self, values: pd.Series) -> float:
+        return float(values.mean())
+
+    def variance(self, values: pd.Series) -> float:
+        return float(values.var(ddof=0))
+
+    def std(self, values: pd.Series) -> float:
+        return float(values.std(ddof=0))
+
+    def median(self, values: pd.Series) -> float:
+        return float(values.median())
+
+    def quantiles(self, values: pd.Series, qs: Sequence[float]) -> list[float]:
+        return [float(values.quantile(q)) for q in qs]
+
+    def mode(self, values: pd.Series, limit: int) -> list[Any]:
+        modes = values.mode(dropna=True)
+        return modes.head(limit).tolist() if not modes.empty else []
+
+    def skew(self, values: pd.Series) -> float:
+        return float(values.skew())
+
+    def outside(self, values: pd.Series, lower: float, upper: float) -> pd.Series:
+        return (values < lower) | (values > upper)
+
+    def select(self, values: pd.Series, mask: pd.Series) -> pd.Series:
+        return values[mask]
+
+    def head(self, values: pd.Series, n: int) -> list[Any]:
+        return values.head(n).tolist()
+
+
+class ArrowBackend:
+    """pyarrow.compute kernels on Arrow arrays and chunked arrays.
+
+    Numeric pandas columns convert without copying their data buffers (and
+    Arrow-backed columns are used as they are), so Arrow and Parquet uploads
+    are reduced straight from the buffers they were read into. The kernels
+    release the GIL, which lets the agent analyse columns in parallel.
+    """
+
+    name = "arrow"
+    parallel_columns = True
+
+    def numeric_values(self, df: pd.DataFrame, col: str) -> pa.Array | pa.ChunkedArray:
+        series = df[col]
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            series = pd.to_numeric(series, errors="coerce")
+        # from_pandas turns NaN into nulls; drop_null is free when there are none.
+        return pc.drop_null(pa.array(series, from_pandas=True))
+
+    def count(self, values: pa.Array | pa.ChunkedArray) -> int:
+        return len(values)
+
+    def min_max(self, values: pa.Array | pa.ChunkedArray) -> tuple[float, float]:
+        bounds = pc.min_max(values)
+        return float(bounds["min"].as_py()), float(bounds["max"].as_py())
+
+    def mean(self, values: pa.Array | pa.ChunkedArray) -> float:
+        return float(pc.mean(values).as_py())
+
+    def variance(self, values: pa.Array | pa.ChunkedArray) -> float:
+        return float(pc.variance(values, ddof=0).as_py())
+
+    def std(self, values: pa.Array | pa.ChunkedArray) -> float:
+        return float(pc.stddev(values, ddof=0).as_py())
+
+    def median(self, values: pa.Array | pa.ChunkedArray) -> float:
+        return self.quantiles(values, (0.5,))[0]
+
+    def quantiles(self, values: pa.Array | pa.ChunkedArray, qs: Sequence[float]) -> list[float]:
+        return [float(q) for q in pc.quantile(values, q=list(qs), interpolation="linear").to_pylist()]
+
+    def mode(self, values: pa.Array | pa.ChunkedArray, limit: int) -> list[Any]:
+        # Most common first, ties smallest first; keep only the values tied
+        # for the top count, which is what pandas calls the mode.
+        modes = pc.mode(values, n=limit)
+        if len(modes) == 0:
+            return []
+        counts = modes.field("count").to_pylist()
+        return [value for value, count in zip(modes.field("mode").to_pylist(), counts) if count == counts[0]]
+
+    def skew(self, values: pa.Array | pa.ChunkedArray) -> float:
+        # Sample (bias-corrected) skewness with pandas' edge cases: NaN below
+        # three values, zero for a constant column.
+        n = len(values)
+        if n < 3:
+            return float("nan")
+        if hasattr(pc, "skew"):
+            variance = pc.variance(values, ddof=0).as_py()
+            if variance == 0:
+                return 0.0
+            return float(pc.skew(values, biased=False).as_py())
+        # pyarrow < 20 has no skew kernel: build it from the central moments.
+        deviations = pc.subtract(pc.cast(values, pa.float64()), pc.mean(values))
+        squares = pc.multiply(deviations, deviations)
+        m2 = pc.mean(squares).as_py()
+        if m2 == 0:
+            return 0.0
+        m3 = pc.mean(pc.multiply(squares, deviations)).as_py()
+        return float(math.sqrt(n * (n - 1)) / (n - 2) * m3 / m2**1.5)
+
+    def outside(self, values: pa.Array | pa.ChunkedArray, lower: float, upper: float) -> pa.Array | pa.ChunkedArray:
+        return pc.or_(pc.less(values, lower), pc.greater(values, upper))
+
+    def select(self, values: pa.Array | pa.ChunkedArray, mask: pa.Array | pa.ChunkedArray) -> pa.Array | pa.ChunkedArray:
+        return pc.filter(values, mask)
+
+    def head(self, values: pa.Array | pa.ChunkedArray, n: int) -> list[Any]:
+        return values.slice(0, n).to_pylist()
+
+
+BACKENDS: dict[str, type] = {"pandas": PandasBackend, "arrow": ArrowBackend}
+
+_BACKEND: AnalyticsBackend | None = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def build_backend(name: str) -> AnalyticsBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unsupported analytics backend '{name}'. Use one of {list(BACKENDS)}.") from None
+
+
+def get_analytics_backend() -> AnalyticsBackend:
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is None:
+            _BACKEND = build_backend(load_config().analytics_backend)
+        return _BACKEND
+
+
+def set_analytics_backend(backend: AnalyticsBackend | None) -> None:
+    global _BACKEND
+    with _BACKEND_LOCK:
+        _BACKEND = backend
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from insights_generator.analytics.incremental import IncrementalAnalytics
+from insights_generator.analytics.moments import ColumnState
+
+
+COMPARE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+PSI_BINS = 10
+PSI_FLOOR = 1e-4
+# Common PSI reading: below 0.1 no shift, 0.1-0.25 moderate, above 0.25 major.
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+
+def _finite(value: float) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
+def _change(baseline: float, current: float) -> dict[str, float | None]:
+    delta = current - baseline
+    return {
+        "baseline": _finite(baseline),
+        "current": _finite(current),
+        "delta": _finite(delta),
+        "delta_pct": _finite(delta / abs(baseline) * 100) if baseline else None,
+    }
+
+
+def _cdf(state: ColumnState, x: np.ndarray) -> np.ndarray:
+    return state.sketch.cdf(x, state.moments.min, state.moments.max)
+
+
+def ks_statistic(baseline: ColumnState, current: ColumnState) -> float:
+    """Two-sample Kolmogorov-Smirnov distance between the columns' quantile sketches."""
+    grid = np.union1d(baseline.sketch.means, current.sketch.means)
+    # The CDFs jump at data points, so look just past each one as well.
+    grid = np.concatenate([grid, np.nextafter(grid, np.inf)])
+    return float(np.max(np.abs(_cdf(baseline, grid) - _cdf(current, grid))))
+
+
+def population_stability_index(baseline: ColumnState, current: ColumnState, bins: int = PSI_BINS) -> float:
+    """PSI over the baseline's quantile bins, read from both sketches' CDFs."""
+    inner = np.linspace(0.0, 1.0, bins + 1)[1:-1]
+    edges = np.unique(baseline.sketch.quantile(inner, baseline.moments.min, baseline.moments.max))
+
+    def shares(state: ColumnState) -> np.ndarray:
+        cumulative = np.concatenate([[0.0], _cdf(state, edges), [1.0]])
+        return np.maximum(np.diff(cumulative), PSI_FLOOR)
+
+    expected, actual = shares(baseline), shares(current)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _shift_level(psi: float) -> str:
+    if psi >= PSI_MAJOR:
+        return "major"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "none"
+
+
+def compare_columns(baseline: ColumnState, current: ColumnState) -> dict[str, Any]:
+    before = baseline.to_analytics()
+    after = current.to_analytics()
+    lo, hi = baseline.moments.min, baseline.moments.max
+    quantiles_before = baseline.sketch.quantile(np.array(COMPARE_QUANTILES), lo, hi)
+    quantiles_after = current.sketch.quantile(np.array(COMPARE_QUANTILES), current.moments.min, current.moments.max)
+
+    # Share of the current rows outside the baseline's IQR fences: unlike the
+    # two anomaly rates, this moves when the whole distribution moves.
+    lower, upper = before["iqr_bounds"]["lower"], before["iqr_bounds"]["upper"]
+    below, at_or_below_upper = _cdf(current, np.array([lower, np.nextafter(upper, np.inf)]))
+    psi = population_stability_index(baseline, current)
+    return {
+        "count": {"baseline": before["count"], "current": after["count"]},
+        "mean": _change(before["mean"], after["mean"]),
+        "std": _change(before["std"], after["std"]),
+        "quantiles": {
+            f"p{round(q * 100):02d}": _change(float(b), float(a))
+            for q, b, a in zip(COMPARE_QUANTILES, quantiles_before, quantiles_after)
+        },
+        "anomaly_rate": {
+            **_change(before["anomaly_rate"], after["anomaly_rate"]),
+            "current_vs_baseline_fences": _finite(below + 1.0 - at_or_below_upper),
+        },
+        "psi": round(psi, 6),
+        "ks": round(ks_statistic(baseline, current), 6),
+        "shift": _shift_level(psi),
+    }
+
+
+def compare_profiles(baseline: IncrementalAnalytics, current: IncrementalAnalytics) -> dict[str, Any]:
+    """Per-column differences between two datasets' cached column states.
+
+    Works on the mergeable moments and quantile sketches only, so neither
+    dataset is rescanned and either side can come from any cache.
+    """
+    shared = [col for col in baseline.numeric_columns if col in current.column_states]
+    columns = {
+        col: compare_columns(baseline.column_states[col], current.column_states[col])
+        for col in shared
+        if baseline.column_states[col].moments.count and current.column_states[col].moments.count
+    }
+    shifted = sorted(
+        (col for col, info in columns.items() if info["shift"] != "none"),
+        key=lambda col: columns[col]["psi"],
+        reverse=True,
+    )
+    return {
+        "row_count": {
+            "baseline": baseline.row_count,
+            "current": current.row_count,
+            "delta": current.row_count - baseline.row_count,
+        },
+        "columns": columns,
+        "added_columns": [col for col in current.columns if col not in baseline.columns],
+        "removed_columns": [col for col in baseline.columns if col not in current.columns],
+        "shifted_columns": shifted,
+        "psi_thresholds": {"moderate": PSI_MODERATE, "major": PSI_MAJOR},
+    }
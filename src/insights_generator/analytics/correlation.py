@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import heapq
+import warnings
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+CORRELATION_BLOCK_SIZE = 128
+CORRELATION_TOP_K = 10
+CORRELATION_MIN_ABS = 0.5
+CORRELATION_MIN_PERIODS = 10
+
+
+def _prepare(block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Center each column and return (values with NaN as 0, validity mask) in float32."""
+    valid = ~np.isnan(block)
+    with warnings.catch_warnings():
+        # All-NaN columns have no mean; they are all masked out anyway.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centered = block - np.nanmean(block, axis=0)
+    values = np.where(valid, centered, 0.0).astype(np.float32)
+    return values, valid.astype(np.float32)
+
+
+def _pairwise(
+    xa: np.ndarray, ma: np.ndarray, xb: np.ndarray, mb: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pearson r and pairwise counts over rows where both columns are present."""
+    n = ma.T @ mb
+    sx = xa.T @ mb
+    sy = ma.T @ xb
+    sxx = (xa * xa).T @ mb
+    syy = ma.T @ (xb * xb)
+    sxy = xa.T @ xb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _numeric_block(df: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    return df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def correlation_matrix(df: pd.DataFrame, columns: list[str], method: str = "pearson") -> np.ndarray:
+    """Full NaN-aware correlation matrix; meant for the handful of heatmap columns."""
+    block = df[columns].rank() if method == "spearman" else df[columns]
+    values, mask = _prepare(_numeric_block(block, columns))
+    r, n = _pairwise(values, mask, values, mask)
+    r[n < CORRELATION_MIN_PERIODS] = np.nan
+    np.fill_diagonal(r, 1.0)
+    return r
+
+
+def top_correlated_pairs(
+    df: pd.DataFrame,
+    columns: list[str],
+    top_k: int = CORRELATION_TOP_K,
+    min_abs: float = CORRELATION_MIN_ABS,
+    min_periods: int = CORRELATION_MIN_PERIODS,
+    block_size: int = CORRELATION_BLOCK_SIZE,
+) -> dict[str, Any]:
+    """Pearson and Spearman correlations in column blocks, keeping only the top pairs.
+
+    Only ``block_size x block_size`` tiles of the matrix exist at any time, so
+    wide tables never materialise the full k x k result. Spearman uses ranks
+    computed per column over that column's non-null values.
+    """
+    result: dict[str, Any] = {
+        "methods": ["pearson", "spearman"],
+        "columns_considered": len(columns),
+        "min_abs": min_abs,
+        "top_pairs": [],
+    }
+    if len(columns) < 2:
+        return result
+
+    raw = _numeric_block(df, columns)
+    ranked = df[columns].rank().to_numpy(dtype=np.float64, na_value=np.nan)
+    pearson_values, mask = _prepare(raw)
+    spearman_values, _ = _prepare(ranked)
+
+    heap: list[tuple[float, int, int, float, float, int]] = []
+    starts = range(0, len(columns), block_size)
+    for i in starts:
+        a = slice(i, i + block_size)
+        for j in starts:
+            if j < i:
+                continue
+            b = slice(j, j + block_size)
+            pearson, counts = _pairwise(pearson_values[:, a], mask[:, a], pearson_values[:, b], mask[:, b])
+            spearman, _ = _pairwise(spearman_values[:, a], mask[:, a], spearman_values[:, b], mask[:, b])
+
+            strength = np.fmax(np.abs(pearson), np.abs(spearman))
+            keep = (strength >= min_abs) & (counts >= min_periods)
+            if i == j:
+                keep &= np.triu(np.ones(keep.shape, dtype=bool), k=1)
+            rows, cols = np.nonzero(keep)
+            if rows.size > top_k:
+                best = np.argpartition(-strength[rows, cols], top_k)[:top_k]
+                rows, cols = rows[best], cols[best]
+            for r_idx, c_idx in zip(rows.tolist(), cols.tolist()):
+                item = (
+                    float(strength[r_idx, c_idx]),
+                    i + r_idx,
+                    j + c_idx,
+                    float(pearson[r_idx, c_idx]),
+                    float(spearman[r_idx, c_idx]),
+                    int(counts[r_idx, c_idx]),
+                )
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heappushpop(heap, item)
+
+    result["top_pairs"] = [
+        {
+            "x": columns[x],
+            "y": columns[y],
+            "pearson": round(p, 4) if np.isfinite(p) else None,
+            "spearman": round(s, 4) if np.isfinite(s) else None,
+            "n": n,
+        }
+        for _, x, y, p, s, n in sorted(heap, reverse=True)
+    ]
+    return result
+
+
+def heatmap_columns(top_pairs: list[dict[str, Any]]) -> list[str]:
+    return list(dict.fromkeys([col for pair in top_pairs for col in (pair["x"], pair["y"])]))
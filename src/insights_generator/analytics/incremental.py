@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.agents.analytics_agent import build_analytics_summary
+from insights_generator.analytics.moments import ColumnState
+
+
+@dataclass
+class IncrementalAnalytics:
+    """Per-column running state for a dataset that grows by appends.
+
+    Each append only touches the new rows; the analytics dict has the same
+    shape as the one produced by ``run_analytics_agent``.
+    """
+
+    columns: list[str]
+    numeric_columns: list[str]
+    categorical_columns: list[str]
+    row_count: int = 0
+    column_states: dict[str, ColumnState] = field(default_factory=dict)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> IncrementalAnalytics:
+        state = cls(
+            columns=[str(col) for col in df.columns],
+            numeric_columns=df.select_dtypes(include=[np.number]).columns.tolist(),
+            categorical_columns=df.select_dtypes(exclude=[np.number]).columns.tolist(),
+        )
+        state.column_states = {col: ColumnState() for col in state.numeric_columns}
+        state.update(df)
+        return state
+
+    def update(self, df: pd.DataFrame) -> None:
+        incoming = {str(col) for col in df.columns}
+        if incoming != set(self.columns):
+            missing = sorted(set(self.columns) - incoming)
+            extra = sorted(incoming - set(self.columns))
+            raise ValueError(
+                f"Appended columns do not match dataset (missing: {missing}, unexpected: {extra})."
+            )
+
+        for col in self.numeric_columns:
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            self.column_states[col].update(values)
+        self.row_count += int(len(df))
+
+    def to_analytics(self) -> dict[str, Any]:
+        numeric_analytics = {
+            col: self.column_states[col].to_analytics()
+            for col in self.numeric_columns
+        }
+        return build_analytics_summary(
+            row_count=self.row_count,
+            column_count=len(self.columns),
+            numeric_cols=list(self.numeric_columns),
+            categorical_cols=list(self.categorical_columns),
+            numeric_analytics=numeric_analytics,
+        )
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from insights_generator.analytics.thresholds import (
+    HIGH_VARIANCE_CV_THRESHOLD,
+    IQR_MULTIPLIER,
+    LONG_TAIL_SKEW_THRESHOLD,
+)
+
+
+SKETCH_COMPRESSION = 400.0
+MODE_TRACKING_LIMIT = 10_000
+ANOMALY_EXAMPLE_LIMIT = 10
+
+
+@dataclass
+class RunningMoments:
+    """Count, mean and 2nd/3rd central moments, mergeable with Pebay's update."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    m3: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> RunningMoments:
+        if values.size == 0:
+            return cls()
+        mean = float(values.mean())
+        deltas = values - mean
+        squared = deltas * deltas
+        return cls(
+            count=int(values.size),
+            mean=mean,
+            m2=float(squared.sum()),
+            m3=float((squared * deltas).sum()),
+            min=float(values.min()),
+            max=float(values.max()),
+        )
+
+    def merge(self, other: RunningMoments) -> RunningMoments:
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        na, nb = self.count, other.count
+        n = na + nb
+        delta = other.mean - self.mean
+        m2 = self.m2 + other.m2 + delta * delta * na * nb / n
+        m3 = (
+            self.m3
+            + other.m3
+            + delta ** 3 * na * nb * (na - nb) / (n * n)
+            + 3.0 * delta * (na * other.m2 - nb * self.m2) / n
+        )
+        return RunningMoments(
+            count=n,
+            mean=self.mean + delta * nb / n,
+            m2=m2,
+            m3=m3,
+            min=min(self.min, other.min),
+            max=max(self.max, other.max),
+        )
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else float("nan")
+
+    @property
+    def skew(self) -> float:
+        """Adjusted Fisher-Pearson skewness, matching ``pandas.Series.skew``."""
+        n = self.count
+        if n < 3:
+            return float("nan")
+        if self.m2 <= 0:
+            return 0.0
+        g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return float(g1 * np.sqrt(n * (n - 1)) / (n - 2))
+
+
+@dataclass
+class QuantileSketch:
+    """Mergeable t-digest style sketch with vectorized compression.
+
+    Values are kept exactly until the number of centroids exceeds the
+    compression, so small datasets reproduce ``numpy.quantile`` results.
+    """
+
+    compression: float = SKETCH_COMPRESSION
+    means: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    weights: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+
+    @property
+    def total_weight(self) -> float:
+        return float(self.weights.sum())
+
+    @property
+    def is_exact(self) -> bool:
+        return bool(np.all(self.weights == 1.0))
+
+    def update(self, values: np.ndarray) -> None:
+        if values.size == 0:
+            return
+        self._absorb(values.astype(np.float64, copy=False), np.ones(values.size, dtype=np.float64))
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.means.size:
+            self._absorb(other.means, other.weights)
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray) -> None:
+        all_means = np.concatenate([self.means, means])
+        all_weights = np.concatenate([self.weights, weights])
+        order = np.argsort(all_means, kind="mergesort")
+        all_means = all_means[order]
+        all_weights = all_weights[order]
+        if all_means.size > self.compression:
+            all_means, all_weights = self._compress(all_means, all_weights)
+        self.means = all_means
+        self.weights = all_weights
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        total = weights.sum()
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2.0) / total
+        # k1 scale function: narrow buckets in the tails, wide in the middle.
+        k = self.compression / (2.0 * np.pi) * np.arcsin(2.0 * q_mid - 1.0)
+        buckets = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+        return merged_means, merged_weights
+
+    def _rank_grid(self, lo: float, hi: float) -> tuple[np.ndarray, np.ndarray]:
+        centers = np.cumsum(self.weights) - self.weights / 2.0
+        ranks = np.concatenate([[0.0], centers, [self.total_weight]])
+        values = np.concatenate([[lo], self.means, [hi]])
+        return ranks, values
+
+    def quantile(self, q: float | np.ndarray, lo: float, hi: float) -> np.ndarray:
+        q = np.asarray(q, dtype=np.float64)
+        if self.means.size == 0:
+            return np.full(q.shape, np.nan)
+        if self.is_exact:
+            return np.quantile(self.means, q)
+        ranks, values = self._rank_grid(lo, hi)
+        return np.interp(q * self.total_weight, ranks, values)
+
+    def cdf(self, x: float | np.ndarray, lo: float, hi: float) -> np.ndarray:
+        """Fraction of the weight strictly below ``x``."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.means.size == 0:
+            return np.zeros(x.shape)
+        if self.is_exact:
+            return np.searchsorted(self.means, x, side="left") / self.means.size
+        ranks, values = self._rank_grid(lo, hi)
+        return np.interp(x, values, ranks) / self.total_weight
+
+
+@dataclass
+class ColumnState:
+    """Running per-column state that reproduces ``_numeric_column_analytics`` output."""
+
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+    mode_counts: Counter | None = field(default_factory=Counter)
+    anomaly_examples: list[float] = field(default_factory=list)
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.moments = self.moments.merge(RunningMoments.from_values(values))
+        self.sketch.update(values)
+        if self.mode_counts is not None:
+            uniques, counts = np.unique(values, return_counts=True)
+            self.mode_counts.update(dict(zip(uniques.tolist(), counts.tolist())))
+            if len(self.mode_counts) > MODE_TRACKING_LIMIT:
+                self.mode_counts = None
+
+        lower, upper = self.iqr_bounds()
+        kept = [v for v in self.anomaly_examples if v < lower or v > upper]
+        fresh = values[(values < lower) | (values > upper)][:ANOMALY_EXAMPLE_LIMIT]
+        self.anomaly_examples = (kept + fresh.tolist())[:ANOMALY_EXAMPLE_LIMIT]
+
+    def quartiles(self) -> tuple[float, float, float]:
+        q1, median, q3 = self.sketch.quantile([0.25, 0.5, 0.75], self.moments.min, self.moments.max)
+        return float(q1), float(median), float(q3)
+
+    def iqr_bounds(self) -> tuple[float, float]:
+        q1, _, q3 = self.quartiles()
+        iqr = q3 - q1
+        return q1 - IQR_MULTIPLIER * iqr, q3 + IQR_MULTIPLIER * iqr
+
+    def _mode(self) -> list[Any]:
+        if not self.mode_counts:
+            return []
+        top = max(self.mode_counts.values())
+        return sorted(value for value, count in self.mode_counts.items() if count == top)[:3]
+
+    def _anomaly_count(self, lower: float, upper: float) -> int:
+        below, above = self.sketch.cdf([lower, np.nextafter(upper, np.inf)], self.moments.min, self.moments.max)
+        return int(round((below + (1.0 - above)) * self.moments.count))
+
+    def to_analytics(self) -> dict[str, Any]:
+        moments = self.moments
+        if moments.count == 0:
+            return {}
+
+        q1, median, q3 = self.quartiles()
+        iqr = q3 - q1
+        lower = q1 - IQR_MULTIPLIER * iqr
+        upper = q3 + IQR_MULTIPLIER * iqr
+        anomaly_count = self._anomaly_count(lower, upper)
+
+        mean_val = moments.mean
+        variance = moments.variance
+        std_val = float(np.sqrt(variance))
+        cv = std_val / mean_val if mean_val else float("inf")
+        skew = moments.skew
+
+        return {
+            "count": moments.count,
+            "mean": mean_val,
+            "average": mean_val,
+            "median": median,
+            "mode": self._mode(),
+            "std": std_val,
+            "variance": variance,
+            "cv": cv,
+            "high_variance": bool(cv > HIGH_VARIANCE_CV_THRESHOLD),
+            "skew": skew,
+            "long_tail_detected": bool(abs(skew) > LONG_TAIL_SKEW_THRESHOLD),
+            "iqr": iqr,
+            "iqr_bounds": {"lower": lower, "upper": upper},
+            "anomaly_count": anomaly_count,
+            "anomaly_rate": float(anomaly_count / max(moments.count, 1)),
+            "anomaly_examples": list(self.anomaly_examples),
+            "min": moments.min,
+            "max": moments.max,
+            "quantiles_exact": self.sketch.is_exact,
+        }
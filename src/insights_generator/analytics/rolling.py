@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.analytics.anomalies import _numeric_matrix
+from insights_generator.analytics.thresholds import IQR_MULTIPLIER
+
+
+ROLLING_WINDOW_DIVISOR = 50
+ROLLING_MIN_WINDOW = 20
+ROLLING_MAX_WINDOW = 2000
+QUARTILE_BLOCKS = 5
+QUARTILE_CHUNK_VALUES = 4_000_000
+CHANGE_POINT_THRESHOLD = 5.0
+MIN_SHIFT_STD = 0.5
+MAX_CHANGE_POINTS = 5
+MAX_CHANGE_POINT_SCORE = 1e6
+
+
+def rolling_window_for(rows: int) -> int:
+    """Default window: about 2% of the rows, clamped to a sensible range."""
+    return int(min(max(rows // ROLLING_WINDOW_DIVISOR, ROLLING_MIN_WINDOW), ROLLING_MAX_WINDOW))
+
+
+def _round(value: float) -> float | None:
+    return None if not np.isfinite(value) else round(float(value), 6)
+
+
+@dataclass
+class _PrefixSums:
+    """Cumulative sums of every column, so any window's moments cost O(1)."""
+
+    offset: np.ndarray
+    total: np.ndarray
+    squares: np.ndarray
+    count: np.ndarray
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> _PrefixSums:
+        valid = ~np.isnan(values)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            offset = np.nan_to_num(np.nanmean(values, axis=0))
+        # Centering first keeps the running sums small, which avoids
+        # cancellation in ``E[x^2] - E[x]^2`` on large-valued columns.
+        centered = np.where(valid, values - offset, 0.0)
+        zeros = np.zeros((1, values.shape[1]))
+        return cls(
+            offset=offset,
+            total=np.vstack([zeros, np.cumsum(centered, axis=0)]),
+            squares=np.vstack([zeros, np.cumsum(centered * centered, axis=0)]),
+            count=np.vstack([zeros, np.cumsum(valid, axis=0)]),
+        )
+
+    def window(self, start: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mean, variance and valid count of rows ``[start, end)`` for each bound pair."""
+        count = self.count[end] - self.count[start]
+        total = self.total[end] - self.total[start]
+        squares = self.squares[end] - self.squares[start]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            variance = np.maximum(squares / count - mean * mean, 0.0)
+        return mean + self.offset, variance, count
+
+
+def _centered_bounds(rows: int, window: int) -> tuple[np.ndarray, np.ndarray]:
+    # Windows are shifted inward at the edges, so every row sees a full window.
+    start = np.clip(np.arange(rows) - window // 2, 0, max(rows - window, 0))
+    return start, np.minimum(start + window, rows)
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Centered rolling mean and standard deviation of every column in O(rows)."""
+    start, end = _centered_bounds(values.shape[0], window)
+    mean, variance, _ = _PrefixSums.of(values).window(start, end)
+    return mean, np.sqrt(variance)
+
+
+def _sorted_quantile(blocks: np.ndarray, valid: np.ndarray, q: float) -> np.ndarray:
+    position = q * np.maximum(valid - 1, 0)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    low_value = np.take_along_axis(blocks, low[:, None, :], axis=1)[:, 0, :]
+    high_value = np.take_along_axis(blocks, high[:, None, :], axis=1)[:, 0, :]
+    quantile = low_value + (high_value - low_value) * (position - low)
+    return np.where(valid > 0, quantile, np.nan)
+
+
+def rolling_quartiles(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rolling first quartile, median and third quartile of every column.
+
+    Rows are cut into blocks of ``window / QUARTILE_BLOCKS`` rows. Each block
+    gets the exact quartiles of the ``QUARTILE_BLOCKS`` blocks centered on it
+    (one window of rows), so all rows of a block share their fences. Windows
+    are sorted a chunk of blocks at a time with all columns together, which
+    keeps the cost linear in rows for a given window and memory bounded.
+    """
+    rows, cols = values.shape
+    block = max(-(-window // QUARTILE_BLOCKS), 1)
+    blocks_count = -(-rows // block)
+    padded = np.full((blocks_count * block, cols), np.nan)
+    padded[:rows] = values
+    blocks = padded.reshape(blocks_count, block, cols)
+
+    span = min(QUARTILE_BLOCKS, blocks_count)
+    start, _ = _centered_bounds(blocks_count, span)
+    quartiles = np.empty((3, blocks_count, cols))
+    chunk = max(QUARTILE_CHUNK_VALUES // (span * block * cols), 1)
+    for first in range(0, blocks_count, chunk):
+        members = start[first:first + chunk, None] + np.arange(span)
+        windowed = blocks[members].reshape(members.shape[0], span * block, cols)
+        # NaN sorts last, so the first ``valid`` entries of each window are its data.
+        windowed.sort(axis=1)
+        valid = (~np.isnan(windowed)).sum(axis=1)
+        for i, q in enumerate((0.25, 0.5, 0.75)):
+            quartiles[i, first:first + chunk] = _sorted_quantile(windowed, valid, q)
+    q1, median, q3 = (np.repeat(quartile, block, axis=0)[:rows] for quartile in quartiles)
+    return q1, median, q3
+
+
+def rolling_bands(values: np.ndarray, window: int) -> dict[str, np.ndarray]:
+    """Rolling mean, median and local IQR fences, e.g. for drawing one column's chart."""
+    matrix = values.reshape(values.shape[0], -1).astype(np.float64, copy=False)
+    mean, _ = rolling_mean_std(matrix, window)
+    q1, median, q3 = rolling_quartiles(matrix, window)
+    iqr = q3 - q1
+    bands = {
+        "mean": mean,
+        "median": median,
+        "lower": q1 - IQR_MULTIPLIER * iqr,
+        "upper": q3 + IQR_MULTIPLIER * iqr,
+    }
+    if values.ndim == 1:
+        return {name: band[:, 0] for name, band in bands.items()}
+    return bands
+
+
+def _change_point_scores(prefix: _PrefixSums, rows: int, window: int) -> tuple[np.ndarray, np.ndarray]:
+    boundaries = np.arange(window, rows - window + 1)
+    if boundaries.size == 0:
+        return boundaries, np.zeros((0, prefix.offset.shape[0]))
+    mean_before, var_before, count_before = prefix.window(boundaries - window, boundaries)
+    mean_after, var_after, count_after = prefix.window(boundaries, boundaries + window)
+    shift = np.abs(mean_after - mean_before)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = shift / np.sqrt(var_before / count_before + var_after / count_after)
+        # Long windows make tiny shifts significant; only material ones count.
+        material = shift >= MIN_SHIFT_STD * np.sqrt((var_before + var_after) / 2)
+    enough = (count_before >= window // 2) & (count_after >= window // 2) & material
+    scores = np.nan_to_num(scores, nan=0.0, posinf=MAX_CHANGE_POINT_SCORE)
+    return boundaries, np.where(enough, scores, 0.0)
+
+
+def change_point_scores(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Welch t statistic between the ``window`` rows before and after each boundary.
+
+    Returns the candidate boundaries (a boundary ``b`` splits rows ``b - 1``
+    and ``b``) and a ``(boundaries, columns)`` score matrix. Shifts smaller
+    than ``MIN_SHIFT_STD`` pooled standard deviations score 0. Both windows
+    come from the same prefix sums, so scoring every boundary is O(rows).
+    """
+    return _change_point_scores(_PrefixSums.of(values), values.shape[0], window)
+
+
+def pick_change_points(
+    boundaries: np.ndarray,
+    scores: np.ndarray,
+    window: int,
+    threshold: float = CHANGE_POINT_THRESHOLD,
+    limit: int = MAX_CHANGE_POINTS,
+) -> list[list[tuple[int, float]]]:
+    """Strongest, well-separated boundaries per column as ``(row, score)`` pairs.
+
+    Boundaries are grouped into segments of ``window``; a segment's best score
+    counts as a change point when it clears ``threshold`` and beats both
+    neighbouring segments, so one shift is never reported twice.
+    """
+    count, cols = scores.shape
+    if count == 0:
+        return [[] for _ in range(cols)]
+    segments = -(-count // window)
+    padded = np.full((segments * window, cols), -1.0)
+    padded[:count] = scores
+    grouped = padded.reshape(segments, window, cols)
+    best_at = grouped.argmax(axis=1)
+    best = np.take_along_axis(grouped, best_at[:, None, :], axis=1)[:, 0, :]
+    edge = np.full((1, cols), -1.0)
+    left = np.vstack([edge, best[:-1]])
+    right = np.vstack([best[1:], edge])
+    ranked = np.where((best >= threshold) & (best >= left) & (best > right), best, -np.inf)
+    order = np.argsort(-ranked, axis=0, kind="stable")[:limit]
+
+    picked: list[list[tuple[int, float]]] = []
+    for j in range(cols):
+        segment_ids = [int(k) for k in order[:, j] if np.isfinite(ranked[k, j])]
+        points = [(int(boundaries[k * window + best_at[k, j]]), float(best[k, j])) for k in segment_ids]
+        picked.append(sorted(points))
+    return picked
+
+
+@dataclass
+class RollingAnalytics:
+    """Rolling-window results for a set of columns.
+
+    ``local_outliers`` marks rows outside the rolling IQR fences of their
+    own neighbourhood; ``summary`` is the JSON-ready digest for the response.
+    """
+
+    window: int
+    columns: list[str]
+    local_outliers: np.ndarray
+    summary: dict[str, Any]
+
+
+def rolling_analytics(df: pd.DataFrame, columns: list[str], window: int | None = None) -> RollingAnalytics:
+    """Rolling median/mean, local IQR fences and change points over all columns at once."""
+    rows = int(len(df))
+    window = window or rolling_window_for(rows)
+    local_outliers = np.zeros((rows, len(columns)), dtype=bool)
+    summary: dict[str, Any] = {"window": window, "by_column": {}, "change_point_columns": []}
+    if not columns or rows < 2 * window:
+        return RollingAnalytics(window=window, columns=list(columns), local_outliers=local_outliers, summary=summary)
+
+    values = _numeric_matrix(df, columns)
+    valid = ~np.isnan(values)
+    q1, median, q3 = rolling_quartiles(values, window)
+    local_iqr = q3 - q1
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # All-NaN columns get NaN fences and flag nothing.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lower = q1 - IQR_MULTIPLIER * local_iqr
+        upper = q3 + IQR_MULTIPLIER * local_iqr
+        local_outliers = valid & ((values < lower) | (values > upper))
+        global_q1, global_q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+        global_iqr = global_q3 - global_q1
+        global_outliers = (values < global_q1 - IQR_MULTIPLIER * global_iqr) | (
+            values > global_q3 + IQR_MULTIPLIER * global_iqr
+        )
+
+    prefix = _PrefixSums.of(values)
+    latest_mean, _, _ = prefix.window(np.array([rows - window]), np.array([rows]))
+    boundaries, scores = _change_point_scores(prefix, rows, window)
+    picked = pick_change_points(boundaries, scores, window)
+
+    valid_counts = valid.sum(axis=0)
+    local_counts = local_outliers.sum(axis=0)
+    global_counts = global_outliers.sum(axis=0)
+    drift_counts = (global_outliers & ~local_outliers).sum(axis=0)
+    for j, col in enumerate(columns):
+        if valid_counts[j] == 0:
+            continue
+        change_points = []
+        if picked[j]:
+            rows_at = np.array([row for row, _ in picked[j]])
+            before, _, _ = prefix.window(rows_at - window, rows_at)
+            after, _, _ = prefix.window(rows_at, rows_at + window)
+            for k, (row, score) in enumerate(picked[j]):
+                mean_before, mean_after = float(before[k, j]), float(after[k, j])
+                change_points.append(
+                    {
+                        "row": row,
+                        "score": round(score, 3),
+                        "mean_before": _round(mean_before),
+                        "mean_after": _round(mean_after),
+                        "shift": _round(mean_after - mean_before),
+                        "shift_pct": _round((mean_after - mean_before) / abs(mean_before) * 100)
+                        if mean_before
+                        else None,
+                    }
+                )
+            summary["change_point_columns"].append(col)
+        summary["by_column"][col] = {
+            "latest_mean": _round(latest_mean[0, j]),
+            "latest_median": _round(median[-1, j]),
+            "latest_bounds": {"lower": _round(lower[-1, j]), "upper": _round(upper[-1, j])},
+            "local_anomaly_count": int(local_counts[j]),
+            "local_anomaly_rate": float(local_counts[j] / valid_counts[j]),
+            "global_anomaly_count": int(global_counts[j]),
+            # Flagged by the global fences but normal for their neighbourhood:
+            # level shifts and seasonality rather than point anomalies.
+            "drift_flagged_count": int(drift_counts[j]),
+            "change_points": change_points,
+        }
+    return RollingAnalytics(window=window, columns=list(columns), local_outliers=local_outliers, summary=summary)
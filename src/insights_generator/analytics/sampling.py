@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.analytics.anomalies import AnomalyIndex
+
+
+CONFIDENCE_LEVEL = 0.95
+Z_95 = 1.959963984540054
+STRATIFY_MAX_LEVELS = 50
+SAMPLE_SEED = 17
+
+
+def pick_strata_column(df: pd.DataFrame) -> str | None:
+    """First low-cardinality non-numeric column, used for proportional strata."""
+    for col in df.select_dtypes(exclude=[np.number]).columns:
+        levels = df[col].nunique(dropna=False)
+        if 1 < levels <= STRATIFY_MAX_LEVELS:
+            return str(col)
+    return None
+
+
+def sample_frame(df: pd.DataFrame, size: int, seed: int = SAMPLE_SEED) -> tuple[pd.DataFrame, dict[str, Any]]:
+    """Uniform (or proportionally stratified) sample without replacement.
+
+    Row order is preserved so trend charts still read left to right.
+    """
+    population = int(len(df))
+    strata = pick_strata_column(df)
+    if population <= size:
+        sample = df
+    elif strata is not None:
+        fraction = size / population
+        sample = df.groupby(strata, dropna=False, group_keys=False, observed=True).sample(
+            frac=fraction, random_state=seed
+        )
+    else:
+        sample = df.sample(n=size, random_state=seed)
+    sample = sample.sort_index()
+
+    return sample, {
+        "method": "stratified" if strata is not None and population > size else "uniform",
+        "stratified_by": strata if population > size else None,
+        "population_rows": population,
+        "sample_rows": int(len(sample)),
+        "confidence_level": CONFIDENCE_LEVEL,
+    }
+
+
+def _interval(estimate: float, low: float, high: float) -> dict[str, float]:
+    return {"estimate": float(estimate), "low": float(low), "high": float(high)}
+
+
+def _mean_interval(values: np.ndarray, population: int) -> dict[str, float]:
+    n = values.size
+    mean = float(values.mean())
+    if n < 2:
+        return _interval(mean, mean, mean)
+    fpc = math.sqrt(max(population - n, 0) / max(population - 1, 1))
+    half = Z_95 * float(values.std(ddof=1)) / math.sqrt(n) * fpc
+    return _interval(mean, mean - half, mean + half)
+
+
+def _median_interval(values: np.ndarray) -> dict[str, float]:
+    """Distribution-free interval from binomial order statistics."""
+    ordered = np.sort(values)
+    n = ordered.size
+    half_width = Z_95 * math.sqrt(n) / 2.0
+    lower = max(int(math.floor(n / 2.0 - half_width)), 0)
+    upper = min(int(math.ceil(n / 2.0 + half_width)), n - 1)
+    return _interval(float(np.median(ordered)), ordered[lower], ordered[upper])
+
+
+def _wilson_interval(hits: int, n: int) -> dict[str, float]:
+    if n == 0:
+        return _interval(0.0, 0.0, 0.0)
+    p = hits / n
+    z2 = Z_95 * Z_95
+    denom = 1.0 + z2 / n
+    center = (p + z2 / (2 * n)) / denom
+    half = Z_95 * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denom
+    return _interval(p, max(center - half, 0.0), min(center + half, 1.0))
+
+
+def confidence_intervals(
+    df: pd.DataFrame,
+    columns: list[str],
+    population_rows: int,
+    anomaly_index: AnomalyIndex | None = None,
+) -> dict[str, dict[str, dict[str, float]]]:
+    """95% intervals for mean, median and (when anomalies were detected) the IQR
+    anomaly rate of each sampled column."""
+    intervals: dict[str, dict[str, dict[str, float]]] = {}
+    for col in columns:
+        values = pd.to_numeric(df[col], errors="coerce").dropna().to_numpy(dtype=np.float64)
+        if values.size == 0:
+            continue
+        intervals[col] = {
+            "mean": _mean_interval(values, population_rows),
+            "median": _median_interval(values),
+        }
+        if anomaly_index is not None:
+            hits = anomaly_index.count(col, "iqr") if col in anomaly_index.positions else 0
+            intervals[col]["anomaly_rate"] = _wilson_interval(hits, int(values.size))
+    return intervals
@@ -0,0 +1,3 @@
+IQR_MULTIPLIER = 1.5
+LONG_TAIL_SKEW_THRESHOLD = 1.0
+HIGH_VARIANCE_CV_THRESHOLD = 1.0
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from insights_generator.analytics.anomalies import AnomalyIndex, flagged_rows
+
+
+MAX_ANOMALY_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class AnomalyRecord:
+    """An anomaly index plus the values of the rows it flags.
+
+    Only flagged rows are kept (indexed by row position), so a stored record
+    does not hold the uploaded frame alive.
+    """
+
+    index: AnomalyIndex
+    rows: pd.DataFrame
+    version: int = 1
+    nbytes: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        index_bytes = sum(a.nbytes for a in self.index.positions.values()) + sum(
+            a.nbytes for a in self.index.flags.values()
+        )
+        self.nbytes = int(index_bytes + self.rows.memory_usage(index=True, deep=True).sum())
+
+    @classmethod
+    def from_frame(cls, index: AnomalyIndex, dataframe: pd.DataFrame, version: int = 1) -> AnomalyRecord:
+        return cls(index=index, rows=flagged_rows(index, dataframe), version=version)
+
+
+ANOMALY_STORE: OrderedDict[str, AnomalyRecord] = OrderedDict()
+_LOCK = threading.Lock()
+_TOTAL_BYTES = 0
+# Keys per stored record, so a record shared by several keys is counted once.
+_REFS: dict[int, int] = {}
+
+
+def _unref(record: AnomalyRecord) -> None:
+    global _TOTAL_BYTES
+    _REFS[id(record)] -= 1
+    if not _REFS[id(record)]:
+        del _REFS[id(record)]
+        _TOTAL_BYTES -= record.nbytes
+
+
+def put_anomalies(key: str, record: AnomalyRecord) -> None:
+    """Store ``record``, evicting least recently used ones past ``MAX_ANOMALY_BYTES``.
+
+    The newest record is always kept, even when it alone exceeds the cap. The
+    same record may be stored under several keys; its bytes count once.
+    """
+    global _TOTAL_BYTES
+    with _LOCK:
+        previous = ANOMALY_STORE.pop(key, None)
+        if previous is not None:
+            _unref(previous)
+        ANOMALY_STORE[key] = record
+        if id(record) not in _REFS:
+            _TOTAL_BYTES += record.nbytes
+        _REFS[id(record)] = _REFS.get(id(record), 0) + 1
+        while len(ANOMALY_STORE) > 1 and _TOTAL_BYTES > MAX_ANOMALY_BYTES:
+            _, evicted = ANOMALY_STORE.popitem(last=False)
+            _unref(evicted)
+
+
+def get_anomalies(key: str) -> AnomalyRecord | None:
+    with _LOCK:
+        record = ANOMALY_STORE.get(key)
+        if record is not None:
+            ANOMALY_STORE.move_to_end(key)
+        return record
+
+
+def anomaly_store_bytes() -> int:
+    with _LOCK:
+        return _TOTAL_BYTES
@@ -1,17 +1,58 @@
 from __future__ import annotations
 
+import gzip
 import uuid
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, Callable
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, Response
+from langgraph.checkpoint.memory import InMemorySaver
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
+from insights_generator.admission import AdmissionRejected, MemoryReservation, UploadTooLarge, get_admission_controller
+from insights_generator.agents.insight_agent import build_comparison_insight
+from insights_generator.analytics.anomalies import detect_anomalies, page_anomalies
+from insights_generator.analytics.compare import compare_profiles
+from insights_generator.analytics.incremental import IncrementalAnalytics
+from insights_generator.analytics.sampling import CONFIDENCE_LEVEL, sample_frame
+from insights_generator.anomaly_store import AnomalyRecord, get_anomalies, put_anomalies
+from insights_generator.artifact_store import get_artifact_store
 from insights_generator.config import load_config
-from insights_generator.graph import build_graph
-from insights_generator.io_utils import load_dataframe_from_upload
-from insights_generator.model_router import get_chat_client
+from insights_generator.dataset_store import (
+    append_dataset as append_stored_dataset,
+    create_dataset,
+    delete_dataset,
+    get_dataset,
+    get_dataset_store,
+    put_dataset,
+)
+from insights_generator.frame_registry import get_frame_registry
+from insights_generator.graph import build_batch_runner, build_graph, invoke_with_stages
+from insights_generator.intent_cache import get_intent_cache
+from insights_generator.io_utils import (
+    describe_upload,
+    fingerprint_upload,
+    load_dataframe_from_upload,
+    load_sample_from_upload,
+)
+from insights_generator.job_queue import JobRecord, JobWorkerPool, get_job_queue
+from insights_generator.mcp_pool import get_mcp_pool, set_mcp_pool
+from insights_generator.model_router import (
+    DEFAULT_TENANT,
+    collect_client_stats,
+    current_llm_tenant,
+    get_chat_client,
+    llm_call_context,
+)
 from insights_generator.models import ClarifyRequest
+from insights_generator.profile_store import get_profile, put_profile
+from insights_generator.profiling import ProfilerBusy, RequestProfile
 from insights_generator.prompting import load_prompt_pack
+from insights_generator.repl_pool import get_repl_pool, set_repl_pool
+from insights_generator.responses import RESPONSE_FORMATS, FastJSONResponse, render_result, select_fields
+from insights_generator.result_store import ResultPayload, get_result, put_result
 from insights_generator.session_store import SessionPayload, delete_session, get_session, put_session
 
 load_dotenv()
@@ -19,27 +60,208 @@ config = load_config()
 chat_client = get_chat_client(config.model)
 prompt_pack = load_prompt_pack(config.prompts_path)
 
-app = FastAPI(title="Insights Generator", version="0.2.0")
-graph = build_graph(chat_client, prompt_pack)
+
+ANALYZE_MODES = ("full", "quick", "job")
+job_pool: JobWorkerPool | None = None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global job_pool
+    if config.jobs.worker_concurrency > 0:
+        job_pool = JobWorkerPool(
+            get_job_queue(),
+            _run_job,
+            concurrency=config.jobs.worker_concurrency,
+            poll_interval_seconds=config.jobs.poll_interval_seconds,
+        )
+        job_pool.start()
+    if config.repl.prewarm:
+        # Spawn REPL workers now so their pandas/plotly imports are paid
+        # before the first use_python_repl request, not during it.
+        get_repl_pool().start()
+    try:
+        yield
+    finally:
+        if job_pool is not None:
+            job_pool.stop()
+            job_pool = None
+        set_repl_pool(None)
+        set_mcp_pool(None)
+
+
+app = FastAPI(
+    title="Insights Generator",
+    version="0.2.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
+# Checkpoints are kept only for runs waiting on /clarify, which resume from them.
+checkpointer = InMemorySaver()
+graph = build_graph(chat_client, prompt_pack, checkpointer=checkpointer)
+run_batch = build_batch_runner(chat_client, prompt_pack, concurrency=config.batch.concurrency)
+comparison_insight = build_comparison_insight(chat_client, prompt_pack.get("comparison", {}))
+
+TENANT_HEADER = "X-Tenant-ID"
+PROFILE_HEADER = "X-Profile"
+
+
+@app.middleware("http")
+async def llm_scheduling_context(request: Request, call_next):
+    # /clarify answers a user waiting on a question, so its LLM calls jump the
+    # queue; everything else in a request is interactive. Jobs and background
+    # refinement switch to batch themselves.
+    priority = "clarify" if request.url.path == "/clarify" else "interactive"
+    with llm_call_context(priority, request.headers.get(TENANT_HEADER) or DEFAULT_TENANT):
+        return await call_next(request)
+
+
+def _load_upload(file: UploadFile):
+    try:
+        return load_dataframe_from_upload(file, spool_dir=config.upload_spool_dir or None)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Failed to parse file: {exc}") from exc
+
+
+def _admit_upload(file: UploadFile, allow_sample: bool = True, wait_indefinitely: bool = False) -> MemoryReservation:
+    try:
+        return get_admission_controller().admit(
+            describe_upload(file),
+            allow_sample=allow_sample,
+            wait_indefinitely=wait_indefinitely,
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_seconds)},
+        ) from exc
+
+
+def _load_admitted(file: UploadFile, reservation: MemoryReservation) -> tuple[Any, dict[str, Any] | None]:
+    """Load the upload in full, or as a streamed sample when admission downgraded it."""
+    if reservation.mode != "sampled":
+        return _load_upload(file), None
+    try:
+        dataframe, population = load_sample_from_upload(
+            file,
+            config.quick_sample_rows,
+            spool_dir=config.upload_spool_dir or None,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Failed to parse file: {exc}") from exc
+    return dataframe, {
+        "method": "streaming_reservoir",
+        "stratified_by": None,
+        "population_rows": population,
+        "sample_rows": int(len(dataframe)),
+        "confidence_level": CONFIDENCE_LEVEL,
+        "reason": "memory_budget",
+    }
 
 
 def _execute_graph(
     session_id: str,
-    dataframe,
+    dataset: str,
     user_prompt: str,
     clarification: str = "",
     use_python_repl: bool = False,
     use_mcp: bool = False,
+    sampling: dict[str, Any] | None = None,
+    on_stage: Callable[[str], None] | None = None,
+    profile: bool = False,
+    thread_id: str | None = None,
 ) -> dict[str, Any]:
     initial_state = {
         "session_id": session_id,
-        "dataframe": dataframe,
+        "dataset": dataset,
         "user_prompt": user_prompt,
         "clarification": clarification,
         "use_python_repl": use_python_repl,
         "use_mcp": use_mcp,
     }
-    return graph.invoke(initial_state)
+    if sampling:
+        initial_state["sampling"] = sampling
+    return _invoke_graph(session_id, initial_state, thread_id or session_id, on_stage, profile)
+
+
+def _resume_graph(session_id: str, clarification: str, profile: bool = False) -> dict[str, Any] | None:
+    """Continue a run that stopped for clarification from its checkpoint.
+
+    Returns ``None`` when no checkpoint is kept for the session (e.g. after a
+    restart), so the caller can start a fresh run instead.
+    """
+    if not graph.get_state({"configurable": {"thread_id": session_id}}).values:
+        return None
+    return _invoke_graph(session_id, {"clarification": clarification}, session_id, None, profile)
+
+
+def _invoke_graph(
+    session_id: str,
+    graph_input: dict[str, Any],
+    thread_id: str,
+    on_stage: Callable[[str], None] | None,
+    profile: bool,
+) -> dict[str, Any]:
+    graph_config = {"configurable": {"thread_id": thread_id}}
+    result: dict[str, Any] = {}
+    try:
+        if profile:
+            result = _execute_profiled(session_id, graph_input, graph_config, on_stage)
+        else:
+            result = _execute(graph_input, graph_config, on_stage)
+    finally:
+        if not result.get("needs_clarification"):
+            checkpointer.delete_thread(thread_id)
+    return result
+
+
+def _execute(
+    graph_input: dict[str, Any],
+    graph_config: dict[str, Any],
+    on_stage: Callable[[str], None] | None,
+) -> dict[str, Any]:
+    if on_stage is not None:
+        return invoke_with_stages(graph, graph_input, on_stage, graph_config)
+    return graph.invoke(graph_input, graph_config)
+
+
+def _execute_profiled(
+    session_id: str,
+    graph_input: dict[str, Any],
+    graph_config: dict[str, Any],
+    on_stage: Callable[[str], None] | None,
+) -> dict[str, Any]:
+    """Run the graph under the sampling profiler and tracemalloc; store the profile as artifacts.
+
+    If another request keeps the profiler busy, the run goes ahead unprofiled.
+    """
+
+    def stage(name: str) -> None:
+        profiler.on_stage(name)
+        if on_stage is not None:
+            on_stage(name)
+
+    try:
+        with RequestProfile(session_id, config.profiling) as profiler:
+            result = invoke_with_stages(graph, graph_input, stage, graph_config)
+    except ProfilerBusy as exc:
+        return {**_execute(graph_input, graph_config, on_stage), "profile": {"skipped": str(exc)}}
+    return {**result, "profile": profiler.store()}
+
+
+def _wants_profile(request: Request, flag: bool) -> bool:
+    """Profiling is opt-in per request, via ``X-Profile: 1`` or the ``profile`` flag."""
+    wanted = flag or request.headers.get(PROFILE_HEADER, "").strip().lower() in ("1", "true", "yes")
+    if wanted and not config.profiling.enabled:
+        raise HTTPException(status_code=403, detail="Request profiling is disabled on this server.")
+    return wanted
 
 
 @app.get("/health")
@@ -56,85 +278,570 @@ def model_info() -> dict[str, Any]:
     }
 
 
+@app.get("/metrics")
+def metrics() -> dict[str, Any]:
+    jobs: dict[str, Any] = dict(get_job_queue().stats())
+    jobs["active_in_process"] = job_pool.active_jobs if job_pool is not None else 0
+    return {
+        "llm": collect_client_stats(chat_client),
+        "jobs": jobs,
+        "admission": get_admission_controller().stats(),
+        "datasets": get_dataset_store().stats(),
+        "mcp": get_mcp_pool().stats(),
+        "intent_cache": intent_cache.stats() if (intent_cache := get_intent_cache()) is not None else None,
+    }
+
+
+def _result_payload(session_id: str, result: dict[str, Any]) -> dict[str, Any]:
+    if result.get("needs_clarification"):
+        payload = {
+            "session_id": session_id,
+            "needs_clarification": True,
+            "clarification_question": result.get("clarification_question"),
+            "intent": result.get("intent", {}),
+        }
+    else:
+        payload = {
+            "session_id": session_id,
+            "needs_clarification": False,
+            "intent": result.get("intent", {}),
+            "analytics": result.get("analytics", {}),
+            "visualizations": result.get("visualizations", []),
+            "insights": result.get("insights", ""),
+        }
+    if "profile" in result:
+        payload["profile"] = result["profile"]
+    return payload
+
+
+def _render(payload: dict[str, Any], fields: str, columns: str, response_format: str) -> Response:
+    try:
+        return render_result(payload, fields=fields, columns=columns, response_format=response_format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _refine_exact(
+    session_id: str,
+    dataset: str,
+    user_prompt: str,
+    clarification: str,
+    use_python_repl: bool,
+    use_mcp: bool,
+    reservation: MemoryReservation | None = None,
+    tenant: str = DEFAULT_TENANT,
+) -> None:
+    try:
+        with llm_call_context("batch", tenant):
+            result = _execute_graph(
+                session_id=session_id,
+                dataset=dataset,
+                user_prompt=user_prompt,
+                clarification=clarification,
+                use_python_repl=use_python_repl,
+                use_mcp=use_mcp,
+                thread_id=f"{session_id}:exact",
+            )
+    except Exception as exc:
+        put_result(session_id, ResultPayload(status="failed", error=str(exc)))
+        return
+    finally:
+        if reservation is not None:
+            reservation.release()
+        get_frame_registry().release(session_id)
+    payload = _result_payload(session_id, result)
+    payload["refinement"] = {"status": "complete", "result_url": f"/results/{session_id}"}
+    put_result(session_id, ResultPayload(status="complete", result=payload))
+
+
+def _run_analysis(
+    session_id: str,
+    dataset: str,
+    user_prompt: str,
+    background_tasks: BackgroundTasks,
+    clarification: str = "",
+    use_python_repl: bool = False,
+    use_mcp: bool = False,
+    mode: str = "full",
+    sampling: dict[str, Any] | None = None,
+    reservation: MemoryReservation | None = None,
+    profile: bool = False,
+    resume: bool = False,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Run the graph, on a sample first in quick mode, and schedule the exact run.
+
+    ``dataset`` is a frame registry handle owned by ``session_id``. The
+    session's frames are released once no run needs them, or written to the
+    spill directory while a clarification is pending. ``resume`` continues
+    from the checkpoint the clarification left behind.
+
+    ``sampling`` marks a frame that already is a sample (admission downgrade);
+    it is analysed as is with no exact follow-up. A ``reservation`` handed in
+    is passed on to the background refinement, which releases it.
+    """
+    registry = get_frame_registry()
+    dataframe = registry.resolve(dataset)
+    refine = sampling is None and mode == "quick" and len(dataframe) > config.quick_sample_rows
+
+    result = _resume_graph(session_id, clarification, profile) if resume else None
+    if result is None:
+        graph_dataset, graph_sampling = dataset, sampling
+        if refine:
+            sample, graph_sampling = sample_frame(dataframe, config.quick_sample_rows)
+            graph_dataset = registry.register(sample, owner=session_id)
+        result = _execute_graph(
+            session_id=session_id,
+            dataset=graph_dataset,
+            user_prompt=user_prompt,
+            clarification=clarification,
+            use_python_repl=use_python_repl,
+            use_mcp=use_mcp,
+            sampling=graph_sampling,
+            profile=profile,
+        )
+    payload = _result_payload(session_id, result)
+
+    if refine and not result.get("needs_clarification"):
+        payload["refinement"] = {"status": "refining", "result_url": f"/results/{session_id}"}
+        put_result(session_id, ResultPayload(status="refining", result=payload))
+        background_tasks.add_task(
+            _refine_exact,
+            session_id,
+            dataset,
+            user_prompt,
+            clarification,
+            use_python_repl,
+            use_mcp,
+            reservation,
+            current_llm_tenant(),
+        )
+        return result, payload
+
+    if reservation is not None:
+        reservation.release()
+    if result.get("needs_clarification"):
+        registry.persist_owner(session_id)
+    else:
+        registry.release(session_id)
+    return result, payload
+
+
+def _run_job(job: JobRecord, on_stage: Callable[[str], None]) -> dict[str, Any]:
+    """Worker-side body of a queued /analyze: reload the spooled upload and run the graph."""
+    params = job.params
+    on_stage("admission")
+    with open(job.input_path, "rb") as handle:
+        upload = StarletteUploadFile(handle, filename=job.input_name)
+        reservation = _admit_upload(upload, wait_indefinitely=True)
+        with reservation:
+            on_stage("load")
+            dataframe, sampling = _load_admitted(upload, reservation)
+
+            session_id = job.id
+            registry = get_frame_registry()
+            dataset = registry.register(dataframe, owner=session_id)
+            try:
+                with llm_call_context("batch", params.get("tenant") or DEFAULT_TENANT):
+                    result = _execute_graph(
+                        session_id=session_id,
+                        dataset=dataset,
+                        user_prompt=params.get("user_prompt", ""),
+                        use_python_repl=bool(params.get("use_python_repl")),
+                        use_mcp=bool(params.get("use_mcp")),
+                        sampling=sampling,
+                        on_stage=on_stage,
+                        profile=bool(params.get("profile")),
+                    )
+            except BaseException:
+                registry.release(session_id)
+                raise
+    if result.get("needs_clarification"):
+        registry.persist_owner(session_id)
+        put_session(
+            session_id,
+            SessionPayload(
+                dataset=dataset,
+                initial_prompt=params.get("user_prompt", ""),
+                use_python_repl=bool(params.get("use_python_repl")),
+                use_mcp=bool(params.get("use_mcp")),
+                sampling=sampling,
+            ),
+        )
+    else:
+        registry.release(session_id)
+    payload = _result_payload(session_id, result)
+    if sampling:
+        payload["admission"] = reservation.describe()
+    return select_fields(payload, params.get("fields", ""), params.get("columns", ""))
+
+
+def _submit_job(
+    file: UploadFile,
+    user_prompt: str,
+    use_python_repl: bool,
+    use_mcp: bool,
+    fields: str,
+    columns: str,
+    profile: bool = False,
+) -> Response:
+    job_id = get_job_queue().submit(
+        file.file,
+        file.filename or "",
+        {
+            "user_prompt": user_prompt,
+            "use_python_repl": use_python_repl,
+            "use_mcp": use_mcp,
+            "fields": fields,
+            "columns": columns,
+            "tenant": current_llm_tenant(),
+            "profile": profile,
+        },
+    )
+    return FastJSONResponse(
+        {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"},
+        status_code=202,
+    )
+
+
 @app.post("/analyze")
 def analyze(
+    request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_prompt: str = Form(default=""),
     use_python_repl: bool = Form(default=False),
     use_mcp: bool = Form(default=False),
-) -> dict[str, Any]:
-    try:
-        dataframe = load_dataframe_from_upload(file)
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Failed to parse file: {exc}") from exc
+    fields: str = Form(default=""),
+    columns: str = Form(default=""),
+    response_format: str = Form(default="json"),
+    mode: str = Form(default="full"),
+    profile: bool = Form(default=False),
+) -> Response:
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported response format '{response_format}'.")
+    if mode not in ANALYZE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode '{mode}'. Use one of {list(ANALYZE_MODES)}.")
+    profile = _wants_profile(request, profile)
+    if mode == "job":
+        return _submit_job(file, user_prompt, use_python_repl, use_mcp, fields, columns, profile)
 
+    reservation = _admit_upload(file)
     session_id = str(uuid.uuid4())
-    result = _execute_graph(
-        session_id=session_id,
-        dataframe=dataframe,
-        user_prompt=user_prompt,
-        use_python_repl=use_python_repl,
-        use_mcp=use_mcp,
-    )
+    try:
+        dataframe, sampling = _load_admitted(file, reservation)
+        dataset = get_frame_registry().register(dataframe, owner=session_id)
+        result, payload = _run_analysis(
+            session_id=session_id,
+            dataset=dataset,
+            user_prompt=user_prompt,
+            background_tasks=background_tasks,
+            use_python_repl=use_python_repl,
+            use_mcp=use_mcp,
+            mode=mode,
+            sampling=sampling,
+            reservation=reservation,
+            profile=profile,
+        )
+    except BaseException:
+        reservation.release()
+        get_frame_registry().release(session_id)
+        raise
+    if sampling:
+        payload["admission"] = reservation.describe()
 
     if result.get("needs_clarification"):
         put_session(
             session_id,
             SessionPayload(
-                dataframe=dataframe,
+                dataset=dataset,
                 initial_prompt=user_prompt,
                 use_python_repl=use_python_repl,
                 use_mcp=use_mcp,
+                mode=mode,
+                sampling=sampling,
             ),
         )
-        return {
-            "session_id": session_id,
-            "needs_clarification": True,
-            "clarification_question": result.get("clarification_question"),
-            "intent": result.get("intent", {}),
-        }
 
-    return {
-        "session_id": session_id,
-        "needs_clarification": False,
-        "intent": result.get("intent", {}),
-        "analytics": result.get("analytics", {}),
-        "visualizations": result.get("visualizations", []),
-        "insights": result.get("insights", ""),
-    }
+    return _render(payload, fields, columns, response_format)
+
+
+@app.post("/analyze/batch")
+def analyze_batch(
+    file: UploadFile = File(...),
+    prompts: list[str] = Form(...),
+    fields: str = Form(default=""),
+    columns: str = Form(default=""),
+) -> Response:
+    """Answer several prompts about one upload, parsing it and running analytics once."""
+    prompts = [prompt for prompt in prompts if prompt.strip()]
+    if not prompts:
+        raise HTTPException(status_code=400, detail="Provide at least one non-empty prompt.")
+    if len(prompts) > config.batch.max_prompts:
+        raise HTTPException(status_code=400, detail=f"At most {config.batch.max_prompts} prompts per batch.")
+
+    batch_id = str(uuid.uuid4())
+    registry = get_frame_registry()
+    try:
+        with _admit_upload(file) as reservation:
+            dataframe, sampling = _load_admitted(file, reservation)
+            dataset = registry.register(dataframe, owner=batch_id)
+            states = run_batch(batch_id, dataset, prompts, sampling)
+    finally:
+        registry.release(batch_id)
+
+    results = []
+    for state in states:
+        session_id = state["session_id"]
+        if state.get("needs_clarification"):
+            # Each clarification is answered on its own through /clarify.
+            session_dataset = registry.register(dataframe, owner=session_id)
+            registry.persist_owner(session_id)
+            put_session(
+                session_id,
+                SessionPayload(
+                    dataset=session_dataset,
+                    initial_prompt=state["user_prompt"],
+                    sampling=sampling,
+                ),
+            )
+        results.append(select_fields(_result_payload(session_id, state), fields, columns))
+
+    response: dict[str, Any] = {"batch_id": batch_id, "results": results}
+    if sampling:
+        response["admission"] = reservation.describe()
+    return FastJSONResponse(response)
 
 
 @app.post("/clarify")
-def clarify(request: ClarifyRequest) -> dict[str, Any]:
+def clarify(request: ClarifyRequest, http_request: Request, background_tasks: BackgroundTasks) -> Response:
+    profile = _wants_profile(http_request, request.profile)
     session = get_session(request.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found or expired.")
 
-    result = _execute_graph(
+    result, payload = _run_analysis(
         session_id=request.session_id,
-        dataframe=session.dataframe,
+        dataset=session.dataset,
         user_prompt=session.initial_prompt,
+        background_tasks=background_tasks,
         clarification=request.clarification,
         use_python_repl=session.use_python_repl,
         use_mcp=session.use_mcp,
+        mode=session.mode,
+        sampling=session.sampling,
+        profile=profile,
+        resume=True,
     )
 
-    if result.get("needs_clarification"):
-        return {
-            "session_id": request.session_id,
-            "needs_clarification": True,
-            "clarification_question": result.get("clarification_question"),
-            "intent": result.get("intent", {}),
-        }
+    if not result.get("needs_clarification"):
+        delete_session(request.session_id)
+    return _render(payload, request.fields, request.columns, request.response_format)
+
+
+@app.get("/results/{session_id}")
+def refined_result(session_id: str) -> Response:
+    stored = get_result(session_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="No quick-mode result for this session.")
+    response: dict[str, Any] = {"session_id": session_id, "status": stored.status}
+    if stored.result:
+        response["result"] = stored.result
+    if stored.error:
+        response["error"] = stored.error
+    return FastJSONResponse(response)
 
-    delete_session(request.session_id)
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str) -> Response:
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return FastJSONResponse(job.to_dict())
+
+
+@app.post("/datasets")
+def create_dataset_endpoint(file: UploadFile = File(...)) -> dict[str, Any]:
+    with _admit_upload(file, allow_sample=False):
+        dataframe = _load_upload(file)
+        dataset_id = str(uuid.uuid4())
+        payload = create_dataset(dataframe)
+    put_dataset(dataset_id, payload)
+    return {
+        "dataset_id": dataset_id,
+        "version": payload.version,
+        "analytics": payload.analytics.to_analytics(),
+    }
+
+
+@app.get("/datasets/{dataset_id}")
+def dataset_info(dataset_id: str) -> dict[str, Any]:
+    payload = get_dataset(dataset_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
     return {
-        "session_id": request.session_id,
-        "needs_clarification": False,
-        "intent": result.get("intent", {}),
-        "analytics": result.get("analytics", {}),
-        "visualizations": result.get("visualizations", []),
-        "insights": result.get("insights", ""),
+        "dataset_id": dataset_id,
+        "version": payload.version,
+        "analytics": payload.analytics.to_analytics(),
+    }
+
+
+@app.post("/datasets/{dataset_id}/append")
+def append_dataset(dataset_id: str, file: UploadFile = File(...)) -> dict[str, Any]:
+    payload = get_dataset(dataset_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+
+    with _admit_upload(file, allow_sample=False):
+        dataframe = _load_upload(file)
+        try:
+            payload = append_stored_dataset(dataset_id, dataframe)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+
+    return {
+        "dataset_id": dataset_id,
+        "version": payload.version,
+        "appended_rows": int(len(dataframe)),
+        "analytics": payload.analytics.to_analytics(),
+    }
+
+
+@app.delete("/datasets/{dataset_id}", status_code=204)
+def delete_dataset_endpoint(dataset_id: str) -> Response:
+    if not delete_dataset(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    return Response(status_code=204)
+
+
+def _comparison_side(role: str, file: UploadFile | None, dataset_id: str) -> tuple[IncrementalAnalytics, dict[str, Any]]:
+    """Column statistics for one side of /compare, from a cache where possible."""
+    if (file is None) == (not dataset_id):
+        raise HTTPException(status_code=400, detail=f"Provide exactly one of {role}_file or {role}_dataset_id.")
+    if dataset_id:
+        payload = get_dataset(dataset_id)
+        if not payload:
+            raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found.")
+        # Stored datasets keep their statistics up to date on every append.
+        return payload.analytics, {"source": "dataset", "dataset_id": dataset_id, "version": payload.version, "stats": "cached"}
+
+    fingerprint = fingerprint_upload(file)
+    profile = get_profile(fingerprint)
+    stats = "cached"
+    if profile is None:
+        with _admit_upload(file, allow_sample=False):
+            profile = IncrementalAnalytics.from_dataframe(_load_upload(file))
+        put_profile(fingerprint, profile)
+        stats = "computed"
+    return profile, {"source": "upload", "filename": file.filename, "fingerprint": fingerprint, "stats": stats}
+
+
+@app.post("/compare")
+def compare(
+    baseline_file: UploadFile | None = File(default=None),
+    current_file: UploadFile | None = File(default=None),
+    baseline_dataset_id: str = Form(default=""),
+    current_dataset_id: str = Form(default=""),
+    user_prompt: str = Form(default=""),
+) -> Response:
+    baseline, baseline_info = _comparison_side("baseline", baseline_file, baseline_dataset_id)
+    current, current_info = _comparison_side("current", current_file, current_dataset_id)
+    comparison = compare_profiles(baseline, current)
+    return FastJSONResponse(
+        {
+            "baseline": baseline_info,
+            "current": current_info,
+            "comparison": comparison,
+            "insights": comparison_insight(comparison, user_prompt),
+        }
+    )
+
+
+def _anomaly_page(record: AnomalyRecord, column: str | None, method: str | None, offset: int, limit: int) -> dict[str, Any]:
+    try:
+        return page_anomalies(record.index, record.rows, column, method, offset, limit)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"No numeric column named {exc}.") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/anomalies/{session_id}")
+def session_anomalies(
+    session_id: str,
+    column: str | None = None,
+    method: str | None = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> dict[str, Any]:
+    record = get_anomalies(session_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="No anomaly index for this session.")
+    return {"session_id": session_id, **_anomaly_page(record, column, method, offset, limit)}
+
+
+@app.get("/datasets/{dataset_id}/anomalies")
+def dataset_anomalies(
+    dataset_id: str,
+    column: str | None = None,
+    method: str | None = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> dict[str, Any]:
+    payload = get_dataset(dataset_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+
+    key = f"dataset:{dataset_id}"
+    record = get_anomalies(key)
+    if record is None or record.version != payload.version:
+        version = payload.version
+        dataframe = payload.dataframe()
+        record = AnomalyRecord.from_frame(
+            detect_anomalies(dataframe, payload.analytics.numeric_columns), dataframe, version=version
+        )
+        put_anomalies(key, record)
+    return {"dataset_id": dataset_id, **_anomaly_page(record, column, method, offset, limit)}
+
+
+def _accepts_encoding(header: str, coding: str) -> bool:
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() != coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@app.get("/artifacts/{session_id}/{name}")
+def get_artifact(session_id: str, name: str, request: Request):
+    entry = get_artifact_store().get(session_id, name)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
     }
+    if _etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if entry.brotli_path and _accepts_encoding(accept_encoding, "br"):
+        return FileResponse(entry.brotli_path, media_type=entry.content_type, headers={**headers, "Content-Encoding": "br"})
+    if _accepts_encoding(accept_encoding, "gzip"):
+        return FileResponse(entry.gzip_path, media_type=entry.content_type, headers={**headers, "Content-Encoding": "gzip"})
+    return Response(gzip.decompress(entry.gzip_path.read_bytes()), media_type=entry.content_type, headers=headers)
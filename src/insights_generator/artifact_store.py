@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from insights_generator.config import ArtifactConfig, load_config
+
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+@dataclass(frozen=True)
+class ArtifactEntry:
+    name: str
+    sha256: str
+    content_type: str
+    size: int
+    gzip_path: Path
+    brotli_path: Path | None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+
+class ArtifactStore:
+    """Content-addressed, precompressed artifact storage with retention GC.
+
+    Blobs live under ``blobs/<sha[:2]>/<sha>.gz`` (plus ``.br`` when brotli is
+    installed) and are shared by every session that produces identical bytes.
+    Each session has a small JSON manifest mapping artifact names to blobs.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        retention_seconds: float = 7 * 24 * 3600.0,
+        max_bytes: int = 1024 * 1024 * 1024,
+        gc_interval_seconds: float = 300.0,
+        blob_grace_seconds: float = 60.0,
+    ) -> None:
+        self.root = Path(root)
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self.gc_interval_seconds = gc_interval_seconds
+        # Blobs are written before their manifest entry; recently touched blobs
+        # are never collected so a concurrent put cannot lose its blob.
+        self.blob_grace_seconds = blob_grace_seconds
+        self._lock = threading.Lock()
+        self._last_gc = time.monotonic()
+
+    @property
+    def _blob_dir(self) -> Path:
+        return self.root / "blobs"
+
+    @property
+    def _session_dir(self) -> Path:
+        return self.root / "sessions"
+
+    def _manifest_path(self, session_id: str) -> Path:
+        return self._session_dir / f"{session_id}.json"
+
+    def _blob_base(self, sha: str) -> Path:
+        return self._blob_dir / sha[:2] / sha
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _read_manifest(self, session_id: str) -> dict[str, Any]:
+        path = self._manifest_path(session_id)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {"artifacts": {}}
+
+    def put(self, session_id: str, name: str, data: bytes, content_type: str) -> dict[str, Any]:
+        if not _SAFE_NAME.match(session_id) or not _SAFE_NAME.match(name):
+            raise ValueError("Artifact session ids and names must be simple file names.")
+
+        sha = hashlib.sha256(data).hexdigest()
+        base = self._blob_base(sha)
+        gzip_path = base.with_suffix(".gz")
+        if not gzip_path.exists():
+            self._atomic_write(gzip_path, gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._atomic_write(base.with_suffix(".br"), brotli.compress(data))
+        else:
+            os.utime(gzip_path)
+
+        with self._lock:
+            manifest = self._read_manifest(session_id)
+            manifest["artifacts"][name] = {
+                "sha256": sha,
+                "content_type": content_type,
+                "size": len(data),
+            }
+            manifest["updated_at"] = time.time()
+            self._atomic_write(
+                self._manifest_path(session_id),
+                json.dumps(manifest, sort_keys=True).encode("utf-8"),
+            )
+
+        self.maybe_gc()
+        return {
+            "name": name,
+            "sha256": sha,
+            "bytes": len(data),
+            "url": f"/artifacts/{session_id}/{name}",
+        }
+
+    def get(self, session_id: str, name: str) -> ArtifactEntry | None:
+        if not _SAFE_NAME.match(session_id) or not _SAFE_NAME.match(name):
+            return None
+        info = self._read_manifest(session_id)["artifacts"].get(name)
+        if not info:
+            return None
+        base = self._blob_base(info["sha256"])
+        gzip_path = base.with_suffix(".gz")
+        if not gzip_path.exists():
+            return None
+        brotli_path = base.with_suffix(".br")
+        return ArtifactEntry(
+            name=name,
+            sha256=info["sha256"],
+            content_type=info["content_type"],
+            size=int(info["size"]),
+            gzip_path=gzip_path,
+            brotli_path=brotli_path if brotli_path.exists() else None,
+        )
+
+    def maybe_gc(self) -> dict[str, int] | None:
+        if time.monotonic() - self._last_gc < self.gc_interval_seconds:
+            return None
+        return self.gc()
+
+    def gc(self, now: float | None = None) -> dict[str, int]:
+        """Drop expired sessions, then the oldest ones while over the size budget,
+        then every blob no remaining manifest references."""
+        now = time.time() if now is None else now
+        removed_sessions = 0
+        removed_blobs = 0
+        with self._lock:
+            self._last_gc = time.monotonic()
+            manifests: list[tuple[float, Path, set[str]]] = []
+            for path in self._session_dir.glob("*.json") if self._session_dir.exists() else []:
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except ValueError:
+                    data = {"artifacts": {}}
+                updated = float(data.get("updated_at", path.stat().st_mtime))
+                if now - updated > self.retention_seconds:
+                    path.unlink(missing_ok=True)
+                    removed_sessions += 1
+                    continue
+                shas = {info["sha256"] for info in data.get("artifacts", {}).values()}
+                manifests.append((updated, path, shas))
+
+            blobs: dict[str, list[Path]] = {}
+            for blob in self._blob_dir.glob("*/*") if self._blob_dir.exists() else []:
+                if blob.name.startswith(".tmp-"):
+                    continue
+                blobs.setdefault(blob.name.split(".")[0], []).append(blob)
+            sizes = {sha: sum(p.stat().st_size for p in paths) for sha, paths in blobs.items()}
+
+            manifests.sort()
+            referenced = set().union(*(shas for _, _, shas in manifests)) if manifests else set()
+            total = sum(size for sha, size in sizes.items() if sha in referenced)
+            while manifests and total > self.max_bytes:
+                _, path, _ = manifests.pop(0)
+                path.unlink(missing_ok=True)
+                removed_sessions += 1
+                still = set().union(*(shas for _, _, shas in manifests)) if manifests else set()
+                total -= sum(sizes[sha] for sha in referenced - still if sha in sizes)
+                referenced = still
+
+            fresh_cutoff = time.time() - self.blob_grace_seconds
+            for sha, paths in blobs.items():
+                if sha in referenced:
+                    continue
+                if any(blob.stat().st_mtime > fresh_cutoff for blob in paths):
+                    continue
+                for blob in paths:
+                    blob.unlink(missing_ok=True)
+                removed_blobs += 1
+
+        return {
+            "removed_sessions": removed_sessions,
+            "removed_blobs": removed_blobs,
+            "bytes": int(total),
+        }
+
+
+_STORE: ArtifactStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def _build_store(config: ArtifactConfig) -> ArtifactStore:
+    return ArtifactStore(
+        root=config.root_dir,
+        retention_seconds=config.retention_seconds,
+        max_bytes=config.max_bytes,
+        gc_interval_seconds=config.gc_interval_seconds,
+    )
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = _build_store(load_config().artifacts)
+        return _STORE
+
+
+def set_artifact_store(store: ArtifactStore | None) -> None:
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
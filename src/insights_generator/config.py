@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass(frozen=True)
@@ -12,13 +12,116 @@ class ModelConfig:
     openai_api_key: str
     openai_base_url: str
     anthropic_api_key: str
+    request_timeout_seconds: float = 20.0
+    max_concurrency: int = 8
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    # 0 disables provider rate limiting.
+    rate_limit_rpm: float = 0.0
+    rate_limit_burst: int = 5
+    queue_timeout_seconds: float = 30.0
+    priority_aging_seconds: float = 15.0
+
+
+@dataclass(frozen=True)
+class ArtifactConfig:
+    root_dir: str = "artifacts"
+    retention_seconds: float = 7 * 24 * 3600.0
+    max_bytes: int = 1024 * 1024 * 1024
+    gc_interval_seconds: float = 300.0
+
+
+@dataclass(frozen=True)
+class JobConfig:
+    db_path: str = "jobs/jobs.sqlite3"
+    spool_dir: str = "jobs/spool"
+    worker_concurrency: int = 2
+    lease_seconds: float = 120.0
+    poll_interval_seconds: float = 0.5
+    max_attempts: int = 3
+    # Finished jobs are deleted this long after they end; 0 keeps them.
+    result_ttl_seconds: float = 86400.0
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    # 0 means half of physical memory.
+    memory_budget_bytes: int = 0
+    max_wait_seconds: float = 10.0
+    retry_after_seconds: int = 5
+    overflow_policy: str = "sample"
+
+
+@dataclass(frozen=True)
+class DatasetConfig:
+    # Stored datasets are evicted least recently used first past max_bytes
+    # and expire after ttl_seconds without use (0 keeps them).
+    max_bytes: int = 1024 * 1024 * 1024
+    ttl_seconds: float = 24 * 3600.0
+
+
+@dataclass(frozen=True)
+class ReplConfig:
+    workers: int = 2
+    timeout_seconds: float = 10.0
+    memory_limit_mb: int = 512
+    max_tasks_per_worker: int = 100
+    # Start the workers with the app instead of on the first use_python_repl request.
+    prewarm: bool = False
+
+
+@dataclass(frozen=True)
+class MCPConfig:
+    servers: tuple[str, ...] = ()
+    chart_tool: str = "render_chart"
+    pool_size: int = 4
+    call_timeout_seconds: float = 10.0
+
+
+@dataclass(frozen=True)
+class IntentCacheConfig:
+    # 0 disables the cache.
+    max_entries: int = 1024
+    similarity_threshold: float = 0.85
+
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    # Whether clients may opt in to profiling with X-Profile or profile=true.
+    enabled: bool = False
+    sample_interval_ms: float = 5.0
+    tracemalloc_frames: int = 1
+    top_allocations: int = 5
+    # How long a profiled request waits for the running profile before it runs unprofiled.
+    lock_timeout_seconds: float = 2.0
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    max_prompts: int = 20
+    # Intent and insight calls in flight per batch request.
+    concurrency: int = 4
 
 
 @dataclass(frozen=True)
 class AppConfig:
     model: ModelConfig
     prompts_path: str
-
+    artifacts: ArtifactConfig = field(default_factory=ArtifactConfig)
+    quick_sample_rows: int = 50_000
+    jobs: JobConfig = field(default_factory=JobConfig)
+    upload_spool_dir: str = ""
+    frame_spill_dir: str = ""
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+    datasets: DatasetConfig = field(default_factory=DatasetConfig)
+    chart_render_workers: int = 4
+    # "pandas" (reference) or "arrow" (pyarrow.compute kernels).
+    analytics_backend: str = "pandas"
+    repl: ReplConfig = field(default_factory=ReplConfig)
+    mcp: MCPConfig = field(default_factory=MCPConfig)
+    intent_cache: IntentCacheConfig = field(default_factory=IntentCacheConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    batch: BatchConfig = field(default_factory=BatchConfig)
 
 
 def load_config() -> AppConfig:
@@ -33,6 +136,72 @@ def load_config() -> AppConfig:
             openai_api_key=os.getenv("OPENAI_API_KEY", ""),
             openai_base_url=os.getenv("OPENAI_BASE_URL", ""),
             anthropic_api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+            request_timeout_seconds=float(os.getenv("MODEL_TIMEOUT_SECONDS", "20.0")),
+            max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "8")),
+            breaker_failure_threshold=int(os.getenv("MODEL_BREAKER_FAILURES", "5")),
+            breaker_reset_seconds=float(os.getenv("MODEL_BREAKER_RESET_SECONDS", "30.0")),
+            rate_limit_rpm=float(os.getenv("MODEL_RATE_LIMIT_RPM", "0")),
+            rate_limit_burst=int(os.getenv("MODEL_RATE_LIMIT_BURST", "5")),
+            queue_timeout_seconds=float(os.getenv("MODEL_QUEUE_TIMEOUT_SECONDS", "30")),
+            priority_aging_seconds=float(os.getenv("MODEL_PRIORITY_AGING_SECONDS", "15")),
         ),
         prompts_path=os.getenv("PROMPTS_PATH", "prompts/insights_prompts.yaml"),
+        artifacts=ArtifactConfig(
+            root_dir=os.getenv("ARTIFACTS_DIR", "artifacts"),
+            retention_seconds=float(os.getenv("ARTIFACT_RETENTION_SECONDS", str(7 * 24 * 3600))),
+            max_bytes=int(os.getenv("ARTIFACT_MAX_BYTES", str(1024 * 1024 * 1024))),
+            gc_interval_seconds=float(os.getenv("ARTIFACT_GC_INTERVAL_SECONDS", "300")),
+        ),
+        quick_sample_rows=int(os.getenv("QUICK_SAMPLE_ROWS", "50000")),
+        jobs=JobConfig(
+            db_path=os.getenv("JOB_DB_PATH", "jobs/jobs.sqlite3"),
+            spool_dir=os.getenv("JOB_SPOOL_DIR", "jobs/spool"),
+            worker_concurrency=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "120")),
+            poll_interval_seconds=float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "0.5")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            result_ttl_seconds=float(os.getenv("JOB_RESULT_TTL_SECONDS", "86400")),
+        ),
+        upload_spool_dir=os.getenv("UPLOAD_SPOOL_DIR", ""),
+        frame_spill_dir=os.getenv("FRAME_SPILL_DIR", ""),
+        admission=AdmissionConfig(
+            memory_budget_bytes=int(os.getenv("ADMISSION_MEMORY_BUDGET_BYTES", "0")),
+            max_wait_seconds=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10")),
+            retry_after_seconds=int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5")),
+            overflow_policy=os.getenv("ADMISSION_OVERFLOW_POLICY", "sample"),
+        ),
+        datasets=DatasetConfig(
+            max_bytes=int(os.getenv("DATASET_MAX_BYTES", str(1024 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("DATASET_TTL_SECONDS", "86400")),
+        ),
+        chart_render_workers=int(os.getenv("CHART_RENDER_WORKERS", "4")),
+        analytics_backend=os.getenv("ANALYTICS_BACKEND", "pandas").strip().lower() or "pandas",
+        repl=ReplConfig(
+            workers=int(os.getenv("REPL_WORKERS", "2")),
+            timeout_seconds=float(os.getenv("REPL_TIMEOUT_SECONDS", "10")),
+            memory_limit_mb=int(os.getenv("REPL_MEMORY_LIMIT_MB", "512")),
+            max_tasks_per_worker=int(os.getenv("REPL_MAX_TASKS_PER_WORKER", "100")),
+            prewarm=os.getenv("REPL_PREWARM", "false").strip().lower() in ("1", "true", "yes"),
+        ),
+        mcp=MCPConfig(
+            servers=tuple(url.strip() for url in os.getenv("MCP_SERVERS", "").split(",") if url.strip()),
+            chart_tool=os.getenv("MCP_CHART_TOOL", "render_chart"),
+            pool_size=int(os.getenv("MCP_POOL_SIZE", "4")),
+            call_timeout_seconds=float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "10")),
+        ),
+        intent_cache=IntentCacheConfig(
+            max_entries=int(os.getenv("INTENT_CACHE_SIZE", "1024")),
+            similarity_threshold=float(os.getenv("INTENT_CACHE_THRESHOLD", "0.85")),
+        ),
+        profiling=ProfilingConfig(
+            enabled=os.getenv("PROFILING_ENABLED", "false").strip().lower() in ("1", "true", "yes"),
+            sample_interval_ms=float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5")),
+            tracemalloc_frames=int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "1")),
+            top_allocations=int(os.getenv("PROFILING_TOP_ALLOCATIONS", "5")),
+            lock_timeout_seconds=float(os.getenv("PROFILING_LOCK_TIMEOUT_SECONDS", "2")),
+        ),
+        batch=BatchConfig(
+            max_prompts=int(os.getenv("BATCH_MAX_PROMPTS", "20")),
+            concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+        ),
     )
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from insights_generator.admission import AdmissionController, get_admission_controller
+from insights_generator.analytics.incremental import IncrementalAnalytics
+from insights_generator.config import DatasetConfig, load_config
+
+
+def frame_bytes(dataframe: pd.DataFrame) -> int:
+    return int(dataframe.memory_usage(index=True, deep=True).sum())
+
+
+@dataclass
+class DatasetPayload:
+    frames: list[pd.DataFrame]
+    analytics: IncrementalAnalytics
+    version: int = 1
+    nbytes: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.nbytes:
+            self.nbytes = sum(frame_bytes(frame) for frame in self.frames)
+
+    def append(self, dataframe: pd.DataFrame) -> None:
+        with self.lock:
+            self.analytics.update(dataframe)
+            self.frames.append(dataframe)
+            self.nbytes += frame_bytes(dataframe)
+            self.version += 1
+
+    def dataframe(self) -> pd.DataFrame:
+        with self.lock:
+            if len(self.frames) > 1:
+                self.frames = [pd.concat(self.frames, ignore_index=True)]
+            return self.frames[0]
+
+
+@dataclass
+class _Entry:
+    payload: DatasetPayload
+    last_used: float
+    # Bytes held against this controller's budget for the stored frames.
+    controller: AdmissionController
+    charged: int = 0
+
+
+class DatasetStore:
+    """Stored datasets for ``/datasets``, bounded by bytes and idle time.
+
+    Datasets unused for ``ttl_seconds`` expire and the least recently used
+    ones are evicted past ``max_bytes`` (the newest is always kept). Their
+    frames are resident between requests, so their bytes are held against
+    the admission controller's memory budget for as long as they are stored.
+    """
+
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024, ttl_seconds: float = 24 * 3600.0) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"evicted": 0, "expired": 0}
+
+    def _charge(self, entry: _Entry) -> None:
+        delta = entry.payload.nbytes - entry.charged
+        if delta:
+            entry.controller.hold(delta)
+            entry.charged += delta
+            self._bytes += delta
+
+    def _drop_locked(self, dataset_id: str) -> None:
+        entry = self._entries.pop(dataset_id)
+        entry.controller.hold(-entry.charged)
+        self._bytes -= entry.charged
+
+    def _trim_locked(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            for dataset_id in [key for key, entry in self._entries.items() if now - entry.last_used > self.ttl_seconds]:
+                self._drop_locked(dataset_id)
+                self._counters["expired"] += 1
+        while len(self._entries) > 1 and self._bytes > self.max_bytes:
+            self._drop_locked(next(iter(self._entries)))
+            self._counters["evicted"] += 1
+
+    def put(self, dataset_id: str, payload: DatasetPayload) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if dataset_id in self._entries:
+                self._drop_locked(dataset_id)
+            entry = _Entry(payload, now, get_admission_controller())
+            self._entries[dataset_id] = entry
+            self._charge(entry)
+            self._trim_locked(now)
+
+    def get(self, dataset_id: str) -> DatasetPayload | None:
+        now = time.monotonic()
+        with self._lock:
+            self._trim_locked(now)
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                return None
+            entry.last_used = now
+            self._entries.move_to_end(dataset_id)
+            return entry.payload
+
+    def append(self, dataset_id: str, dataframe: pd.DataFrame) -> DatasetPayload | None:
+        """Append rows to a stored dataset; ``None`` if it is not stored."""
+        payload = self.get(dataset_id)
+        if payload is None:
+            return None
+        payload.append(dataframe)
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is not None and entry.payload is payload:
+                self._charge(entry)
+                self._trim_locked(time.monotonic())
+        return payload
+
+    def delete(self, dataset_id: str) -> bool:
+        with self._lock:
+            if dataset_id not in self._entries:
+                return False
+            self._drop_locked(dataset_id)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            for dataset_id in list(self._entries):
+                self._drop_locked(dataset_id)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"datasets": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes, **self._counters}
+
+
+_STORE: DatasetStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def _build_store(config: DatasetConfig) -> DatasetStore:
+    return DatasetStore(max_bytes=config.max_bytes, ttl_seconds=config.ttl_seconds)
+
+
+def get_dataset_store() -> DatasetStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = _build_store(load_config().datasets)
+        return _STORE
+
+
+def set_dataset_store(store: DatasetStore | None) -> None:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is not None and _STORE is not store:
+            _STORE.clear()
+        _STORE = store
+
+
+def create_dataset(dataframe: pd.DataFrame) -> DatasetPayload:
+    return DatasetPayload(
+        frames=[dataframe],
+        analytics=IncrementalAnalytics.from_dataframe(dataframe),
+    )
+
+
+def put_dataset(dataset_id: str, payload: DatasetPayload) -> None:
+    get_dataset_store().put(dataset_id, payload)
+
+
+def get_dataset(dataset_id: str) -> DatasetPayload | None:
+    return get_dataset_store().get(dataset_id)
+
+
+def append_dataset(dataset_id: str, dataframe: pd.DataFrame) -> DatasetPayload | None:
+    return get_dataset_store().append(dataset_id, dataframe)
+
+
+def delete_dataset(dataset_id: str) -> bool:
+    return get_dataset_store().delete(dataset_id)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Mapping
+
+import pandas as pd
+import pyarrow as pa
+
+from insights_generator.config import load_config
+from insights_generator.io_utils import read_arrow_table, table_to_pandas
+
+
+HANDLE_PREFIX = "frame-"
+_HANDLE = re.compile(r"^frame-[0-9a-f]{32}$")
+
+
+class FrameRegistry:
+    """Resolves the dataset handles carried in ``GraphState`` to DataFrames.
+
+    Frames registered in this process are kept in memory. ``persist`` writes a
+    frame to an Arrow IPC file under ``spill_dir`` and swaps the in-memory copy
+    for a memory-mapped one, so a handle also resolves in any process sharing
+    the directory and a frame parked for a pending clarification costs page
+    cache rather than heap. Each frame belongs to an owner (the session that
+    registered it) and is dropped, file included, by ``release``.
+    """
+
+    def __init__(self, spill_dir: str | Path) -> None:
+        self.spill_dir = Path(spill_dir)
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._owners: defaultdict[str, set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _path(self, handle: str) -> Path:
+        if not _HANDLE.match(handle):
+            raise KeyError(f"Invalid dataset handle {handle!r}.")
+        return self.spill_dir / f"{handle}.arrow"
+
+    def register(self, dataframe: pd.DataFrame, owner: str = "") -> str:
+        handle = f"{HANDLE_PREFIX}{uuid.uuid4().hex}"
+        with self._lock:
+            self._frames[handle] = dataframe
+            self._owners[owner].add(handle)
+        return handle
+
+    def resolve(self, handle: str) -> pd.DataFrame:
+        with self._lock:
+            frame = self._frames.get(handle)
+        if frame is not None:
+            return frame
+        path = self._path(handle)
+        if not path.is_file():
+            raise KeyError(f"Unknown dataset handle {handle!r}.")
+        frame = table_to_pandas(read_arrow_table(str(path), "arrow"))
+        with self._lock:
+            return self._frames.setdefault(handle, frame)
+
+    def persist(self, handle: str) -> Path | None:
+        """Write the frame to the spill directory; ``None`` if Arrow cannot hold it."""
+        path = self._path(handle)
+        if path.is_file():
+            return path
+        try:
+            table = pa.Table.from_pandas(self.resolve(handle), preserve_index=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Mixed-type object columns: the frame stays resolvable in memory only.
+            return None
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{handle}-", suffix=".tmp", dir=self.spill_dir)
+        try:
+            with os.fdopen(fd, "wb") as out, pa.ipc.new_file(out, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        frame = table_to_pandas(read_arrow_table(str(path), "arrow"))
+        with self._lock:
+            if handle in self._frames:
+                self._frames[handle] = frame
+        return path
+
+    def persist_owner(self, owner: str) -> None:
+        with self._lock:
+            handles = sorted(self._owners.get(owner, ()))
+        for handle in handles:
+            self.persist(handle)
+
+    def release(self, owner: str) -> None:
+        """Forget every frame registered by ``owner`` and delete their files."""
+        with self._lock:
+            handles = self._owners.pop(owner, set())
+            for handle in handles:
+                self._frames.pop(handle, None)
+        for handle in handles:
+            try:
+                self._path(handle).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"frames": len(self._frames), "owners": len(self._owners)}
+
+
+_REGISTRY: FrameRegistry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_frame_registry() -> FrameRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = FrameRegistry(load_config().frame_spill_dir or Path(tempfile.gettempdir()) / "insights-frames")
+        return _REGISTRY
+
+
+def set_frame_registry(registry: FrameRegistry | None) -> None:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        _REGISTRY = registry
+
+
+def register_frame(dataframe: pd.DataFrame, owner: str = "") -> str:
+    return get_frame_registry().register(dataframe, owner)
+
+
+def state_frame(state: Mapping[str, Any]) -> pd.DataFrame:
+    """The DataFrame behind a graph state's ``dataset`` handle."""
+    return get_frame_registry().resolve(state["dataset"])
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import Any
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 from langgraph.graph import END, START, StateGraph
 
-from insights_generator.agents.analytics_agent import run_analytics_agent
+from insights_generator.agents.analytics_agent import project_analytics, run_analytics_agent
 from insights_generator.agents.insight_agent import build_insight_agent
 from insights_generator.agents.intent_agent import build_intent_agent
-from insights_generator.agents.visualization_agent import run_visualization_agent
+from insights_generator.agents.planner_agent import merge_plans, run_planner_agent
+from insights_generator.agents.visualization_agent import render_shared_charts, run_visualization_agent
+from insights_generator.anomaly_store import get_anomalies, put_anomalies
+from insights_generator.frame_registry import state_frame
 from insights_generator.model_router import ChatClient
 from insights_generator.state import GraphState
 
@@ -15,22 +20,114 @@ from insights_generator.state import GraphState
 def _route_after_intent(state: GraphState) -> str:
     if state.get("needs_clarification"):
         return "end"
-    return "analytics"
+    return "plan"
 
 
-def build_graph(chat_client: ChatClient, prompt_pack: dict[str, Any] | None = None):
+def build_graph(chat_client: ChatClient, prompt_pack: dict[str, Any] | None = None, checkpointer=None):
+    """Compile the agent graph.
+
+    With a ``checkpointer`` every run needs a ``thread_id`` in its config, and a
+    run stopped for clarification can be resumed on the same thread by
+    invoking it with just the clarification.
+    """
     prompt_pack = prompt_pack or {}
     graph = StateGraph(GraphState)
 
     graph.add_node("intent", build_intent_agent(chat_client, prompt_pack.get("intent", {})))
+    graph.add_node("plan", run_planner_agent)
     graph.add_node("analytics", run_analytics_agent)
     graph.add_node("visualization", run_visualization_agent)
     graph.add_node("insight", build_insight_agent(chat_client, prompt_pack.get("insight", {})))
 
     graph.add_edge(START, "intent")
-    graph.add_conditional_edges("intent", _route_after_intent, {"analytics": "analytics", "end": END})
+    graph.add_conditional_edges("intent", _route_after_intent, {"plan": "plan", "end": END})
+    graph.add_edge("plan", "analytics")
     graph.add_edge("analytics", "visualization")
     graph.add_edge("visualization", "insight")
     graph.add_edge("insight", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+
+def invoke_with_stages(
+    compiled_graph,
+    state: GraphState,
+    on_stage: Callable[[str], None],
+    config: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Invoke the graph, reporting each node name just before it starts running."""
+    final: dict[str, Any] = dict(state)
+    for mode, event in compiled_graph.stream(state, config, stream_mode=["tasks", "values"]):
+        if mode == "tasks" and "input" in event:
+            on_stage(event["name"])
+        elif mode == "values":
+            final = event
+    return final
+
+
+def _fan_out(node: Callable[[GraphState], GraphState], states: list[GraphState], concurrency: int) -> None:
+    """Run ``node`` on each state with at most ``concurrency`` in flight."""
+    if not states:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(states))), thread_name_prefix="batch") as pool:
+        # Each call runs in a copy of this context so LLM priority/tenant tags carry over.
+        futures = [pool.submit(contextvars.copy_context().run, node, state) for state in states]
+        for future in futures:
+            future.result()
+
+
+def build_batch_runner(chat_client: ChatClient, prompt_pack: dict[str, Any] | None = None, concurrency: int = 4):
+    """Run many prompts over one dataset, sharing the work that does not depend on the prompt.
+
+    Intents are recognized concurrently, analytics run once for the union of
+    the prompts' plans and each prompt gets its projection, identical charts
+    are rendered once, and insights fan out with bounded concurrency. Returns
+    a function ``(session_id, dataset, prompts, sampling=None) -> states`` with
+    one final state per prompt, in order; prompts that need clarification stop
+    after the intent node as they do in the graph.
+    """
+    prompt_pack = prompt_pack or {}
+    intent_node = build_intent_agent(chat_client, prompt_pack.get("intent", {}))
+    insight_node = build_insight_agent(chat_client, prompt_pack.get("insight", {}))
+
+    def run_batch(
+        session_id: str,
+        dataset: str,
+        prompts: list[str],
+        sampling: dict[str, Any] | None = None,
+    ) -> list[GraphState]:
+        states: list[GraphState] = [
+            {"session_id": f"{session_id}-{index}", "dataset": dataset, "user_prompt": prompt, "clarification": ""}
+            for index, prompt in enumerate(prompts)
+        ]
+        _fan_out(intent_node, states, concurrency)
+        ready = [state for state in states if not state.get("needs_clarification")]
+        if not ready:
+            return states
+
+        for state in ready:
+            run_planner_agent(state)
+        shared: GraphState = {"session_id": session_id, "dataset": dataset}
+        if sampling:
+            shared["sampling"] = sampling
+        numeric_cols = state_frame(shared).select_dtypes(include="number").columns.tolist()
+        shared["execution_plan"] = merge_plans([state["execution_plan"] for state in ready], numeric_cols)
+        run_analytics_agent(shared)
+        # The anomaly index is stored under the batch id; each result pages it by its own.
+        record = get_anomalies(session_id)
+
+        for state in ready:
+            state["analytics"] = project_analytics(shared["analytics"], state["execution_plan"])
+            if record is not None:
+                put_anomalies(state["session_id"], record)
+        charts = render_shared_charts(
+            state_frame(shared),
+            session_id,
+            [(state["analytics"], state["execution_plan"]) for state in ready],
+        )
+        for state, visualizations in zip(ready, charts):
+            state["visualizations"] = visualizations
+        _fan_out(insight_node, ready, concurrency)
+        return states
+
+    return run_batch
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from insights_generator.config import load_config
+
+
+VECTOR_DIMS = 1024
+NGRAM_SIZES = (3, 4, 5)
+INITIAL_ROWS = 64
+
+# Phrasings that mean the same analysis are folded onto one term before
+# hashing, so "revenue outliers" and "anomalies in revenue" share n-grams.
+CANONICAL_TERMS = {
+    "anomaly": ("anomalies", "anomalous", "outliers", "outlier", "unusual", "spikes", "spike", "weird"),
+    "trend": ("trends", "trending", "over time", "trajectory", "growth", "decline"),
+    "variance": ("variability", "volatility", "volatile", "dispersion", "spread", "stability"),
+    "distribution": ("distributions", "histogram", "long tail", "skew", "skewed"),
+    "correlation": (
+        "correlations",
+        "correlated",
+        "correlate",
+        "relationship",
+        "relationships",
+        "drivers",
+        "driver",
+        "drives",
+    ),
+    "summary": ("overview", "summarize", "summarise", "kpis", "kpi", "basic stats", "statistics"),
+}
+STOPWORDS = frozenset(
+    {"a", "an", "and", "any", "are", "by", "can", "for", "give", "in", "is", "me", "of", "on", "please",
+     "show", "tell", "the", "there", "to", "what", "with", "you", "i", "want", "see", "find", "my"}
+)
+_SYNONYMS = sorted(
+    ((variant, canonical) for canonical, variants in CANONICAL_TERMS.items() for variant in variants),
+    key=lambda item: -len(item[0]),
+)
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+def normalize_request(text: str) -> str:
+    lowered = " " + " ".join(_WORD_RE.findall(text.lower())) + " "
+    for variant, canonical in _SYNONYMS:
+        lowered = lowered.replace(f" {variant} ", f" {canonical} ")
+    # Word order and repetition do not change the intent (column hints are
+    # extracted separately), so requests reduce to a sorted set of terms.
+    return " ".join(sorted({word for word in lowered.split() if word not in STOPWORDS}))
+
+
+def _scope(namespace: str, normalized: str) -> str:
+    """Namespace plus the canonical analysis terms of a normalized request.
+
+    Character n-grams barely move when one keyword in a long request changes,
+    so requests only match when they ask for the same set of analyses.
+    """
+    terms = sorted(set(normalized.split()) & CANONICAL_TERMS.keys())
+    return f"{namespace}|{','.join(terms)}"
+
+
+def vectorize(text: str, dims: int = VECTOR_DIMS) -> np.ndarray:
+    """L2-normalized signed feature hash of the character n-grams of ``text``."""
+    vector = np.zeros(dims, dtype=np.float32)
+    padded = f" {normalize_request(text)} "
+    for size in NGRAM_SIZES:
+        for start in range(max(len(padded) - size + 1, 0)):
+            digest = zlib.crc32(padded[start : start + size].encode("utf-8"))
+            # Low bits pick the slot, the top bit the sign, so collisions cancel
+            # out on average instead of inflating similarity.
+            vector[digest % dims] += 1.0 if digest >> 31 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True)
+class IntentCacheHit:
+    intent: dict[str, Any]
+    similarity: float
+    matched_request: str
+
+
+class IntentCache:
+    """Bounded nearest-neighbour cache of parsed intents keyed by request text.
+
+    Vectors live in one float32 matrix, so a lookup is a single matrix-vector
+    product (cosine similarity, as rows are normalized). Entries from a
+    different ``namespace`` (prompt pack), or asking for a different set of
+    ``CANONICAL_TERMS``, never match. When full, the least
+    recently used entry is overwritten.
+    """
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.85, dims: int = VECTOR_DIMS) -> None:
+        self.max_entries = max(max_entries, 1)
+        self.threshold = threshold
+        self.dims = dims
+        self._vectors = np.zeros((min(INITIAL_ROWS, self.max_entries), dims), dtype=np.float32)
+        self._namespaces: list[str] = []
+        self._requests: list[str] = []
+        self._intents: list[dict[str, Any]] = []
+        self._last_used = np.zeros(self._vectors.shape[0], dtype=np.int64)
+        self._exact: dict[tuple[str, str], int] = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "hits": 0, "exact_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def _touch(self, slot: int) -> None:
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+    def lookup(self, request: str, namespace: str = "") -> IntentCacheHit | None:
+        normalized = normalize_request(request)
+        namespace = _scope(namespace, normalized)
+        with self._lock:
+            self._counters["lookups"] += 1
+            slot = self._exact.get((namespace, normalized))
+            if slot is not None:
+                self._counters["hits"] += 1
+                self._counters["exact_hits"] += 1
+                self._touch(slot)
+                return IntentCacheHit(dict(self._intents[slot]), 1.0, self._requests[slot])
+            size = len(self._requests)
+            if size == 0:
+                self._counters["misses"] += 1
+                return None
+            similarities = self._vectors[:size] @ vectorize(request, self.dims)
+            same_namespace = np.fromiter((ns == namespace for ns in self._namespaces), dtype=bool, count=size)
+            similarities[~same_namespace] = -1.0
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._touch(slot)
+            return IntentCacheHit(dict(self._intents[slot]), round(similarity, 4), self._requests[slot])
+
+    def put(self, request: str, intent: dict[str, Any], namespace: str = "") -> None:
+        normalized = normalize_request(request)
+        namespace = _scope(namespace, normalized)
+        vector = vectorize(request, self.dims)
+        with self._lock:
+            slot = self._exact.get((namespace, normalized))
+            if slot is None:
+                size = len(self._requests)
+                if size < self.max_entries:
+                    if size == self._vectors.shape[0]:
+                        rows = min(size * 2, self.max_entries)
+                        self._vectors = np.resize(self._vectors, (rows, self.dims))
+                        self._last_used = np.resize(self._last_used, rows)
+                    slot = size
+                    self._namespaces.append(namespace)
+                    self._requests.append(request)
+                    self._intents.append(dict(intent))
+                else:
+                    slot = int(np.argmin(self._last_used[:size]))
+                    del self._exact[(self._namespaces[slot], normalize_request(self._requests[slot]))]
+                    self._counters["evictions"] += 1
+            self._vectors[slot] = vector
+            self._namespaces[slot] = namespace
+            self._requests[slot] = request
+            self._intents[slot] = dict(intent)
+            self._exact[(namespace, normalized)] = slot
+            self._touch(slot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+            self._requests.clear()
+            self._intents.clear()
+            self._exact.clear()
+            self._last_used[:] = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["lookups"]
+            return {
+                **self._counters,
+                "entries": len(self._requests),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_CACHE: IntentCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_intent_cache() -> IntentCache | None:
+    """Process-wide cache, or ``None`` when ``INTENT_CACHE_SIZE`` is 0."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            config = load_config().intent_cache
+            if config.max_entries <= 0:
+                return None
+            _CACHE = IntentCache(max_entries=config.max_entries, threshold=config.similarity_threshold)
+        return _CACHE
+
+
+def set_intent_cache(cache: IntentCache | None) -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = cache
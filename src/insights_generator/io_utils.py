@@ -1,16 +1,446 @@
 from __future__ import annotations
 
-from io import BytesIO
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from fastapi import UploadFile
 
 
-def load_dataframe_from_upload(file: UploadFile) -> pd.DataFrame:
-    filename = (file.filename or "").lower()
-    raw = file.file.read()
-    if filename.endswith(".csv"):
-        return pd.read_csv(BytesIO(raw))
-    if filename.endswith(".parquet"):
-        return pd.read_parquet(BytesIO(raw))
-    raise ValueError("Unsupported file type. Upload .csv or .parquet.")
+SNIFF_BYTES = 8
+SPOOL_CHUNK_BYTES = 8 * 1024 * 1024
+CSV_BLOCK_SIZE = 4 * 1024 * 1024
+SCHEMA_CACHE_MAX_ENTRIES = 256
+
+# Leading bytes of each container/codec we accept.
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+FORMAT_MAGIC = {
+    b"PAR1": "parquet",
+    b"ARROW1": "arrow",
+    b"FEA1": "feather",
+    # Arrow IPC stream: every message starts with the 0xFFFFFFFF continuation marker.
+    b"\xff\xff\xff\xff": "arrow_stream",
+}
+ARROW_FORMATS = ("arrow", "arrow_stream", "feather")
+_COMPRESSION_SUFFIXES = (".gz", ".gzip", ".zst", ".zstd")
+_DIGITS = re.compile(r"\d+")
+
+
+def sniff_compression(head: bytes) -> str | None:
+    for magic, codec in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def sniff_format(head: bytes) -> str | None:
+    """Container format from the first bytes of (decompressed) content.
+
+    Anything without a binary signature that looks like text is treated as CSV.
+    """
+    for magic, fmt in FORMAT_MAGIC.items():
+        if head.startswith(magic):
+            return fmt
+    if head and b"\x00" not in head:
+        return "csv"
+    return None
+
+
+def source_key(filename: str) -> str:
+    """Stable key for an upload source: the file name without extensions or
+    digit runs, so ``sales_2024-05-01.csv.gz`` and ``sales_2024-05-02.csv``
+    share one cached schema."""
+    name = filename.lower().rsplit("/", 1)[-1]
+    for suffix in _COMPRESSION_SUFFIXES:
+        name = name.removesuffix(suffix)
+    name = name.rsplit(".", 1)[0] if "." in name else name
+    return _DIGITS.sub("#", name)
+
+
+class SchemaCache:
+    """Bounded LRU of CSV column types inferred per upload source."""
+
+    def __init__(self, max_entries: int = SCHEMA_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict[str, pa.DataType]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> dict[str, pa.DataType] | None:
+        with self._lock:
+            types = self._entries.get(key)
+            if types is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return types
+
+    def put(self, key: str, schema: pa.Schema) -> None:
+        types = {field.name: field.type for field in schema if not pa.types.is_null(field.type)}
+        with self._lock:
+            self._entries[key] = types
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+SCHEMA_CACHE = SchemaCache()
+
+
+class _Borrowed(io.RawIOBase):
+    """View of an upload handle that pyarrow may close without closing the upload."""
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._handle.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._handle.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._handle.read(size)
+
+    def readinto(self, buffer) -> int:
+        data = self._handle.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _open_stream(handle: BinaryIO, compression: str | None) -> pa.NativeFile:
+    handle.seek(0)
+    raw = pa.PythonFile(_Borrowed(handle), mode="r")
+    if compression is None:
+        return raw
+    if not pa.Codec.is_available(compression):
+        raise ValueError(f"{compression} uploads are not supported by this pyarrow build.")
+    return pa.CompressedInputStream(raw, compression)
+
+
+def _read_csv(handle: BinaryIO, compression: str | None, column_types: dict[str, pa.DataType] | None) -> pa.Table:
+    return pa_csv.read_csv(
+        _open_stream(handle, compression),
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types or {},
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def _first_block_types(handle: BinaryIO, compression: str | None) -> dict[str, pa.DataType]:
+    """Column types pyarrow infers from the first block alone."""
+    reader = pa_csv.open_csv(
+        _open_stream(handle, compression),
+        read_options=pa_csv.ReadOptions(use_threads=False, block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+    )
+    try:
+        return {field.name: field.type for field in reader.schema}
+    finally:
+        reader.close()
+
+
+def _is_number(dtype: pa.DataType) -> bool:
+    return pa.types.is_integer(dtype) or pa.types.is_floating(dtype) or pa.types.is_decimal(dtype)
+
+
+def _reusable(cached: pa.DataType, fresh: pa.DataType) -> bool:
+    # Numeric types may widen (int to float) so a later block with decimals
+    # does not force a re-read; anything else must match what the file shows.
+    return cached == fresh or pa.types.is_null(fresh) or (_is_number(cached) and _is_number(fresh))
+
+
+def read_csv_table(
+    handle: BinaryIO,
+    compression: str | None = None,
+    source: str = "",
+    cache: SchemaCache | None = None,
+) -> pa.Table:
+    """Parse CSV with pyarrow's multithreaded reader, streaming through the codec.
+
+    Column types previously inferred for ``source`` are checked against a
+    fresh inference on the first block and reused only where they agree (or
+    widen a numeric type), so a cached string type cannot hide a column that
+    now parses as numbers. If the upload no longer fits them the file is
+    re-read with fresh inference.
+    """
+    cache = SCHEMA_CACHE if cache is None else cache
+    cached = cache.get(source) if source else None
+    table = None
+    if cached:
+        try:
+            fresh = _first_block_types(handle, compression)
+            column_types = {
+                name: dtype for name, dtype in cached.items() if name in fresh and _reusable(dtype, fresh[name])
+            }
+            table = _read_csv(handle, compression, column_types)
+        except pa.ArrowInvalid:
+            table = None
+    if table is None:
+        table = _read_csv(handle, compression, None)
+    if source:
+        cache.put(source, table.schema)
+    return table
+
+
+def table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    # split_blocks keeps one block per column, so single-chunk numeric columns
+    # without nulls stay views over the Arrow buffers instead of being copied.
+    # All-null columns come back as object; pandas' own readers give float NaN.
+    for index, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.float64()))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _sniff(handle: BinaryIO) -> tuple[str | None, str | None]:
+    handle.seek(0)
+    compression = sniff_compression(handle.read(SNIFF_BYTES))
+    return compression, sniff_format(_open_stream(handle, compression).read(SNIFF_BYTES))
+
+
+@dataclass(frozen=True)
+class UploadInfo:
+    size_bytes: int
+    compression: str | None
+    format: str | None
+    # Exact when the container records it (gzip trailer, Parquet footer), else 0.
+    uncompressed_bytes: int = 0
+
+
+def describe_upload(file: UploadFile) -> UploadInfo:
+    """Cheap facts about an upload for admission decisions, without parsing it."""
+    handle = file.file
+    compression, fmt = _sniff(handle)
+    size = handle.seek(0, os.SEEK_END)
+    uncompressed = 0
+    if compression == "gzip" and size >= 4:
+        # ISIZE trailer: uncompressed length mod 2**32 of the last member.
+        handle.seek(size - 4)
+        uncompressed = int.from_bytes(handle.read(4), "little")
+        if uncompressed < size:
+            uncompressed = 0
+    elif compression is None and fmt == "parquet":
+        handle.seek(0)
+        try:
+            metadata = pq.ParquetFile(_Borrowed(handle)).metadata
+            uncompressed = sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+        except (pa.ArrowException, OSError):
+            uncompressed = 0
+    handle.seek(0)
+    return UploadInfo(size_bytes=size, compression=compression, format=fmt, uncompressed_bytes=uncompressed)
+
+
+def fingerprint_upload(file: UploadFile) -> str:
+    """SHA-256 of the raw upload bytes; the handle is rewound afterwards."""
+    handle = file.file
+    handle.seek(0)
+    digest = hashlib.sha256()
+    while chunk := handle.read(SPOOL_CHUNK_BYTES):
+        digest.update(chunk)
+    handle.seek(0)
+    return digest.hexdigest()
+
+
+def _reservoir_take(kept: pa.Table | None, keys: np.ndarray | None, batch: pa.Table, rng, max_rows: int):
+    """Keep the ``max_rows`` rows with the largest random keys seen so far."""
+    batch_keys = rng.random(batch.num_rows)
+    table = batch if kept is None else pa.concat_tables([kept, batch])
+    all_keys = batch_keys if keys is None else np.concatenate([keys, batch_keys])
+    if table.num_rows <= max_rows:
+        return table, all_keys
+    top = np.argpartition(all_keys, -max_rows)[-max_rows:]
+    top.sort()
+    return table.take(pa.array(top)), all_keys[top]
+
+
+def load_sample_from_upload(
+    file: UploadFile,
+    max_rows: int,
+    seed: int = 17,
+    spool_dir: str | None = None,
+) -> tuple[pd.DataFrame, int]:
+    """Uniform sample of at most ``max_rows`` rows, streamed batch by batch.
+
+    Memory stays bounded by the sample plus one batch, whatever the upload
+    size: compressed Parquet and Arrow uploads are decompressed to
+    ``spool_dir`` first, so they too are read from disk a piece at a time.
+    Returns the sample (in file order) and the total row count.
+    """
+    handle = file.file
+    compression, fmt = _sniff(handle)
+    rng = np.random.default_rng(seed)
+
+    if fmt in ARROW_FORMATS:
+        # Memory-mapped already; only the sampled rows are materialised.
+        path, temporary = _spool(handle, compression, spool_dir)
+        try:
+            table = read_arrow_table(path, fmt)
+        finally:
+            if temporary:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        population = table.num_rows
+        if population > max_rows:
+            picks = np.sort(rng.choice(population, size=max_rows, replace=False))
+            table = table.take(pa.array(picks))
+        return table_to_pandas(table), population
+
+    if fmt == "parquet":
+        if compression is None:
+            handle.seek(0)
+            batches = pq.ParquetFile(_Borrowed(handle)).iter_batches()
+        else:
+            # Parquet needs random access to its footer; spool the decompressed
+            # bytes instead of holding them all in memory.
+            batches = _spooled_parquet_batches(handle, compression, spool_dir)
+    elif fmt == "csv":
+        batches = pa_csv.open_csv(
+            _open_stream(handle, compression),
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+        )
+    else:
+        raise ValueError("Unsupported file type. Upload CSV, Parquet, Arrow IPC or Feather, optionally gzip or zstd compressed.")
+
+    kept: pa.Table | None = None
+    keys: np.ndarray | None = None
+    population = 0
+    for batch in batches:
+        population += batch.num_rows
+        kept, keys = _reservoir_take(kept, keys, pa.Table.from_batches([batch]), rng, max_rows)
+    if kept is None:
+        return pd.DataFrame(), 0
+    return table_to_pandas(kept), population
+
+
+def _spooled_parquet_batches(handle: BinaryIO, compression: str | None, spool_dir: str | None) -> Iterator[pa.RecordBatch]:
+    path, temporary = _spool(handle, compression, spool_dir, suffix=".parquet")
+    try:
+        with pq.ParquetFile(path) as parquet:
+            yield from parquet.iter_batches()
+    finally:
+        if temporary:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _spool(
+    handle: BinaryIO, compression: str | None, spool_dir: str | None, suffix: str = ".arrow"
+) -> tuple[str, bool]:
+    """Path of the upload on disk, decompressing/copying it there if needed.
+
+    Returns ``(path, temporary)``; uploads that are already plain files on disk
+    (e.g. queued jobs) are used in place.
+    """
+    path = getattr(handle, "name", None)
+    if compression is None and isinstance(path, str) and os.path.isfile(path):
+        return path, False
+
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=spool_dir or None)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            stream = _open_stream(handle, compression)
+            while chunk := stream.read(SPOOL_CHUNK_BYTES):
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, True
+
+
+def read_arrow_table(path: str, fmt: str) -> pa.Table:
+    """Read an Arrow IPC file/stream or Feather file through a memory map.
+
+    Uncompressed column buffers point straight into the mapped file, so pages
+    are only paged in as analytics touch them.
+    """
+    source = pa.memory_map(path, "r")
+    if fmt == "arrow_stream":
+        return pa.ipc.open_stream(source).read_all()
+    if fmt == "feather":
+        return feather.read_table(source, memory_map=True)
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_arrow_upload(handle: BinaryIO, fmt: str, compression: str | None = None, spool_dir: str | None = None) -> pd.DataFrame:
+    path, temporary = _spool(handle, compression, spool_dir)
+    try:
+        table = read_arrow_table(path, fmt)
+    finally:
+        if temporary:
+            # The mapping keeps the data reachable; the name is no longer needed.
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    return table_to_pandas(table)
+
+
+def load_dataframe_from_upload(
+    file: UploadFile,
+    source: str | None = None,
+    spool_dir: str | None = None,
+) -> pd.DataFrame:
+    """Parse an upload by content rather than extension.
+
+    Gzip and zstd payloads are decompressed as a stream; the container inside
+    (CSV, Parquet, Arrow IPC or Feather) is detected from its leading bytes.
+    Arrow uploads are spooled to ``spool_dir`` and memory-mapped.
+    """
+    handle = file.file
+    compression, fmt = _sniff(handle)
+
+    if fmt in ARROW_FORMATS:
+        return load_arrow_upload(handle, fmt, compression, spool_dir)
+    if fmt == "parquet":
+        if compression is None:
+            handle.seek(0)
+            return table_to_pandas(pq.read_table(_Borrowed(handle)))
+        buffer = _open_stream(handle, compression).read_buffer()
+        return table_to_pandas(pq.read_table(pa.BufferReader(buffer)))
+    if fmt == "csv":
+        key = source if source is not None else source_key(file.filename or "")
+        return table_to_pandas(read_csv_table(handle, compression, source=key))
+    raise ValueError("Unsupported file type. Upload CSV, Parquet, Arrow IPC or Feather, optionally gzip or zstd compressed.")
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator
+
+from insights_generator.config import JobConfig, load_config
+from insights_generator.responses import dumps
+
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "complete", "failed")
+PURGE_INTERVAL_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL DEFAULT '',
+    params TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    input_name TEXT NOT NULL,
+    result TEXT,
+    error TEXT NOT NULL DEFAULT '',
+    worker TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    id: str
+    status: str
+    stage: str
+    params: dict[str, Any]
+    input_path: str
+    input_name: str
+    result: dict[str, Any] | None
+    error: str
+    attempts: int
+    created_at: float
+    updated_at: float
+
+    def to_dict(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.result is not None:
+            payload["result"] = self.result
+        if self.error:
+            payload["error"] = self.error
+        return payload
+
+
+class JobQueue:
+    """SQLite-backed job queue; safe to share between threads and processes.
+
+    Running jobs hold a lease that workers keep extending. A job whose lease
+    expires (its worker died or the process restarted) becomes claimable again,
+    until it has been claimed ``max_attempts`` times; then it fails, so a job
+    that crashes its worker cannot take the pool down over and over. Only the
+    worker holding the lease can finish a job. Finished jobs are deleted by
+    ``purge`` once older than ``result_ttl_seconds`` (0 keeps them).
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        spool_dir: str | Path,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 3,
+        result_ttl_seconds: float = 86400.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.spool_dir = Path(spool_dir)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl_seconds = result_ttl_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:
+                # Databases created before attempts were counted.
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> JobRecord:
+        return JobRecord(
+            id=row["id"],
+            status=row["status"],
+            stage=row["stage"],
+            params=json.loads(row["params"]),
+            input_path=row["input_path"],
+            input_name=row["input_name"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def submit(self, stream: BinaryIO, filename: str, params: dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        job_dir = self.spool_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        input_path = job_dir / "input"
+        with input_path.open("wb") as handle:
+            shutil.copyfileobj(stream, handle, length=1024 * 1024)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, input_path, input_name, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(params), str(input_path), filename, now, now),
+            )
+        return job_id
+
+    def claim(self, worker: str) -> JobRecord | None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exhausted = [
+                row["id"]
+                for row in conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+                    (now, self.max_attempts),
+                )
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', stage = '', worker = '', error = ?, updated_at = ? WHERE id = ?",
+                [(f"Gave up after {self.max_attempts} attempts.", now, job_id) for job_id in exhausted],
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_expires_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = '', worker = ?, attempts = attempts + 1, "
+                    "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    (worker, now + self.lease_seconds, now, row["id"]),
+                )
+                claimed = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+        for job_id in exhausted:
+            shutil.rmtree(self.spool_dir / job_id, ignore_errors=True)
+        return self._record(claimed) if row is not None else None
+
+    def heartbeat(self, worker: str, job_ids: list[str]) -> None:
+        if not job_ids:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                [(now + self.lease_seconds, job_id, worker) for job_id in job_ids],
+            )
+
+    def update_stage(self, job_id: str, worker: str, stage: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (stage, now + self.lease_seconds, now, job_id, worker),
+            )
+
+    def _finish(self, job_id: str, worker: str, status: str, result: dict[str, Any] | None, error: str) -> bool:
+        encoded = dumps(result).decode("utf-8") if result is not None else None
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, stage = '', result = ?, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, encoded, error, time.time(), job_id, worker),
+            ).rowcount
+        if not updated:
+            # The lease expired and another worker owns (or finished) the job.
+            return False
+        shutil.rmtree(self.spool_dir / job_id, ignore_errors=True)
+        return True
+
+    def complete(self, job_id: str, worker: str, result: dict[str, Any]) -> bool:
+        """Record the result; ``False`` if ``worker`` no longer holds the lease."""
+        return self._finish(job_id, worker, "complete", result, "")
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        """Record the failure; ``False`` if ``worker`` no longer holds the lease."""
+        return self._finish(job_id, worker, "failed", None, error)
+
+    def purge(self) -> int:
+        """Delete finished jobs older than ``result_ttl_seconds``; returns how many."""
+        if self.result_ttl_seconds <= 0:
+            return 0
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN ('complete', 'failed') AND updated_at < ?",
+                (time.time() - self.result_ttl_seconds,),
+            ).rowcount
+
+    def get(self, job_id: str) -> JobRecord | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._record(row) if row else None
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+JobRunner = Callable[[JobRecord, Callable[[str], None]], dict[str, Any]]
+
+
+class JobWorkerPool:
+    """Local worker threads that claim jobs from the queue and run them."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        runner: JobRunner,
+        concurrency: int = 2,
+        poll_interval_seconds: float = 0.5,
+    ) -> None:
+        self.queue = queue
+        self.runner = runner
+        self.concurrency = concurrency
+        self.poll_interval_seconds = poll_interval_seconds
+        self.worker_id = f"pool-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._active: set[str] = set()
+        self._active_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    @property
+    def active_jobs(self) -> int:
+        with self._active_lock:
+            return len(self._active)
+
+    def _heartbeat(self) -> None:
+        interval = max(self.queue.lease_seconds / 3.0, 0.05)
+        next_purge = 0.0
+        while not self._stop.wait(interval):
+            with self._active_lock:
+                active = list(self._active)
+            try:
+                self.queue.heartbeat(self.worker_id, active)
+                if time.monotonic() >= next_purge:
+                    self.queue.purge()
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+            except Exception:
+                logger.exception("Job heartbeat for %s failed", self.worker_id)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.worker_id)
+            except Exception:
+                logger.exception("Job worker %s could not claim a job", self.worker_id)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval_seconds)
+                continue
+            with self._active_lock:
+                self._active.add(job.id)
+            error = ""
+            try:
+                result = self.runner(
+                    job, lambda stage, job_id=job.id: self.queue.update_stage(job_id, self.worker_id, stage)
+                )
+            except Exception as exc:
+                result, error = {}, str(exc) or type(exc).__name__
+            finally:
+                # Stop renewing the lease first, so a job whose outcome cannot be
+                # recorded expires and is claimed again.
+                with self._active_lock:
+                    self._active.discard(job.id)
+            try:
+                if error:
+                    self.queue.fail(job.id, self.worker_id, error)
+                else:
+                    self.queue.complete(job.id, self.worker_id, result)
+            except Exception:
+                logger.exception("Could not record the outcome of job %s; it will be retried", job.id)
+
+
+_QUEUE: JobQueue | None = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def _build_queue(config: JobConfig) -> JobQueue:
+    return JobQueue(
+        db_path=config.db_path,
+        spool_dir=config.spool_dir,
+        lease_seconds=config.lease_seconds,
+        max_attempts=config.max_attempts,
+        result_ttl_seconds=config.result_ttl_seconds,
+    )
+
+
+def get_job_queue() -> JobQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = _build_queue(load_config().jobs)
+        return _QUEUE
+
+
+def set_job_queue(queue: JobQueue | None) -> None:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        _QUEUE = queue
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+INTENT_MARKER = "intent parser"
+VAGUE_WORD_LIMIT = 3
+
+
+def _last_user_text(payload: dict[str, Any]) -> str:
+    messages = payload.get("messages") or []
+    content = messages[-1].get("content", "") if messages else ""
+    if isinstance(content, list):
+        content = " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _intent_reply(prompt: str) -> str:
+    request = ""
+    for line in prompt.splitlines():
+        if line.startswith("User request:"):
+            request = line.removeprefix("User request:").strip().strip("'\"")
+    vague = len(request.split()) <= VAGUE_WORD_LIMIT
+    return json.dumps(
+        {
+            "requested_focus": ["summary"],
+            "visualization_preferences": [],
+            "needs_clarification": vague,
+            "clarification_question": "Which metric should I focus on first?" if vague else "",
+        }
+    )
+
+
+def _insight_reply(prompt: str) -> str:
+    return (
+        "Revenue is stable with a handful of spikes worth reviewing. "
+        f"(fake-llm, prompt {len(prompt)} chars)"
+    )
+
+
+class FakeLLMServer:
+    """Local OpenAI-compatible ``/v1/chat/completions`` stub for offline load tests.
+
+    Each call sleeps ``latency_ms`` (+/- uniform ``jitter_ms``) and fails with
+    HTTP 500 at ``error_rate``. Intent-parser prompts get valid intent JSON
+    (vague requests ask for clarification); everything else gets insight text.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        jitter_ms: float = 50.0,
+        error_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", "0"))
+                raw = self.rfile.read(length)
+                status, body = server._respond(raw)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}/v1"
+        self._thread: threading.Thread | None = None
+
+    def _respond(self, raw: bytes) -> tuple[int, bytes]:
+        with self._lock:
+            self.calls += 1
+            delay = max(self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms), 0.0) / 1000.0
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        if fail:
+            return 500, json.dumps({"error": {"message": "injected failure", "type": "server_error"}}).encode("utf-8")
+
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            payload = {}
+        prompt = _last_user_text(payload)
+        content = _intent_reply(prompt) if INTENT_MARKER in prompt else _insight_reply(prompt)
+        body = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake-model"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": 0},
+        }
+        return 200, json.dumps(body).encode("utf-8")
+
+    def start(self) -> FakeLLMServer:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> FakeLLMServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors}
@@ -0,0 +1,359 @@
+"""Offline load test: fake LLM + uvicorn app + concurrent uploads.
+
+    python -m insights_generator.loadtest.runner --concurrency 16 --requests 200 --rows 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from insights_generator.loadtest.fake_llm import FakeLLMServer
+from insights_generator.synthetic import make_sales_frame
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    psutil = None
+
+
+SPECIFIC_PROMPT = "Summarize revenue, cost and discount by segment and flag anomalies"
+VAGUE_PROMPT = "analyze"
+CLARIFICATION = "Focus on the revenue trend and anomalies"
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass(frozen=True)
+class LoadTestConfig:
+    concurrency: int = 8
+    requests: int = 64
+    rows: int = 20_000
+    datasets: int = 4
+    vague_ratio: float = 0.25
+    mode: str = "full"
+    llm_latency_ms: float = 200.0
+    llm_jitter_ms: float = 50.0
+    llm_error_rate: float = 0.0
+    rss_interval_seconds: float = 0.5
+    request_timeout_seconds: float = 300.0
+
+
+@dataclass
+class RequestResult:
+    endpoint: str
+    status: int
+    latency_ms: float
+    started_at: float
+    error: str = ""
+
+
+@dataclass
+class RssSampler:
+    pid: int
+    interval_seconds: float = 0.5
+    samples: list[tuple[float, int]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._started = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = read_rss_bytes(self.pid)
+            if rss is not None:
+                self.samples.append((round(time.monotonic() - self._started, 3), rss))
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> RssSampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def read_rss_bytes(pid: int) -> int | None:
+    """Resident set size of ``pid`` from /proc, or psutil where /proc is missing."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if psutil is not None:
+        try:
+            return int(psutil.Process(pid).memory_info().rss)
+        except Exception:
+            return None
+    return None
+
+
+def percentiles(values: list[float], points: tuple[int, ...] = PERCENTILES) -> dict[str, float]:
+    """Nearest-rank percentiles."""
+    if not values:
+        return {f"p{point}": 0.0 for point in points}
+    ordered = sorted(values)
+    result: dict[str, float] = {}
+    for point in points:
+        rank = max(math.ceil(point / 100.0 * len(ordered)), 1)
+        result[f"p{point}"] = round(ordered[rank - 1], 2)
+    return result
+
+
+def summarize(results: list[RequestResult], duration_seconds: float, rss_samples: list[tuple[float, int]]) -> dict[str, Any]:
+    endpoints: dict[str, Any] = {}
+    for endpoint in sorted({result.endpoint for result in results}):
+        subset = [result for result in results if result.endpoint == endpoint]
+        latencies = [result.latency_ms for result in subset]
+        statuses: dict[str, int] = {}
+        for result in subset:
+            statuses[str(result.status)] = statuses.get(str(result.status), 0) + 1
+        endpoints[endpoint] = {
+            "requests": len(subset),
+            "ok": sum(1 for result in subset if 200 <= result.status < 300),
+            "statuses": statuses,
+            "throughput_rps": round(len(subset) / duration_seconds, 3) if duration_seconds else 0.0,
+            "latency_ms": {
+                **percentiles(latencies),
+                "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                "max": round(max(latencies), 2) if latencies else 0.0,
+            },
+        }
+    rss_values = [rss for _, rss in rss_samples]
+    return {
+        "duration_seconds": round(duration_seconds, 3),
+        "requests": len(results),
+        "throughput_rps": round(len(results) / duration_seconds, 3) if duration_seconds else 0.0,
+        "endpoints": endpoints,
+        "rss": {
+            "peak_bytes": max(rss_values) if rss_values else None,
+            "final_bytes": rss_values[-1] if rss_values else None,
+            "samples": [{"t": t, "bytes": rss} for t, rss in rss_samples],
+        },
+    }
+
+
+def build_payloads(rows: int, count: int) -> list[bytes]:
+    return [make_sales_frame(rows, seed=seed).to_csv(index=False).encode("utf-8") for seed in range(count)]
+
+
+def _one_session(client: httpx.Client, index: int, payload: bytes, config: LoadTestConfig) -> list[RequestResult]:
+    # Spreads vague prompts evenly so exactly ``vague_ratio`` of sessions need /clarify.
+    vague = int((index + 1) * config.vague_ratio) > int(index * config.vague_ratio)
+    results: list[RequestResult] = []
+    started = time.perf_counter()
+    try:
+        response = client.post(
+            "/analyze",
+            files={"file": (f"sales_{index}.csv", payload, "text/csv")},
+            data={"user_prompt": VAGUE_PROMPT if vague else SPECIFIC_PROMPT, "mode": config.mode, "fields": "insights"},
+        )
+    except httpx.HTTPError as exc:
+        return [RequestResult("/analyze", 0, (time.perf_counter() - started) * 1000, started, str(exc))]
+    results.append(RequestResult("/analyze", response.status_code, (time.perf_counter() - started) * 1000, started))
+
+    if response.status_code == 200 and response.json().get("needs_clarification"):
+        started = time.perf_counter()
+        try:
+            clarified = client.post(
+                "/clarify",
+                json={
+                    "session_id": response.json()["session_id"],
+                    "clarification": CLARIFICATION,
+                    "fields": "insights",
+                },
+            )
+            results.append(RequestResult("/clarify", clarified.status_code, (time.perf_counter() - started) * 1000, started))
+        except httpx.HTTPError as exc:
+            results.append(RequestResult("/clarify", 0, (time.perf_counter() - started) * 1000, started, str(exc)))
+    return results
+
+
+def run_load(base_url: str, config: LoadTestConfig, payloads: list[bytes]) -> tuple[list[RequestResult], float]:
+    """Drive ``config.requests`` upload sessions with ``config.concurrency`` workers."""
+    results: list[RequestResult] = []
+    results_lock = threading.Lock()
+    counter = iter(range(config.requests))
+    counter_lock = threading.Lock()
+
+    def worker() -> None:
+        with httpx.Client(base_url=base_url, timeout=config.request_timeout_seconds) as client:
+            while True:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                session = _one_session(client, index, payloads[index % len(payloads)], config)
+                with results_lock:
+                    results.extend(session)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"load-{i}") for i in range(config.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_app_server(env_overrides: dict[str, str], port: int) -> subprocess.Popen:
+    """Run the API in its own uvicorn process so its RSS can be observed."""
+    package_root = str(Path(__file__).resolve().parents[2])
+    env = {**os.environ, **env_overrides}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH", "")]))
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "insights_generator.api:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+def wait_until_healthy(base_url: str, process: subprocess.Popen, timeout_seconds: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API process exited with code {process.returncode} during startup.")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not become healthy in time.")
+
+
+def run_load_test(config: LoadTestConfig) -> dict[str, Any]:
+    payloads = build_payloads(config.rows, config.datasets)
+    with tempfile.TemporaryDirectory(prefix="insights-loadtest-") as workdir, FakeLLMServer(
+        latency_ms=config.llm_latency_ms,
+        jitter_ms=config.llm_jitter_ms,
+        error_rate=config.llm_error_rate,
+    ) as fake_llm:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_app_server(
+            {
+                "MODEL_PROVIDER": "openai",
+                "OPENAI_API_KEY": "loadtest",
+                "MODEL_NAME": os.getenv("MODEL_NAME") or "fake-model",
+                "OPENAI_BASE_URL": fake_llm.base_url,
+                "ARTIFACTS_DIR": os.path.join(workdir, "artifacts"),
+                "JOB_DB_PATH": os.path.join(workdir, "jobs", "jobs.sqlite3"),
+                "JOB_SPOOL_DIR": os.path.join(workdir, "jobs", "spool"),
+                "UPLOAD_SPOOL_DIR": os.path.join(workdir, "uploads"),
+            },
+            port,
+        )
+        try:
+            wait_until_healthy(base_url, process)
+            sampler = RssSampler(process.pid, config.rss_interval_seconds).start()
+            try:
+                results, duration = run_load(base_url, config, payloads)
+            finally:
+                sampler.stop()
+            server_metrics = httpx.get(f"{base_url}/metrics", timeout=10.0).json()
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = summarize(results, duration, sampler.samples)
+    report["config"] = asdict(config)
+    report["fake_llm"] = fake_llm.stats()
+    report["server_metrics"] = server_metrics
+    return report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"{report['requests']} requests in {report['duration_seconds']}s "
+        f"({report['throughput_rps']} req/s, concurrency {report['config']['concurrency']})",
+    ]
+    for endpoint, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        lines.append(
+            f"{endpoint:<10} n={stats['requests']:<5} ok={stats['ok']:<5} {stats['throughput_rps']:>7} req/s  "
+            f"p50={latency['p50']}ms p90={latency['p90']}ms p99={latency['p99']}ms max={latency['max']}ms  "
+            f"statuses={stats['statuses']}"
+        )
+    peak = report["rss"]["peak_bytes"]
+    if peak is not None:
+        lines.append(
+            f"server RSS peak={peak / 2**20:.1f} MiB final={report['rss']['final_bytes'] / 2**20:.1f} MiB "
+            f"({len(report['rss']['samples'])} samples)"
+        )
+    lines.append(f"fake LLM calls={report['fake_llm']['calls']} injected errors={report['fake_llm']['errors']}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--datasets", type=int, default=defaults.datasets)
+    parser.add_argument("--vague-ratio", type=float, default=defaults.vague_ratio, help="share of prompts that need /clarify")
+    parser.add_argument("--mode", choices=("full", "quick"), default=defaults.mode)
+    parser.add_argument("--llm-latency-ms", type=float, default=defaults.llm_latency_ms)
+    parser.add_argument("--llm-jitter-ms", type=float, default=defaults.llm_jitter_ms)
+    parser.add_argument("--llm-error-rate", type=float, default=defaults.llm_error_rate)
+    parser.add_argument("--rss-interval", type=float, default=defaults.rss_interval_seconds)
+    parser.add_argument("--json-out", default="", help="also write the full report (incl. RSS samples) here")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        LoadTestConfig(
+            concurrency=args.concurrency,
+            requests=args.requests,
+            rows=args.rows,
+            datasets=args.datasets,
+            vague_ratio=args.vague_ratio,
+            mode=args.mode,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_jitter_ms=args.llm_jitter_ms,
+            llm_error_rate=args.llm_error_rate,
+            rss_interval_seconds=args.rss_interval,
+        )
+    )
+    print(format_report(report))
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.analytics.correlation import correlation_matrix, heatmap_columns
+from insights_generator.analytics.thresholds import IQR_MULTIPLIER
+from insights_generator.config import MCPConfig, load_config
+from insights_generator.mcp_pool import MCPCallTimeout, MCPSessionPool, get_mcp_pool
+
+
+HISTOGRAM_BINS = 30
+MAX_TREND_POINTS = 200
+MAX_ANOMALY_POINTS = 200
+
+
+def _finite(values: pd.Series) -> np.ndarray:
+    array = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return array[np.isfinite(array)]
+
+
+def _rounded(values: np.ndarray) -> list[float]:
+    return [round(float(value), 6) for value in values]
+
+
+def _histogram_spec(df: pd.DataFrame, column: str) -> dict[str, Any]:
+    counts, edges = np.histogram(_finite(df[column]), bins=HISTOGRAM_BINS)
+    return {"type": "histogram", "column": column, "bin_edges": _rounded(edges), "counts": counts.tolist()}
+
+
+def _trend_spec(df: pd.DataFrame, column: str, change_points: list[dict[str, Any]]) -> dict[str, Any]:
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    bucket = max(int(np.ceil(len(values) / MAX_TREND_POINTS)), 1)
+    usable = len(values) - len(values) % bucket
+    # Bucket means keep the shape of the series at a bounded payload size.
+    with np.errstate(invalid="ignore"):
+        means = np.nanmean(values[:usable].reshape(-1, bucket), axis=1) if usable else np.array([])
+    if usable < len(values):
+        means = np.append(means, np.nanmean(values[usable:]))
+    x = np.arange(len(means)) * bucket
+    return {
+        "type": "line",
+        "column": column,
+        "bucket_size": bucket,
+        "x": x.tolist(),
+        "y": [None if np.isnan(value) else round(float(value), 6) for value in means],
+        "change_points": [{"x": point["row"], "shift": point["shift"]} for point in change_points],
+    }
+
+
+def _box_spec(df: pd.DataFrame, columns: list[str]) -> dict[str, Any]:
+    stats = []
+    for column in columns:
+        values = _finite(df[column])
+        if values.size == 0:
+            continue
+        low, q1, median, q3, high = np.percentile(values, [0, 25, 50, 75, 100])
+        stats.append(
+            {
+                "column": column,
+                "min": round(float(low), 6),
+                "q1": round(float(q1), 6),
+                "median": round(float(median), 6),
+                "q3": round(float(q3), 6),
+                "max": round(float(high), 6),
+            }
+        )
+    return {"type": "box", "stats": stats}
+
+
+def _anomaly_spec(df: pd.DataFrame, column: str) -> dict[str, Any]:
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    finite = values[np.isfinite(values)]
+    q1, q3 = np.percentile(finite, [25, 75]) if finite.size else (0.0, 0.0)
+    lower, upper = q1 - IQR_MULTIPLIER * (q3 - q1), q3 + IQR_MULTIPLIER * (q3 - q1)
+    positions = np.flatnonzero((values < lower) | (values > upper))
+    return {
+        "type": "scatter",
+        "column": column,
+        "bounds": {"lower": round(float(lower), 6), "upper": round(float(upper), 6)},
+        "anomaly_count": int(positions.size),
+        "points": [[int(pos), round(float(values[pos]), 6)] for pos in positions[:MAX_ANOMALY_POINTS]],
+    }
+
+
+def _heatmap_spec(df: pd.DataFrame, top_pairs: list[dict[str, Any]]) -> dict[str, Any]:
+    columns = heatmap_columns(top_pairs)
+    matrix = correlation_matrix(df, columns)
+    return {
+        "type": "heatmap",
+        "columns": columns,
+        "matrix": [[None if np.isnan(value) else round(float(value), 4) for value in row] for row in matrix],
+    }
+
+
+def build_chart_specs(
+    df: pd.DataFrame,
+    analytics: dict[str, Any],
+    plan: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Compact, pre-aggregated chart specs; payload size is independent of row count."""
+    numeric_cols = plan.get("columns") or analytics.get("numeric_columns", [])
+    primary = plan.get("primary_column") or (numeric_cols[0] if numeric_cols else None)
+    if primary is None:
+        return []
+    top_pairs = analytics.get("correlations", {}).get("top_pairs", [])
+    change_points = analytics.get("rolling", {}).get("by_column", {}).get(primary, {}).get("change_points", [])
+    builders: dict[str, Callable[[], dict[str, Any]]] = {
+        "distribution": lambda: _histogram_spec(df, primary),
+        "trend": lambda: _trend_spec(df, primary, change_points),
+        "variance": lambda: _box_spec(df, numeric_cols),
+        "anomaly": lambda: _anomaly_spec(df, primary),
+    }
+    if top_pairs:
+        builders["correlation"] = lambda: _heatmap_spec(df, top_pairs)
+
+    specs = []
+    for name in plan.get("charts", []):
+        if name in builders:
+            specs.append({"chart": name, "rows": int(len(df)), **builders[name]()})
+    return specs
+
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _mcp_executor(mcp: MCPConfig) -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(mcp.pool_size * max(len(mcp.servers), 1), 1),
+                thread_name_prefix="mcp-chart",
+            )
+        return _EXECUTOR
+
+
+def _call_chart_tool(
+    pool: MCPSessionPool,
+    server: str,
+    tool_name: str,
+    spec: dict[str, Any],
+    timeout_seconds: float,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    meta: dict[str, Any] = {
+        "server": server,
+        "tool": tool_name,
+        "spec_bytes": len(json.dumps(spec, separators=(",", ":"))),
+    }
+    result: Any = None
+    try:
+        result = pool.call_tool(
+            server=server,
+            tool_name=tool_name,
+            arguments={"spec": spec},
+            timeout_seconds=timeout_seconds,
+        )
+        meta["status"] = "ok"
+    except MCPCallTimeout as exc:
+        meta.update(status="timeout", error=str(exc))
+    except Exception as exc:
+        meta.update(status="error", error=str(exc))
+    meta["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return {"chart": spec["chart"], "result": result, "meta": meta}
+
+
+def execute_chart_specs(
+    specs: list[dict[str, Any]],
+    mcp: MCPConfig | None = None,
+    pool: MCPSessionPool | None = None,
+) -> list[dict[str, Any]]:
+    """Send specs to the configured servers concurrently; results keep spec order."""
+    mcp = mcp or load_config().mcp
+    pool = pool or get_mcp_pool()
+    if not mcp.servers:
+        return []
+    executor = _mcp_executor(mcp)
+    futures = [
+        executor.submit(
+            _call_chart_tool,
+            pool,
+            mcp.servers[index % len(mcp.servers)],
+            mcp.chart_tool,
+            spec,
+            mcp.call_timeout_seconds,
+        )
+        for index, spec in enumerate(specs)
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import contextlib
+import http.client
+import itertools
+import json
+import queue
+import socket
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+from insights_generator.config import MCPConfig, load_config
+
+
+PROTOCOL_VERSION = "2025-06-18"
+CLIENT_INFO = {"name": "insights-generator", "version": "0.2.0"}
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+class MCPCallTimeout(TimeoutError):
+    pass
+
+
+class MCPToolError(ValueError):
+    """A JSON-RPC error or a tool result flagged ``isError``; the connection stays usable."""
+
+
+class _SessionExpired(Exception):
+    """The server answered 404 to a request carrying our session id."""
+
+
+def _sse_messages(raw: bytes) -> list[Any]:
+    messages = []
+    for event in raw.decode("utf-8").replace("\r\n", "\n").split("\n\n"):
+        data = [line[5:].removeprefix(" ") for line in event.split("\n") if line.startswith("data:")]
+        if data:
+            messages.append(json.loads("\n".join(data)))
+    return messages
+
+
+class _Connection:
+    """One keep-alive HTTP connection to an MCP server's streamable HTTP endpoint."""
+
+    def __init__(self, server: str, timeout_seconds: float) -> None:
+        parts = urlsplit(server)
+        connection_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += f"?{parts.query}"
+        self.http = connection_cls(parts.hostname or "localhost", parts.port, timeout=timeout_seconds)
+        self.calls = 0
+
+    def request(
+        self,
+        method: str,
+        message: dict[str, Any] | None,
+        headers: dict[str, str],
+        timeout_seconds: float,
+    ) -> tuple[http.client.HTTPResponse, list[Any]]:
+        """Send one JSON-RPC message; returns the response and the messages it carried.
+
+        The server may answer with a JSON body or an SSE stream; both are read
+        to the end so the connection can be reused.
+        """
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8") if message is not None else None
+        self.http.timeout = timeout_seconds
+        if self.http.sock is not None:
+            self.http.sock.settimeout(timeout_seconds)
+        self.http.request(
+            method,
+            self.path,
+            body=body,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json, text/event-stream",
+                "Connection": "keep-alive",
+                **headers,
+            },
+        )
+        response = self.http.getresponse()
+        raw = response.read()
+        self.calls += 1
+        if response.status == 404 and SESSION_HEADER in headers:
+            raise _SessionExpired()
+        if response.status >= 400:
+            raise ValueError(f"MCP server returned HTTP {response.status}: {raw[:200].decode('utf-8', 'replace')}")
+        if not raw:
+            return response, []
+        if response.getheader("Content-Type", "").startswith("text/event-stream"):
+            return response, _sse_messages(raw)
+        decoded = json.loads(raw)
+        return response, decoded if isinstance(decoded, list) else [decoded]
+
+    def close(self) -> None:
+        self.http.close()
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.ready = False
+        self.id: str | None = None
+        self.protocol_version = PROTOCOL_VERSION
+
+    def headers(self) -> dict[str, str]:
+        headers = {"MCP-Protocol-Version": self.protocol_version}
+        if self.id:
+            headers[SESSION_HEADER] = self.id
+        return headers
+
+
+def _tool_result(result: dict[str, Any]) -> Any:
+    """The value of a ``tools/call`` result: structured content, else its text."""
+    texts = [item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"]
+    if result.get("isError"):
+        raise MCPToolError(f"MCP tool error: {' '.join(texts) or 'unknown error'}")
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    if len(texts) == 1:
+        try:
+            return json.loads(texts[0])
+        except ValueError:
+            return texts[0]
+    return result.get("content")
+
+
+class MCPSessionPool:
+    """Long-lived, pooled connections to MCP servers over streamable HTTP.
+
+    Each configured server URL is an MCP endpoint. The first call to a server
+    runs the ``initialize`` handshake, keeps the ``Mcp-Session-Id`` it returns
+    and sends ``notifications/initialized``; tool calls are JSON-RPC
+    ``tools/call`` requests on that session, answered as JSON or as an SSE
+    stream. A session the server has expired (HTTP 404) is re-initialized once.
+    Up to ``max_connections_per_server`` connections stay open per server so
+    calls skip TCP/TLS setup; one that times out or errors is dropped rather
+    than reused.
+    """
+
+    def __init__(self, max_connections_per_server: int = 4, timeout_seconds: float = 10.0) -> None:
+        self.max_connections_per_server = max(max_connections_per_server, 1)
+        self.timeout_seconds = timeout_seconds
+        self._idle: dict[str, queue.LifoQueue[_Connection]] = {}
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._sessions: dict[str, _Session] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "opened": 0, "reused": 0, "sessions": 0, "failures": 0, "timeouts": 0}
+
+    def _server_state(self, server: str) -> tuple[queue.LifoQueue[_Connection], threading.BoundedSemaphore, _Session]:
+        with self._lock:
+            if server not in self._idle:
+                self._idle[server] = queue.LifoQueue()
+                self._slots[server] = threading.BoundedSemaphore(self.max_connections_per_server)
+                self._sessions[server] = _Session()
+            return self._idle[server], self._slots[server], self._sessions[server]
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+
+    def _checkout(self, server: str) -> _Connection:
+        idle, _, _ = self._server_state(server)
+        try:
+            connection = idle.get_nowait()
+            self._count("reused")
+            return connection
+        except queue.Empty:
+            self._count("opened")
+            return _Connection(server, self.timeout_seconds)
+
+    def _rpc(
+        self,
+        connection: _Connection,
+        method: str,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        deadline: float,
+    ) -> tuple[http.client.HTTPResponse, dict[str, Any]]:
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        response, messages = connection.request("POST", message, headers, max(deadline - time.monotonic(), 0.001))
+        for reply in messages:
+            if isinstance(reply, dict) and reply.get("id") == request_id:
+                if "error" in reply:
+                    raise MCPToolError(f"MCP error {reply['error'].get('code')}: {reply['error'].get('message')}")
+                return response, reply.get("result") or {}
+        raise ValueError(f"MCP server sent no response to {method!r}.")
+
+    def _initialize(self, connection: _Connection, session: _Session, deadline: float) -> None:
+        with session.lock:
+            if session.ready:
+                return
+            params = {"protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO}
+            response, result = self._rpc(connection, "initialize", params, {}, deadline)
+            session.id = response.getheader(SESSION_HEADER)
+            session.protocol_version = result.get("protocolVersion", PROTOCOL_VERSION)
+            connection.request(
+                "POST",
+                {"jsonrpc": "2.0", "method": "notifications/initialized"},
+                session.headers(),
+                max(deadline - time.monotonic(), 0.001),
+            )
+            session.ready = True
+            self._count("sessions")
+
+    def _call(self, connection: _Connection, session: _Session, params: dict[str, Any], deadline: float) -> Any:
+        self._initialize(connection, session, deadline)
+        stale_id = session.id
+        try:
+            return self._rpc(connection, "tools/call", params, session.headers(), deadline)[1]
+        except _SessionExpired:
+            with session.lock:
+                if session.id == stale_id:
+                    session.ready = False
+            self._initialize(connection, session, deadline)
+            return self._rpc(connection, "tools/call", params, session.headers(), deadline)[1]
+
+    def call_tool(
+        self,
+        *,
+        server: str,
+        tool_name: str,
+        arguments: dict[str, Any],
+        timeout_seconds: float | None = None,
+    ) -> Any:
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        idle, slots, session = self._server_state(server)
+        deadline = time.monotonic() + timeout
+        if not slots.acquire(timeout=timeout):
+            self._count("timeouts")
+            raise MCPCallTimeout(f"No MCP connection to {server} became free within {timeout:g}s.")
+        try:
+            self._count("calls")
+            params = {"name": tool_name, "arguments": arguments}
+            connection = self._checkout(server)
+            try:
+                try:
+                    result = self._call(connection, session, params, deadline)
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    if connection.calls == 0:
+                        raise
+                    # The server closed an idle keep-alive connection; retry once on a fresh one.
+                    connection.close()
+                    self._count("opened")
+                    connection = _Connection(server, timeout)
+                    result = self._call(connection, session, params, deadline)
+            except MCPToolError:
+                idle.put(connection)
+                self._count("failures")
+                raise
+            except (socket.timeout, TimeoutError) as exc:
+                connection.close()
+                self._count("timeouts")
+                raise MCPCallTimeout(f"MCP tool {tool_name!r} on {server} exceeded {timeout:g}s.") from exc
+            except Exception:
+                connection.close()
+                self._count("failures")
+                raise
+            idle.put(connection)
+        finally:
+            slots.release()
+
+        try:
+            return _tool_result(result)
+        except MCPToolError:
+            self._count("failures")
+            raise
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "idle_connections": {server: idle.qsize() for server, idle in self._idle.items()},
+            }
+
+    def close(self) -> None:
+        """Close idle connections and end each server session (HTTP DELETE)."""
+        with self._lock:
+            pools = list(self._idle.items())
+            sessions = dict(self._sessions)
+        for server, idle in pools:
+            connections = []
+            while True:
+                try:
+                    connections.append(idle.get_nowait())
+                except queue.Empty:
+                    break
+            session = sessions[server]
+            if session.id and connections:
+                with contextlib.suppress(Exception):
+                    connections[0].request("DELETE", None, session.headers(), 1.0)
+            for connection in connections:
+                connection.close()
+            session.ready, session.id = False, None
+
+
+_POOL: MCPSessionPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool_from_config(mcp: MCPConfig) -> MCPSessionPool:
+    return MCPSessionPool(
+        max_connections_per_server=mcp.pool_size,
+        timeout_seconds=mcp.call_timeout_seconds,
+    )
+
+
+def get_mcp_pool() -> MCPSessionPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = _pool_from_config(load_config().mcp)
+        return _POOL
+
+
+def set_mcp_pool(pool: MCPSessionPool | None) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        previous, _POOL = _POOL, pool
+    if previous is not None and previous is not pool:
+        previous.close()
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Protocol
 
 from insights_generator.config import ModelConfig
 
@@ -11,6 +20,37 @@ class ChatClient(Protocol):
         ...
 
 
+async def ainvoke_text(client: ChatClient, prompt: str) -> str:
+    """Async entry point; uses the client's native coroutine when it has one."""
+    native = getattr(client, "ainvoke_text", None)
+    if native is not None:
+        return await native(prompt)
+    return await asyncio.to_thread(client.invoke_text, prompt)
+
+
+_HTTP_CLIENTS: dict[tuple[int, float], Any] = {}
+_HTTP_CLIENTS_LOCK = threading.Lock()
+
+
+def _shared_http_client(max_connections: int, timeout_seconds: float):
+    """Return a process-wide pooled httpx client for the given limits."""
+    import httpx
+
+    key = (max_connections, timeout_seconds)
+    with _HTTP_CLIENTS_LOCK:
+        client = _HTTP_CLIENTS.get(key)
+        if client is None:
+            client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=httpx.Timeout(timeout_seconds, connect=min(timeout_seconds, 5.0)),
+            )
+            _HTTP_CLIENTS[key] = client
+        return client
+
+
 @dataclass
 class HeuristicClient:
     def invoke_text(self, prompt: str) -> str:
@@ -23,6 +63,8 @@ class OpenAIClient:
     temperature: float
     api_key: str
     base_url: str
+    timeout_seconds: float = 20.0
+    max_connections: int = 8
 
     def __post_init__(self) -> None:
         from langchain_openai import ChatOpenAI
@@ -31,6 +73,9 @@ class OpenAIClient:
             "model": self.model_name,
             "temperature": self.temperature,
             "api_key": self.api_key,
+            "timeout": self.timeout_seconds,
+            "max_retries": 0,
+            "http_client": _shared_http_client(self.max_connections, self.timeout_seconds),
         }
         if self.base_url:
             kwargs["base_url"] = self.base_url
@@ -43,23 +88,588 @@ class OpenAIClient:
 
 @dataclass
 class AnthropicClient:
+    """Messages API client on the shared connection pool.
+
+    Uses the ``anthropic`` SDK directly: ``ChatAnthropic`` builds its own
+    transport and cannot be handed a pooled ``httpx`` client.
+    """
+
     model_name: str
     temperature: float
     api_key: str
+    timeout_seconds: float = 20.0
+    max_connections: int = 8
+    max_tokens: int = 1024
 
     def __post_init__(self) -> None:
-        from langchain_anthropic import ChatAnthropic
+        import anthropic
+
+        self._client = anthropic.Anthropic(
+            api_key=self.api_key,
+            timeout=self.timeout_seconds,
+            max_retries=0,
+            http_client=_shared_http_client(self.max_connections, self.timeout_seconds),
+        )
 
-        self._llm = ChatAnthropic(
+    def invoke_text(self, prompt: str) -> str:
+        response = self._client.messages.create(
             model=self.model_name,
+            max_tokens=self.max_tokens,
             temperature=self.temperature,
-            api_key=self.api_key,
+            messages=[{"role": "user", "content": prompt}],
         )
+        return "".join(block.text for block in response.content if block.type == "text").strip()
+
+
+@dataclass
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe after the reset timeout."""
+
+    failure_threshold: int = 5
+    reset_timeout_seconds: float = 30.0
+    _failures: int = field(default=0, init=False)
+    _opened_at: float | None = field(default=None, init=False)
+    _probing: bool = field(default=False, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def rejects(self) -> bool:
+        """Whether ``allow`` would refuse a call right now, without taking the probe."""
+        with self._lock:
+            state = self._state_locked()
+            return state == "open" or (state == "half_open" and self._probing)
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe that never reached the provider."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def _settled() -> None:
+    pass
+
+
+@dataclass
+class ResilientClient:
+    """Bounds provider latency with a per-call deadline and a circuit breaker.
+
+    Any failure path returns an empty string, which the intent and insight agents
+    already treat as "use the heuristic answer". Calls run on ``max_concurrency``
+    threads but are not limited here: ``ScheduledClient`` owns the concurrency
+    limit and, through ``invoke_text_then``, holds a slot until the provider
+    call really finishes, including calls abandoned at their deadline.
+    """
+
+    inner: ChatClient
+    deadline_seconds: float = 20.0
+    max_concurrency: int = 8
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+
+    def __post_init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="llm-call",
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "deadline_exceeded": 0,
+            "short_circuited": 0,
+        }
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def short_circuits(self) -> bool:
+        """Refuse a call up front while the breaker is open, counting it as short-circuited.
+
+        Lets ``ScheduledClient`` turn such calls away before they spend a
+        rate-limit token or a concurrency slot.
+        """
+        if not self.breaker.rejects():
+            return False
+        self._count("calls")
+        self._count("short_circuited")
+        return True
 
     def invoke_text(self, prompt: str) -> str:
-        response = self._llm.invoke(prompt)
-        return str(getattr(response, "content", "")).strip()
+        return self.invoke_text_then(prompt, _settled)
+
+    def invoke_text_then(self, prompt: str, on_settled: Callable[[], None]) -> str:
+        """``invoke_text`` that calls ``on_settled`` once the provider call has ended.
+
+        That is after the call returns, or later for a call abandoned at its
+        deadline; straight away when the call never reaches the provider.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            on_settled()
+            return ""
+
+        try:
+            future = self._executor.submit(self.inner.invoke_text, prompt)
+        except BaseException:
+            # The call never ran, so it says nothing about the provider; let
+            # the next call probe instead of leaving the breaker half-open forever.
+            self.breaker.release_probe()
+            on_settled()
+            raise
+        future.add_done_callback(lambda _: on_settled())
+
+        try:
+            text = future.result(timeout=self.deadline_seconds)
+        except FutureTimeoutError:
+            self._count("deadline_exceeded")
+            self.breaker.record_failure()
+            return ""
+        except Exception:
+            self._count("failed")
+            self.breaker.record_failure()
+            return ""
+
+        self._count("succeeded")
+        self.breaker.record_success()
+        return text
+
+    async def ainvoke_text(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.invoke_text, prompt)
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            stats: dict[str, Any] = dict(self._stats)
+        stats["breaker_state"] = self.breaker.state
+        stats["deadline_seconds"] = self.deadline_seconds
+        return stats
+
+
+@dataclass
+class CoalescingClient:
+    """Single-flight layer: concurrent identical calls share one provider request.
+
+    Calls are keyed on (model, temperature, prompt). The first caller for a key
+    becomes the leader and performs the call; callers arriving while it is in
+    flight, on either the sync or the async path, wait for the leader's result.
+    """
+
+    inner: ChatClient
+    model_name: str = ""
+    temperature: float = 0.0
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[str, float, str], Future] = {}
+        self._stats = {"requests": 0, "provider_calls": 0, "coalesced": 0}
+
+    def _key(self, prompt: str) -> tuple[str, float, str]:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return (self.model_name, self.temperature, digest)
+
+    def _join(self, prompt: str) -> tuple[tuple[str, float, str], Future, bool]:
+        key = self._key(prompt)
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return key, future, False
+            future = Future()
+            self._inflight[key] = future
+            self._stats["provider_calls"] += 1
+            return key, future, True
+
+    def _finish(self, key: tuple[str, float, str], future: Future, text: str | None, exc: BaseException | None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(text)
+
+    def invoke_text(self, prompt: str) -> str:
+        key, future, leader = self._join(prompt)
+        if not leader:
+            return future.result()
+        try:
+            text = self.inner.invoke_text(prompt)
+        except BaseException as exc:
+            self._finish(key, future, None, exc)
+            raise
+        self._finish(key, future, text, None)
+        return text
+
+    async def ainvoke_text(self, prompt: str) -> str:
+        key, future, leader = self._join(prompt)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            text = await ainvoke_text(self.inner, prompt)
+        except BaseException as exc:
+            self._finish(key, future, None, exc)
+            raise
+        self._finish(key, future, text, None)
+        return text
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = dict(self._stats)
+            stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+# Lower index runs first. Interactive clarification answers a user who is
+# waiting on a question; batch covers jobs and background refinement.
+PRIORITY_CLASSES = ("clarify", "interactive", "batch")
+DEFAULT_TENANT = "default"
+
+_LLM_PRIORITY: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+_LLM_TENANT: ContextVar[str] = ContextVar("llm_tenant", default=DEFAULT_TENANT)
+
+
+@contextmanager
+def llm_call_context(priority: str | None = None, tenant: str | None = None) -> Iterator[None]:
+    """Tag LLM calls made in this context (threads started via asyncio.to_thread inherit it)."""
+    if priority is not None and priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown LLM priority {priority!r}; expected one of {PRIORITY_CLASSES}.")
+    priority_token = _LLM_PRIORITY.set(priority) if priority is not None else None
+    tenant_token = _LLM_TENANT.set(tenant or DEFAULT_TENANT) if tenant is not None else None
+    try:
+        yield
+    finally:
+        if tenant_token is not None:
+            _LLM_TENANT.reset(tenant_token)
+        if priority_token is not None:
+            _LLM_PRIORITY.reset(priority_token)
+
+
+def current_llm_priority() -> str:
+    return _LLM_PRIORITY.get()
+
+
+def current_llm_tenant() -> str:
+    return _LLM_TENANT.get()
+
+
+@dataclass
+class TokenBucket:
+    """Request-rate limiter; ``rate_per_second`` <= 0 means unlimited."""
+
+    rate_per_second: float
+    capacity: float = 1.0
+    _tokens: float = field(default=0.0, init=False)
+    _updated: float = field(default_factory=time.monotonic, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.capacity = max(self.capacity, 1.0)
+        self._tokens = self.capacity
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        if self.rate_per_second <= 0:
+            return True
+        with self._lock:
+            self._refill_locked()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def seconds_until_available(self) -> float:
+        if self.rate_per_second <= 0:
+            return 0.0
+        with self._lock:
+            self._refill_locked()
+            return max((1.0 - self._tokens) / self.rate_per_second, 0.0)
+
+    def available(self) -> float | None:
+        """Tokens in the bucket, or None when unlimited."""
+        if self.rate_per_second <= 0:
+            return None
+        with self._lock:
+            self._refill_locked()
+            return round(self._tokens, 3)
+
+
+_PROVIDER_BUCKETS: dict[str, TokenBucket] = {}
+_PROVIDER_BUCKETS_LOCK = threading.Lock()
+
+
+def provider_bucket(provider: str, requests_per_minute: float, burst: int) -> TokenBucket:
+    """One bucket per provider, shared by every client in the process."""
+    with _PROVIDER_BUCKETS_LOCK:
+        bucket = _PROVIDER_BUCKETS.get(provider)
+        if bucket is None:
+            bucket = TokenBucket(rate_per_second=requests_per_minute / 60.0, capacity=burst)
+            _PROVIDER_BUCKETS[provider] = bucket
+        return bucket
+
+
+@dataclass
+class _Ticket:
+    priority: int
+    tenant: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    granted: bool = False
+    # Dequeued without a slot because the inner client's breaker is open.
+    rejected: bool = False
+    # Already counted in ``rate_limited_waits``.
+    throttled: bool = False
+
+
+@dataclass
+class ScheduledClient:
+    """Orders provider calls by priority class, then round-robin across tenants.
+
+    A call is dispatched when a concurrency slot and a token from the
+    provider's bucket are free. The next call is the front of the
+    highest-priority class, where each class rotates between tenants so one
+    tenant's backlog cannot crowd out another's. A call that has waited
+    ``aging_seconds`` is treated as one class more urgent, so batch work
+    still makes progress under sustained interactive load. Calls still queued
+    after ``queue_timeout_seconds`` return an empty string, the same signal
+    as any other provider failure.
+
+    ``max_in_flight`` is the only concurrency limit in the client stack. When
+    the inner client has ``invoke_text_then`` (``ResilientClient``), a slot is
+    given back only once the provider call has finished, so calls abandoned
+    at their deadline keep counting against the limit. When it has
+    ``short_circuits`` and its breaker is open, calls are turned away before
+    they take a token or a slot.
+    """
+
+    inner: ChatClient
+    bucket: TokenBucket = field(default_factory=lambda: TokenBucket(rate_per_second=0.0))
+    max_in_flight: int = 8
+    queue_timeout_seconds: float = 30.0
+    aging_seconds: float = 15.0
+
+    def __post_init__(self) -> None:
+        self._cond = threading.Condition()
+        self._queues: list[OrderedDict[str, deque[_Ticket]]] = [OrderedDict() for _ in PRIORITY_CLASSES]
+        self._in_flight = 0
+        self._stats = {
+            name: {"queued": 0, "dispatched": 0, "timed_out": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for name in PRIORITY_CLASSES
+        }
+        self._rate_limited_waits = 0
+
+    def _effective_priority(self, ticket: _Ticket, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return ticket.priority
+        return ticket.priority - int((now - ticket.enqueued_at) / self.aging_seconds)
+
+    def _next_locked(self) -> tuple[int, str] | None:
+        now = time.monotonic()
+        best: tuple[int, int, float] | None = None
+        choice: tuple[int, str] | None = None
+        for priority, tenants in enumerate(self._queues):
+            if not tenants:
+                continue
+            tenant, waiting = next(iter(tenants.items()))
+            head = waiting[0]
+            rank = (self._effective_priority(head, now), priority, head.enqueued_at)
+            if best is None or rank < best:
+                best, choice = rank, (priority, tenant)
+        return choice
+
+    def _short_circuited(self) -> bool:
+        short_circuits = getattr(self.inner, "short_circuits", None)
+        return short_circuits is not None and short_circuits()
+
+    def _pop_locked(self, priority: int, tenant: str) -> _Ticket:
+        tenants = self._queues[priority]
+        ticket = tenants[tenant].popleft()
+        if tenants[tenant]:
+            tenants.move_to_end(tenant)
+        else:
+            del tenants[tenant]
+        return ticket
+
+    def _pump_locked(self) -> None:
+        dispatched = False
+        while self._in_flight < self.max_in_flight:
+            choice = self._next_locked()
+            if choice is None:
+                break
+            priority, tenant = choice
+            if self._short_circuited():
+                self._pop_locked(priority, tenant).rejected = True
+                dispatched = True
+                continue
+            if not self.bucket.try_take():
+                head = self._queues[priority][tenant][0]
+                if not head.throttled:
+                    head.throttled = True
+                    self._rate_limited_waits += 1
+                break
+            ticket = self._pop_locked(priority, tenant)
+            ticket.granted = True
+            self._in_flight += 1
+            stats = self._stats[PRIORITY_CLASSES[priority]]
+            waited_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+            stats["dispatched"] += 1
+            stats["wait_ms_total"] += waited_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], waited_ms)
+            dispatched = True
+        if dispatched:
+            self._cond.notify_all()
+
+    def _remove_locked(self, ticket: _Ticket) -> None:
+        tenants = self._queues[ticket.priority]
+        waiting = tenants.get(ticket.tenant)
+        if waiting is not None and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del tenants[ticket.tenant]
+
+    def _acquire(self) -> bool:
+        if self._short_circuited():
+            return False
+        priority_name = current_llm_priority()
+        ticket = _Ticket(priority=PRIORITY_CLASSES.index(priority_name), tenant=current_llm_tenant())
+        deadline = ticket.enqueued_at + self.queue_timeout_seconds
+        with self._cond:
+            self._queues[ticket.priority].setdefault(ticket.tenant, deque()).append(ticket)
+            self._stats[priority_name]["queued"] += 1
+            self._pump_locked()
+            while not ticket.granted:
+                if ticket.rejected:
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove_locked(ticket)
+                    self._stats[priority_name]["timed_out"] += 1
+                    self._cond.notify_all()
+                    return False
+                # Wake up for the next token even if nobody finishes a call.
+                wait = self.bucket.seconds_until_available() or remaining
+                self._cond.wait(timeout=min(max(wait, 0.001), remaining))
+                self._pump_locked()
+        return True
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._pump_locked()
+            self._cond.notify_all()
+
+    def invoke_text(self, prompt: str) -> str:
+        if not self._acquire():
+            return ""
+        invoke_then = getattr(self.inner, "invoke_text_then", None)
+        if invoke_then is not None:
+            return invoke_then(prompt, self._release)
+        try:
+            return self.inner.invoke_text(prompt)
+        finally:
+            self._release()
+
+    async def ainvoke_text(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.invoke_text, prompt)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            classes = {}
+            for priority, name in enumerate(PRIORITY_CLASSES):
+                stats = dict(self._stats[name])
+                wait_total = stats.pop("wait_ms_total")
+                stats["avg_wait_ms"] = round(wait_total / stats["dispatched"], 3) if stats["dispatched"] else 0.0
+                stats["wait_ms_max"] = round(stats["wait_ms_max"], 3)
+                stats["waiting"] = sum(len(waiting) for waiting in self._queues[priority].values())
+                classes[name] = stats
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "rate_limited_waits": self._rate_limited_waits,
+                "tokens_available": self.bucket.available(),
+                "classes": classes,
+            }
+
+
+_STATS_LAYER_NAMES = {
+    "CoalescingClient": "coalescing",
+    "ScheduledClient": "scheduler",
+    "ResilientClient": "resilience",
+}
+
+
+def collect_client_stats(client: ChatClient) -> dict[str, Any]:
+    """Walk the wrapper chain and return each layer's counters by layer name."""
+    collected: dict[str, Any] = {}
+    layer: Any = client
+    while layer is not None:
+        stats = getattr(layer, "stats", None)
+        if callable(stats):
+            name = _STATS_LAYER_NAMES.get(type(layer).__name__, type(layer).__name__)
+            collected[name] = stats()
+        layer = getattr(layer, "inner", None)
+    return collected
+
 
+def _wrap_provider_client(client: ChatClient, config: ModelConfig) -> CoalescingClient:
+    resilient = ResilientClient(
+        inner=client,
+        deadline_seconds=config.request_timeout_seconds,
+        max_concurrency=config.max_concurrency,
+        breaker=CircuitBreaker(
+            failure_threshold=config.breaker_failure_threshold,
+            reset_timeout_seconds=config.breaker_reset_seconds,
+        ),
+    )
+    scheduled = ScheduledClient(
+        inner=resilient,
+        bucket=provider_bucket(config.provider, config.rate_limit_rpm, config.rate_limit_burst),
+        max_in_flight=config.max_concurrency,
+        queue_timeout_seconds=config.queue_timeout_seconds,
+        aging_seconds=config.priority_aging_seconds,
+    )
+    return CoalescingClient(
+        inner=scheduled,
+        model_name=config.model_name,
+        temperature=config.temperature,
+    )
 
 
 def get_chat_client(config: ModelConfig) -> ChatClient:
@@ -67,21 +677,31 @@ def get_chat_client(config: ModelConfig) -> ChatClient:
 
     if provider == "openai" and config.openai_api_key and config.model_name:
         try:
-            return OpenAIClient(
-                model_name=config.model_name,
-                temperature=config.temperature,
-                api_key=config.openai_api_key,
-                base_url=config.openai_base_url,
+            return _wrap_provider_client(
+                OpenAIClient(
+                    model_name=config.model_name,
+                    temperature=config.temperature,
+                    api_key=config.openai_api_key,
+                    base_url=config.openai_base_url,
+                    timeout_seconds=config.request_timeout_seconds,
+                    max_connections=config.max_concurrency,
+                ),
+                config,
             )
         except Exception:
             return HeuristicClient()
 
     if provider == "anthropic" and config.anthropic_api_key and config.model_name:
         try:
-            return AnthropicClient(
-                model_name=config.model_name,
-                temperature=config.temperature,
-                api_key=config.anthropic_api_key,
+            return _wrap_provider_client(
+                AnthropicClient(
+                    model_name=config.model_name,
+                    temperature=config.temperature,
+                    api_key=config.anthropic_api_key,
+                    timeout_seconds=config.request_timeout_seconds,
+                    max_connections=config.max_concurrency,
+                ),
+                config,
             )
         except Exception:
             return HeuristicClient()
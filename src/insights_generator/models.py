@@ -6,3 +6,7 @@ from pydantic import BaseModel
 class ClarifyRequest(BaseModel):
     session_id: str
     clarification: str
+    fields: str = ""
+    columns: str = ""
+    response_format: str = "json"
+    profile: bool = False
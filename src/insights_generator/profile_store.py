@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from insights_generator.analytics.incremental import IncrementalAnalytics
+
+
+MAX_PROFILES = 64
+
+
+# Column statistics of uploaded files, keyed by content fingerprint, so a
+# file compared again (last week's export) is not parsed and scanned again.
+PROFILE_STORE: OrderedDict[str, IncrementalAnalytics] = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def put_profile(fingerprint: str, profile: IncrementalAnalytics) -> None:
+    with _LOCK:
+        PROFILE_STORE[fingerprint] = profile
+        PROFILE_STORE.move_to_end(fingerprint)
+        while len(PROFILE_STORE) > MAX_PROFILES:
+            PROFILE_STORE.popitem(last=False)
+
+
+def get_profile(fingerprint: str) -> IncrementalAnalytics | None:
+    with _LOCK:
+        profile = PROFILE_STORE.get(fingerprint)
+        if profile is not None:
+            PROFILE_STORE.move_to_end(fingerprint)
+        return profile
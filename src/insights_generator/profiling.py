@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, Iterator
+
+from insights_generator.artifact_store import ArtifactStore, get_artifact_store
+from insights_generator.config import ProfilingConfig, load_config
+
+
+COLLAPSED_NAME = "profile.collapsed.txt"
+SUMMARY_NAME = "profile.json"
+SETUP_STAGE = "setup"
+TOP_FRAMES = 15
+
+# tracemalloc is process-wide, so only one request is profiled at a time.
+_PROFILE_LOCK = threading.Lock()
+_ACTIVE: dict[str, RequestProfile] = {}
+_ACTIVE_LOCK = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another request held the profiler for longer than ``lock_timeout_seconds``."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> list[str]:
+    """Frame labels of a stack, outermost first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    """Samples the stacks of attached threads every ``interval_seconds``.
+
+    Stacks are counted in collapsed form (``root;...;leaf``), rooted at the
+    graph node that was running, which is what flamegraph tools consume.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005) -> None:
+        self.interval_seconds = interval_seconds
+        self.stage = SETUP_STAGE
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.stage_samples: Counter[str] = Counter()
+        self.samples = 0
+        self._threads: Counter[int] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def attach(self, ident: int) -> None:
+        with self._lock:
+            self._threads[ident] += 1
+
+    def detach(self, ident: int) -> None:
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            idents = list(self._threads)
+            stage = self.stage
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[(f"node:{stage}", *collapse_stack(frame))] += 1
+                    self.stage_samples[stage] += 1
+            self.samples += 1
+
+    def set_stage(self, stage: str) -> None:
+        with self._lock:
+            self.stage = stage
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_frames(self, limit: int = TOP_FRAMES) -> dict[str, list[dict[str, Any]]]:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        return {
+            "self": [{"frame": label, "samples": count} for label, count in own.most_common(limit)],
+            "inclusive": [{"frame": label, "samples": count} for label, count in total.most_common(limit)],
+        }
+
+
+@dataclass
+class NodeProfile:
+    node: str
+    started: float
+    memory_at_start: int
+    snapshot: tracemalloc.Snapshot | None
+    duration_ms: float = 0.0
+    alloc_peak_bytes: int = 0
+    alloc_net_bytes: int = 0
+    samples: int = 0
+    top_allocations: list[dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "node": self.node,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "alloc_peak_bytes": self.alloc_peak_bytes,
+            "alloc_net_bytes": self.alloc_net_bytes,
+            "top_allocations": self.top_allocations,
+        }
+
+
+class RequestProfile:
+    """Sampling profile and per-node tracemalloc peaks for one graph run.
+
+    Use as a context manager around the run and pass ``on_stage`` to
+    ``invoke_with_stages``. Entering raises ``ProfilerBusy`` when another
+    profile is still running after ``lock_timeout_seconds``. Worker threads doing work for the session join
+    the sample set through ``attached_thread``.
+    """
+
+    def __init__(self, session_id: str, config: ProfilingConfig | None = None) -> None:
+        self.session_id = session_id
+        self.config = config or load_config().profiling
+        self.sampler = SamplingProfiler(self.config.sample_interval_ms / 1000.0)
+        self.nodes: list[NodeProfile] = []
+        self._owner = threading.get_ident()
+        self._started_tracing = False
+        self._started = 0.0
+        self.wall_ms = 0.0
+
+    def __enter__(self) -> RequestProfile:
+        if not _PROFILE_LOCK.acquire(timeout=self.config.lock_timeout_seconds):
+            raise ProfilerBusy("Another request is being profiled.")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.config.tracemalloc_frames)
+            self._started_tracing = True
+        with _ACTIVE_LOCK:
+            _ACTIVE[self.session_id] = self
+        self._started = time.perf_counter()
+        self.sampler.attach(self._owner)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        try:
+            self._close_node()
+            self.sampler.stop()
+            self.sampler.detach(self._owner)
+            self.wall_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        finally:
+            with _ACTIVE_LOCK:
+                _ACTIVE.pop(self.session_id, None)
+            if self._started_tracing:
+                tracemalloc.stop()
+            _PROFILE_LOCK.release()
+
+    def _close_node(self) -> None:
+        if not self.nodes or self.nodes[-1].duration_ms:
+            return
+        node = self.nodes[-1]
+        current, peak = tracemalloc.get_traced_memory()
+        node.duration_ms = round((time.perf_counter() - node.started) * 1000, 3)
+        node.alloc_peak_bytes = max(peak - node.memory_at_start, 0)
+        node.alloc_net_bytes = current - node.memory_at_start
+        if node.snapshot is not None:
+            growth = tracemalloc.take_snapshot().compare_to(node.snapshot, "lineno")
+            node.top_allocations = [
+                {"site": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in growth[: self.config.top_allocations]
+                if stat.size_diff > 0
+            ]
+            node.snapshot = None
+
+    def on_stage(self, name: str) -> None:
+        self._close_node()
+        snapshot = tracemalloc.take_snapshot() if self.config.top_allocations > 0 else None
+        tracemalloc.reset_peak()
+        self.sampler.set_stage(name)
+        self.nodes.append(
+            NodeProfile(
+                node=name,
+                started=time.perf_counter(),
+                memory_at_start=tracemalloc.get_traced_memory()[0],
+                snapshot=snapshot,
+            )
+        )
+
+    def summary(self) -> dict[str, Any]:
+        for node in self.nodes:
+            node.samples = self.sampler.stage_samples[node.node]
+        return {
+            "session_id": self.session_id,
+            "wall_ms": self.wall_ms,
+            "sample_interval_ms": self.config.sample_interval_ms,
+            "samples": self.sampler.samples,
+            "nodes": [node.to_dict() for node in self.nodes],
+            "top_frames": self.sampler.top_frames(),
+        }
+
+    def store(self, store: ArtifactStore | None = None) -> dict[str, Any]:
+        """Write the collapsed stacks and summary as session artifacts."""
+        store = store or get_artifact_store()
+        summary = self.summary()
+        collapsed = store.put(
+            self.session_id, COLLAPSED_NAME, self.sampler.collapsed().encode("utf-8"), "text/plain; charset=utf-8"
+        )
+        stored = store.put(self.session_id, SUMMARY_NAME, json.dumps(summary).encode("utf-8"), "application/json")
+        return {
+            "collapsed_url": collapsed["url"],
+            "summary_url": stored["url"],
+            "wall_ms": summary["wall_ms"],
+            "nodes": [
+                {key: node[key] for key in ("node", "duration_ms", "alloc_peak_bytes", "samples")}
+                for node in summary["nodes"]
+            ],
+        }
+
+
+@contextmanager
+def attached_thread(session_id: str) -> Iterator[None]:
+    """Include the calling thread in the session's profile, if one is running."""
+    with _ACTIVE_LOCK:
+        profile = _ACTIVE.get(session_id)
+    if profile is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profile.sampler.attach(ident)
+    try:
+        yield
+    finally:
+        profile.sampler.detach(ident)
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import contextlib
+import gc
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass
+from multiprocessing import shared_memory
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+from insights_generator.config import ReplConfig, load_config
+
+try:
+    import resource
+except Exception:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+PRELOAD_MODULES = ["numpy", "pandas", "pyarrow", "plotly.express", "plotly.graph_objects", "plotly.io"]
+MAX_STDOUT_CHARS = 10_000
+
+
+# --------------------------------------------------------------------------
+# Worker process side
+# --------------------------------------------------------------------------
+
+
+def _apply_memory_limit(memory_limit_bytes: int) -> None:
+    # The address-space limit is set on top of what the warm interpreter already
+    # maps, so the budget is what chart code may allocate, not the import cost.
+    if resource is None or memory_limit_bytes <= 0:
+        return
+    baseline = 0
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmSize:"):
+                    baseline = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    limit = baseline + memory_limit_bytes
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _run_task(task: dict[str, Any], modules: dict[str, Any]) -> dict[str, Any]:
+    started = time.perf_counter()
+    stdout = io.StringIO()
+    result: dict[str, Any] = {"ok": False, "stdout": "", "error": "", "figure_json": None}
+    segment = shared_memory.SharedMemory(name=task["shm_name"])
+    namespace: dict[str, Any] = {}
+    try:
+        # The Arrow stream is read in place from the shared segment, and
+        # split_blocks keeps one block per column so numeric columns without
+        # nulls stay views over it; strings and nullable columns are copied.
+        view = segment.buf[: task["size"]]
+        table = pa.ipc.open_stream(pa.py_buffer(view)).read_all()
+        namespace = {
+            "df": table.to_pandas(split_blocks=True),
+            **modules,
+            **task.get("variables", {}),
+        }
+        del table
+        with contextlib.redirect_stdout(stdout):
+            exec(compile(task["code"], "<repl>", "exec"), namespace)
+        fig = namespace.get("fig")
+        if fig is not None:
+            result["figure_json"] = modules["pio"].to_json(fig, validate=False)
+        result["ok"] = True
+    except MemoryError:
+        result["error"] = "MemoryError: execution exceeded the REPL memory limit."
+    except BaseException:
+        result["error"] = traceback.format_exc(limit=-3)
+    finally:
+        namespace.clear()
+        view = None
+        gc.collect()
+        with contextlib.suppress(BufferError):
+            segment.close()
+    result["stdout"] = stdout.getvalue()[:MAX_STDOUT_CHARS]
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def _worker_main(conn, memory_limit_bytes: int) -> None:
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    modules = {"pd": pd, "np": np, "px": px, "go": go, "pio": pio}
+    _apply_memory_limit(memory_limit_bytes)
+    conn.send({"ready": True, "pid": os.getpid()})
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        conn.send(_run_task(task, modules))
+
+
+# --------------------------------------------------------------------------
+# Parent side
+# --------------------------------------------------------------------------
+
+
+class SharedFrame:
+    """A DataFrame serialized once as an Arrow IPC stream into shared memory."""
+
+    def __init__(self, dataframe: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        # Measure first so the stream is written straight into the segment
+        # without an intermediate buffer.
+        counter = pa.MockOutputStream()
+        with pa.ipc.new_stream(counter, table.schema) as writer:
+            writer.write_table(table)
+        self.size = int(counter.size())
+        self._segment = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        self.name = self._segment.name
+        target = pa.py_buffer(self._segment.buf)
+        sink = pa.FixedSizeBufferWriter(target)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        sink.close()
+        del target, sink
+
+    def close(self) -> None:
+        if self._segment is None:
+            return
+        with contextlib.suppress(BufferError):
+            self._segment.close()
+        with contextlib.suppress(FileNotFoundError):
+            self._segment.unlink()
+        self._segment = None
+
+    def __enter__(self) -> SharedFrame:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+@dataclass
+class ReplResult:
+    ok: bool
+    stdout: str = ""
+    error: str = ""
+    figure_json: str | None = None
+    duration_ms: float = 0.0
+    worker_pid: int | None = None
+    timed_out: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data.pop("figure_json")
+        return data
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_bytes: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit_bytes),
+            name="repl-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.tasks = 0
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.ready:
+            try:
+                if self.conn.poll(timeout):
+                    self.ready = bool(self.conn.recv().get("ready"))
+            except (EOFError, OSError):
+                return False
+        return self.ready
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill:
+            with contextlib.suppress(Exception):
+                self.conn.send(None)
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        # Replacement workers fork from a server that already imported the
+        # heavy modules, so recycling after a timeout costs milliseconds.
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class ReplPool:
+    """Pre-warmed worker processes for the application's own chart code.
+
+    Each worker imports pandas, numpy and plotly once at start-up. Code runs
+    against ``df`` read from a :class:`SharedFrame`, with ``fig`` (if set)
+    returned as Plotly JSON. A run that exceeds ``timeout_seconds`` has its
+    worker killed and replaced; ``memory_limit_bytes`` caps the address space
+    code may add on top of the warm interpreter. The workers isolate crashes,
+    runaway loops and memory blow-ups from the API process; they are not a
+    sandbox and must never run code supplied by a request.
+
+    Workers are spawned by ``start`` or on the first ``execute``. A closed
+    pool stays closed: it spawns no replacements and ``execute`` fails fast.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout_seconds: float = 10.0,
+        memory_limit_bytes: int = 512 * 1024 * 1024,
+        max_tasks_per_worker: int = 100,
+        startup_timeout_seconds: float = 60.0,
+    ) -> None:
+        self.size = max(workers, 1)
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_bytes = memory_limit_bytes
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self._context = _context()
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: set[_Worker] = set()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._counters = {"executions": 0, "failed": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+
+    def start(self) -> ReplPool:
+        with self._lock:
+            if self._started or self._closed:
+                return self
+            self._started = True
+        for _ in range(self.size):
+            self._spawn()
+        return self
+
+    def _spawn(self) -> None:
+        worker = _Worker(self._context, self.memory_limit_bytes)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._workers.add(worker)
+        if closed:
+            worker.stop(kill=True)
+        else:
+            self._idle.put(worker)
+
+    def _retire(self, worker: _Worker, reason: str) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+            self._counters[reason] += 1
+            closed = self._closed
+        # A worker that timed out is still busy, so there is no point asking.
+        worker.stop(kill=reason != "recycled")
+        if not closed:
+            self._spawn()
+
+    def _checkout(self) -> _Worker | None:
+        """An idle worker; ``None`` once the pool is closed or none frees up in time."""
+        deadline = time.monotonic() + self.startup_timeout_seconds + self.timeout_seconds
+        while True:
+            with self._lock:
+                if self._closed:
+                    return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                return self._idle.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                continue
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+
+    def execute(
+        self,
+        code: str,
+        frame: SharedFrame,
+        variables: dict[str, Any] | None = None,
+        timeout_seconds: float | None = None,
+    ) -> ReplResult:
+        self.start()
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        worker = self._checkout()
+        if worker is None:
+            return ReplResult(ok=False, error="No REPL worker is available.")
+        if not worker.wait_ready(self.startup_timeout_seconds):
+            self._retire(worker, "crashes")
+            return ReplResult(ok=False, error="REPL worker failed to start.")
+
+        self._count("executions")
+        try:
+            worker.conn.send(
+                {"code": code, "shm_name": frame.name, "size": frame.size, "variables": variables or {}}
+            )
+            if not worker.conn.poll(timeout):
+                self._retire(worker, "timeouts")
+                return ReplResult(
+                    ok=False,
+                    error=f"Execution exceeded {timeout:g}s and was stopped.",
+                    duration_ms=round(timeout * 1000, 3),
+                    worker_pid=worker.process.pid,
+                    timed_out=True,
+                )
+            reply = worker.conn.recv()
+        except (EOFError, OSError):
+            # Usually the kernel ending a worker that blew through its limit.
+            self._retire(worker, "crashes")
+            return ReplResult(ok=False, error="REPL worker exited during execution.", worker_pid=worker.process.pid)
+
+        worker.tasks += 1
+        if not reply["ok"]:
+            self._count("failed")
+        with self._lock:
+            closed = self._closed
+        if closed:
+            worker.stop()
+        elif worker.tasks >= self.max_tasks_per_worker:
+            self._retire(worker, "recycled")
+        else:
+            self._idle.put(worker)
+        return ReplResult(worker_pid=worker.process.pid, **reply)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "idle": self._idle.qsize(),
+                "timeout_seconds": self.timeout_seconds,
+                "memory_limit_bytes": self.memory_limit_bytes,
+                **self._counters,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+            self._closed = True
+        while not self._idle.empty():
+            with contextlib.suppress(queue.Empty):
+                self._idle.get_nowait()
+        for worker in workers:
+            worker.stop()
+
+
+_POOL: ReplPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool_from_config(repl: ReplConfig) -> ReplPool:
+    return ReplPool(
+        workers=repl.workers,
+        timeout_seconds=repl.timeout_seconds,
+        memory_limit_bytes=repl.memory_limit_mb * 1024 * 1024,
+        max_tasks_per_worker=repl.max_tasks_per_worker,
+    )
+
+
+def get_repl_pool() -> ReplPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = _pool_from_config(load_config().repl)
+        return _POOL
+
+
+def set_repl_pool(pool: ReplPool | None) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        previous, _POOL = _POOL, pool
+    if previous is not None and previous is not pool:
+        previous.close()
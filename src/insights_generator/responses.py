@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import math
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+RESPONSE_FORMATS = ("json", "columnar", "arrow")
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ALWAYS_INCLUDED_FIELDS = ("session_id", "needs_clarification", "profile")
+COLUMN_KEYED_ANALYTICS = ("numeric_analytics", "anomaly_summary")
+NESTED_COLUMN_KEYED_ANALYTICS = ("anomalies", "rolling")
+STATS_TABLE_FIELDS = (
+    "count",
+    "mean",
+    "median",
+    "std",
+    "variance",
+    "cv",
+    "skew",
+    "iqr",
+    "anomaly_count",
+    "anomaly_rate",
+    "min",
+    "max",
+    "high_variance",
+    "long_tail_detected",
+)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _finite(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize with orjson when installed (NumPy scalars/arrays natively).
+
+    Non-finite floats become ``null`` on both paths.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(_finite(content), default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips ``jsonable_encoder`` and renders in one call."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _split_csv(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _pick(payload: dict[str, Any], path: list[str]) -> Any:
+    node: Any = payload
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return node
+
+
+def _place(target: dict[str, Any], path: list[str], value: Any) -> None:
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+
+
+def select_fields(payload: dict[str, Any], fields: str = "", columns: str = "") -> dict[str, Any]:
+    """Trim a result payload to the requested fields and columns.
+
+    ``fields`` is a comma-separated list of top-level keys or dotted paths
+    (``insights``, ``analytics.correlations``). ``columns`` restricts every
+    per-column analytics map to the named columns.
+    """
+    selected = payload
+    if fields:
+        selected = {key: payload[key] for key in ALWAYS_INCLUDED_FIELDS if key in payload}
+        for field_path in _split_csv(fields):
+            path = field_path.split(".")
+            value = _pick(payload, path)
+            if value is not None:
+                _place(selected, path, value)
+
+    wanted = _split_csv(columns)
+    analytics = selected.get("analytics")
+    if wanted and isinstance(analytics, dict):
+        analytics = dict(analytics)
+        for key in COLUMN_KEYED_ANALYTICS:
+            if isinstance(analytics.get(key), dict):
+                analytics[key] = {col: analytics[key][col] for col in wanted if col in analytics[key]}
+        for key in NESTED_COLUMN_KEYED_ANALYTICS:
+            section = analytics.get(key)
+            if isinstance(section, dict) and isinstance(section.get("by_column"), dict):
+                by_column = section["by_column"]
+                analytics[key] = {
+                    **section,
+                    "by_column": {col: by_column[col] for col in wanted if col in by_column},
+                }
+        selected = {**selected, "analytics": analytics}
+    return selected
+
+
+def stats_table(numeric_analytics: dict[str, Any]) -> dict[str, list[Any]]:
+    """Per-column stats as a column-oriented table (one list per statistic)."""
+    table: dict[str, list[Any]] = {"column": []}
+    for field_name in STATS_TABLE_FIELDS:
+        table[field_name] = []
+    for col, info in numeric_analytics.items():
+        table["column"].append(col)
+        for field_name in STATS_TABLE_FIELDS:
+            table[field_name].append((info or {}).get(field_name))
+    return table
+
+
+def _arrow_response(payload: dict[str, Any]) -> Response:
+    import pyarrow as pa
+
+    numeric_analytics = payload.get("analytics", {}).get("numeric_analytics", {})
+    table = pa.table(stats_table(numeric_analytics))
+    table = table.replace_schema_metadata({"session_id": str(payload.get("session_id", ""))})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type=ARROW_STREAM_MEDIA_TYPE,
+        headers={"X-Session-Id": str(payload.get("session_id", ""))},
+    )
+
+
+def render_result(
+    payload: dict[str, Any],
+    fields: str = "",
+    columns: str = "",
+    response_format: str = "json",
+) -> Response:
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f"Unsupported response format '{response_format}'. Use one of {list(RESPONSE_FORMATS)}.")
+
+    selected = select_fields(payload, fields, columns)
+    if response_format == "arrow" and not payload.get("needs_clarification"):
+        return _arrow_response(selected)
+    if response_format == "columnar":
+        analytics = selected.get("analytics")
+        if isinstance(analytics, dict) and isinstance(analytics.get("numeric_analytics"), dict):
+            selected = {
+                **selected,
+                "analytics": {**analytics, "numeric_analytics": stats_table(analytics["numeric_analytics"])},
+            }
+    return FastJSONResponse(selected)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+
+MAX_RESULTS = 256
+
+
+@dataclass
+class ResultPayload:
+    status: str
+    result: dict[str, Any] = field(default_factory=dict)
+    error: str = ""
+
+
+RESULT_STORE: OrderedDict[str, ResultPayload] = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def put_result(session_id: str, payload: ResultPayload) -> None:
+    with _LOCK:
+        RESULT_STORE[session_id] = payload
+        RESULT_STORE.move_to_end(session_id)
+        while len(RESULT_STORE) > MAX_RESULTS:
+            RESULT_STORE.popitem(last=False)
+
+
+def get_result(session_id: str) -> ResultPayload | None:
+    with _LOCK:
+        return RESULT_STORE.get(session_id)
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-
-import pandas as pd
+from typing import Any
 
 
 @dataclass
 class SessionPayload:
-    dataframe: pd.DataFrame
+    # Frame registry handle of the full upload.
+    dataset: str
     initial_prompt: str
     use_python_repl: bool = False
     use_mcp: bool = False
+    mode: str = "full"
+    # Set when admission control downgraded the upload to a streamed sample.
+    sampling: dict[str, Any] | None = None
 
 
 SESSION_STORE: dict[str, SessionPayload] = {}
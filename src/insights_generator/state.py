@@ -2,12 +2,11 @@ from __future__ import annotations
 
 from typing import Any, TypedDict
 
-import pandas as pd
-
 
 class GraphState(TypedDict, total=False):
     session_id: str
-    dataframe: pd.DataFrame
+    # Handle resolved through frame_registry; the state itself stays small and serializable.
+    dataset: str
     user_prompt: str
     clarification: str
     needs_clarification: bool
@@ -18,3 +17,5 @@ class GraphState(TypedDict, total=False):
     insights: str
     use_python_repl: bool
     use_mcp: bool
+    sampling: dict[str, Any]
+    execution_plan: dict[str, Any]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+SEGMENTS = ("smb", "mid", "enterprise")
+REGIONS = ("na", "emea", "apac", "latam")
+
+
+def make_sales_frame(rows: int, seed: int = 7, anomaly_rate: float = 0.002) -> pd.DataFrame:
+    """Synthetic sales table with skewed revenue, correlated cost and a few spikes."""
+    rng = np.random.default_rng(seed)
+    revenue = rng.lognormal(mean=4.0, sigma=0.7, size=rows)
+    spikes = rng.random(rows) < anomaly_rate
+    revenue[spikes] *= rng.uniform(8.0, 20.0, size=int(spikes.sum()))
+    return pd.DataFrame(
+        {
+            "order_date": pd.date_range("2023-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+            "segment": rng.choice(SEGMENTS, size=rows, p=[0.6, 0.3, 0.1]),
+            "region": rng.choice(REGIONS, size=rows),
+            "units": rng.poisson(lam=12, size=rows),
+            "revenue": revenue.round(2),
+            "cost": (revenue * rng.uniform(0.4, 0.7, size=rows)).round(2),
+            "discount": rng.beta(2.0, 12.0, size=rows).round(4),
+        }
+    )
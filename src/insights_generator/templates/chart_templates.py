@@ -19,4 +19,12 @@ CHART_TEMPLATES = {
         "type": "box",
         "description": "High-variance diagnostics chart.",
     },
+    "correlation": {
+        "type": "heatmap",
+        "description": "Pearson correlation heatmap of the most strongly correlated columns.",
+    },
+    "repl": {
+        "type": "custom",
+        "description": "Chart produced by custom Python code in a sandboxed REPL worker.",
+    },
 }
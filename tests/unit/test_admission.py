@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import gzip
+import io
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+from insights_generator.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    UploadTooLarge,
+    estimate_peak_bytes,
+    set_admission_controller,
+)
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.io_utils import UploadInfo, describe_upload, load_sample_from_upload
+from insights_generator.job_queue import JobQueue, set_job_queue
+from insights_generator.synthetic import make_sales_frame
+
+
+def csv_bytes(rows: int) -> bytes:
+    return make_sales_frame(rows).to_csv(index=False).encode("utf-8")
+
+
+def test_estimate_uses_gzip_trailer_and_format() -> None:
+    raw = csv_bytes(2_000)
+    info = describe_upload(UploadFile(io.BytesIO(gzip.compress(raw)), filename="x"))
+
+    assert info.compression == "gzip" and info.format == "csv"
+    assert info.uncompressed_bytes == len(raw)
+    assert estimate_peak_bytes(info) == int(len(raw) * 3.0)
+    assert estimate_peak_bytes(UploadInfo(1_000, None, "arrow")) < estimate_peak_bytes(UploadInfo(1_000, None, "csv"))
+
+
+def test_waiters_queue_fifo_and_time_out() -> None:
+    controller = AdmissionController(budget_bytes=100, max_wait_seconds=0.05)
+    held = controller.acquire(80, timeout=0)
+    assert held == 80
+    assert controller.acquire(30, timeout=0.05) is None
+
+    admitted: list[int] = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire(60, timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    assert controller.stats()["queued"] == 1
+
+    controller._release(80)
+    waiter.join()
+    assert admitted == [60]
+    stats = controller.stats()
+    assert stats["in_use_bytes"] == 60 and stats["waited"] == 1 and stats["queued"] == 0
+
+
+def test_admit_downgrades_or_rejects_when_budget_is_full() -> None:
+    info = UploadInfo(size_bytes=100, compression=None, format="csv")
+    controller = AdmissionController(budget_bytes=1_000, max_wait_seconds=0.01)
+    first = controller.admit(info)
+    assert first.mode == "full" and first.nbytes == 300
+
+    controller.acquire(600, timeout=0)
+    sampled = controller.admit(info)
+    assert sampled.mode == "sampled" and sampled.nbytes == 100
+    sampled.release()
+    sampled.release()
+    assert controller.stats()["in_use_bytes"] == 900
+
+    strict = AdmissionController(budget_bytes=1_000, max_wait_seconds=0.01, overflow_policy="reject")
+    strict.acquire(900, timeout=0)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        strict.admit(info)
+    assert excinfo.value.retry_after_seconds == 5
+    assert strict.stats()["rejected"] == 1
+
+    # Larger than the whole budget: sampled without waiting, or refused outright.
+    huge = UploadInfo(size_bytes=1_000, compression=None, format="csv")
+    started = time.monotonic()
+    assert AdmissionController(budget_bytes=1_000, max_wait_seconds=5).admit(huge).mode == "sampled"
+    with pytest.raises(UploadTooLarge):
+        AdmissionController(budget_bytes=1_000, max_wait_seconds=5).admit(huge, allow_sample=False)
+    assert time.monotonic() - started < 1
+
+
+def test_streamed_sample_is_bounded() -> None:
+    raw = csv_bytes(5_000)
+    sample, population = load_sample_from_upload(UploadFile(io.BytesIO(gzip.compress(raw)), filename="x.csv.gz"), 400)
+
+    assert population == 5_000
+    assert len(sample) == 400
+    assert sample["units"].notna().all()
+
+
+def test_compressed_parquet_sample_streams_from_the_spool(tmp_path) -> None:
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(make_sales_frame(5_000), preserve_index=False), buffer, row_group_size=500)
+    spool = tmp_path / "spool"
+
+    sample, population = load_sample_from_upload(
+        UploadFile(io.BytesIO(gzip.compress(buffer.getvalue())), filename="x.parquet.gz"), 400, spool_dir=str(spool)
+    )
+
+    assert population == 5_000
+    assert len(sample) == 400
+    assert list(spool.iterdir()) == []
+
+
+@pytest.fixture
+def tight_client(tmp_path):
+    set_artifact_store(ArtifactStore(tmp_path / "artifacts"))
+    set_job_queue(JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool"))
+    from insights_generator.api import app
+
+    yield TestClient(app)
+    set_admission_controller(None)
+    set_job_queue(None)
+    set_artifact_store(None)
+
+
+def test_analyze_downgrades_then_rejects_under_memory_pressure(tight_client) -> None:
+    raw = csv_bytes(3_000)
+    controller = AdmissionController(budget_bytes=len(raw) * 4, max_wait_seconds=0.01)
+    set_admission_controller(controller)
+    controller.acquire(len(raw) * 2, timeout=0)
+
+    response = tight_client.post(
+        "/analyze",
+        files={"file": ("sales.csv", raw, "text/csv")},
+        data={"user_prompt": "Summarize revenue and cost"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["admission"]["mode"] == "sampled"
+    assert body["analytics"]["sample"]["reason"] == "memory_budget"
+    assert body["analytics"]["sample"]["population_rows"] == 3_000
+    assert controller.stats()["in_use_bytes"] == len(raw) * 2
+
+    strict = AdmissionController(budget_bytes=len(raw) * 4, max_wait_seconds=0.01, overflow_policy="reject")
+    set_admission_controller(strict)
+    strict.acquire(len(raw) * 2, timeout=0)
+    rejected = tight_client.post(
+        "/analyze",
+        files={"file": ("sales.csv", raw, "text/csv")},
+        data={"user_prompt": "Summarize revenue and cost"},
+    )
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "5"
+
+    set_admission_controller(
+        AdmissionController(budget_bytes=len(raw), max_wait_seconds=0.01, overflow_policy="reject")
+    )
+    too_large = tight_client.post(
+        "/analyze",
+        files={"file": ("sales.csv", raw, "text/csv")},
+        data={"user_prompt": "Summarize revenue and cost"},
+    )
+    assert too_large.status_code == 413
+    assert "retry-after" not in too_large.headers
+    assert tight_client.get("/metrics").json()["admission"]["rejected"] == 1
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from insights_generator.agents.analytics_agent import _numeric_column_analytics, run_analytics_agent
+from insights_generator import anomaly_store
+from insights_generator.analytics.anomalies import detect_anomalies, flagged_rows, page_anomalies
+from insights_generator.anomaly_store import AnomalyRecord, get_anomalies, put_anomalies
+from insights_generator.frame_registry import register_frame
+
+
+def build_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    revenue = rng.normal(100, 5, size=400)
+    revenue[[117, 250]] = [400.0, -200.0]
+    cost = rng.normal(10, 1, size=400)
+    cost[90] = np.nan
+    cost[300] = 60.0
+    return pd.DataFrame({"revenue": revenue, "cost": cost, "region": ["a", "b"] * 200})
+
+
+def test_iqr_positions_match_per_column_analytics() -> None:
+    df = build_frame()
+
+    index = detect_anomalies(df, ["revenue", "cost"])
+
+    for col in ("revenue", "cost"):
+        expected = _numeric_column_analytics(df, col)
+        rows = index.rows_for(col, "iqr")
+        assert index.count(col, "iqr") == expected["anomaly_count"]
+        assert df[col].iloc[rows[:10]].tolist() == expected["anomaly_examples"]
+
+
+def test_all_methods_flag_injected_spikes() -> None:
+    df = build_frame()
+
+    index = detect_anomalies(df, ["revenue", "cost"])
+
+    for method in ("iqr", "robust_z", "rolling"):
+        assert {117, 250} <= set(index.rows_for("revenue", method).tolist())
+    assert 300 in index.rows_for("cost", "robust_z").tolist()
+    assert 90 not in index.rows_for("cost").tolist()
+
+
+def test_page_returns_row_values_and_flags() -> None:
+    df = build_frame()
+    index = detect_anomalies(df, ["revenue", "cost"])
+
+    rows = flagged_rows(index, df)
+    page = page_anomalies(index, rows, method="robust_z", offset=0, limit=2)
+
+    assert page["total"] >= 3
+    first = page["rows"][0]
+    assert len(page["rows"]) == 2
+    assert first["values"]["revenue"] == df["revenue"].iloc[first["row"]]
+    assert first["values"]["region"] == df["region"].iloc[first["row"]]
+    assert any("robust_z" in methods for methods in first["flags"].values())
+    assert len(rows) == index.rows_for().size < len(df)
+
+
+def test_analytics_agent_stores_index_and_endpoint_pages_it() -> None:
+    from insights_generator.api import app
+
+    df = build_frame()
+    state = run_analytics_agent({"session_id": "anomaly-session", "dataset": register_frame(df)})
+    client = TestClient(app)
+
+    response = client.get("/anomalies/anomaly-session", params={"column": "revenue", "method": "robust_z"})
+
+    assert get_anomalies("anomaly-session") is not None
+    assert {117, 250} <= set(state["analytics"]["numeric_analytics"]["revenue"]["anomaly_example_rows"])
+    assert state["analytics"]["anomalies"]["by_column"]["revenue"]["iqr"] >= 2
+    assert response.status_code == 200
+    assert [row["row"] for row in response.json()["rows"]] == [117, 250]
+    assert client.get("/anomalies/anomaly-session", params={"method": "bogus"}).status_code == 400
+    assert client.get("/anomalies/missing-session").status_code == 404
+
+
+def test_store_keeps_flagged_rows_only_and_evicts_by_bytes(monkeypatch) -> None:
+    df = build_frame()
+    index = detect_anomalies(df, ["revenue", "cost"])
+    record = AnomalyRecord.from_frame(index, df)
+    monkeypatch.setattr(anomaly_store, "ANOMALY_STORE", type(anomaly_store.ANOMALY_STORE)())
+    monkeypatch.setattr(anomaly_store, "_TOTAL_BYTES", 0)
+    monkeypatch.setattr(anomaly_store, "_REFS", {})
+    monkeypatch.setattr(anomaly_store, "MAX_ANOMALY_BYTES", 2 * record.nbytes)
+
+    for key in ("a", "b", "c"):
+        put_anomalies(key, AnomalyRecord.from_frame(index, df))
+    shared = AnomalyRecord.from_frame(index, df)
+    put_anomalies("c", shared)
+    put_anomalies("c-0", shared)
+
+    assert record.nbytes < df.memory_usage(deep=True).sum()
+    assert not np.shares_memory(record.rows["revenue"].to_numpy(), df["revenue"].to_numpy())
+    assert list(anomaly_store.ANOMALY_STORE) == ["b", "c", "c-0"]
+    assert anomaly_store.anomaly_store_bytes() == 2 * record.nbytes
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+
+from fastapi.testclient import TestClient
+
+from insights_generator.admission import AdmissionController, set_admission_controller
+from insights_generator.api import app
+from insights_generator.dataset_store import DatasetStore, set_dataset_store
+
+
+def upload(name: str, body: str):
+    return {"file": (name, body.encode("utf-8"), "text/csv")}
+
+
+def test_append_updates_dataset_analytics() -> None:
+    client = TestClient(app)
+
+    created = client.post("/datasets", files=upload("day1.csv", "revenue,cost\n1,2\n3,4\n")).json()
+    appended = client.post(
+        f"/datasets/{created['dataset_id']}/append",
+        files=upload("day2.csv", "revenue,cost\n5,6\n7,8\n"),
+    )
+
+    body = appended.json()
+    assert appended.status_code == 200
+    assert body["version"] == 2
+    assert body["appended_rows"] == 2
+    assert body["analytics"]["row_count"] == 4
+    assert body["analytics"]["numeric_analytics"]["revenue"]["mean"] == 4.0
+
+
+def test_append_rejects_schema_change_and_unknown_dataset() -> None:
+    client = TestClient(app)
+    created = client.post("/datasets", files=upload("day1.csv", "revenue\n1\n")).json()
+
+    mismatch = client.post(
+        f"/datasets/{created['dataset_id']}/append",
+        files=upload("day2.csv", "other\n1\n"),
+    )
+    missing = client.post("/datasets/nope/append", files=upload("day2.csv", "revenue\n1\n"))
+
+    assert mismatch.status_code == 400
+    assert missing.status_code == 404
+
+
+def test_stored_datasets_are_bounded_and_held_against_the_budget() -> None:
+    client = TestClient(app)
+    controller = AdmissionController(budget_bytes=1 << 30)
+    set_admission_controller(controller)
+    store = DatasetStore(max_bytes=500_000)
+    set_dataset_store(store)
+    body = "revenue,cost\n" + "".join(f"{i},{i * 2}\n" for i in range(20_000))
+    try:
+        first = client.post("/datasets", files=upload("a.csv", body)).json()["dataset_id"]
+        held = controller.stats()["held_bytes"]
+        second = client.post("/datasets", files=upload("b.csv", body)).json()["dataset_id"]
+        appended = client.post(f"/datasets/{second}/append", files=upload("c.csv", body))
+        evicted = client.get(f"/datasets/{first}").status_code
+        stats = store.stats()
+        deleted = client.delete(f"/datasets/{second}").status_code
+        after = controller.stats()
+    finally:
+        set_dataset_store(None)
+        set_admission_controller(None)
+
+    assert held > 0
+    assert appended.status_code == 200 and appended.json()["version"] == 2
+    assert evicted == 404
+    assert stats["datasets"] == 1 and stats["evicted"] == 1
+    assert deleted == 204
+    assert after["held_bytes"] == 0 and after["in_use_bytes"] == 0
+    assert client.delete(f"/datasets/{second}").status_code == 404
+
+
+def test_idle_datasets_expire() -> None:
+    store = DatasetStore(ttl_seconds=0.01)
+    set_dataset_store(store)
+    try:
+        client = TestClient(app)
+        created = client.post("/datasets", files=upload("a.csv", "revenue\n1\n")).json()
+        time.sleep(0.05)
+        missing = client.get(f"/datasets/{created['dataset_id']}").status_code
+    finally:
+        set_dataset_store(None)
+
+    assert missing == 404
+    assert store.stats()["expired"] == 1
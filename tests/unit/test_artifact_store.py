@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import gzip
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    artifact_store = ArtifactStore(tmp_path, gc_interval_seconds=3600, blob_grace_seconds=0)
+    set_artifact_store(artifact_store)
+    yield artifact_store
+    set_artifact_store(None)
+
+
+def blob_files(store: ArtifactStore) -> list:
+    return sorted(p for p in (store.root / "blobs").glob("*/*"))
+
+
+def test_identical_content_is_stored_once(store) -> None:
+    first = store.put("s1", "trend.json", b'{"data": [1, 2, 3]}', "application/json")
+    second = store.put("s2", "trend.json", b'{"data": [1, 2, 3]}', "application/json")
+
+    entry = store.get("s2", "trend.json")
+
+    assert first["sha256"] == second["sha256"]
+    assert first["url"] == "/artifacts/s1/trend.json"
+    assert len([p for p in blob_files(store) if p.suffix == ".gz"]) == 1
+    assert gzip.decompress(entry.gzip_path.read_bytes()) == b'{"data": [1, 2, 3]}'
+
+
+def test_gc_removes_expired_sessions_and_orphaned_blobs(store) -> None:
+    store.put("old", "a.json", b"old-bytes", "application/json")
+    store.put("other", "a.json", b"other-bytes", "application/json")
+    store.retention_seconds = 10
+
+    kept = store.gc(now=time.time() + 5)
+    expired = store.gc(now=time.time() + 60)
+
+    assert kept["removed_sessions"] == 0
+    assert kept["removed_blobs"] == 0
+    assert expired["removed_sessions"] == 2
+    assert expired["removed_blobs"] == 2
+    assert blob_files(store) == []
+
+
+def test_gc_evicts_oldest_sessions_over_size_budget(store) -> None:
+    store.put("older", "a.bin", bytes(range(256)) * 40, "application/octet-stream")
+    time.sleep(0.01)
+    store.put("newer", "a.bin", bytes(reversed(range(256))) * 40, "application/octet-stream")
+    store.max_bytes = 400
+
+    stats = store.gc()
+
+    assert stats["removed_sessions"] == 1
+    assert store.get("older", "a.bin") is None
+    assert store.get("newer", "a.bin") is not None
+
+
+def test_endpoint_serves_precompressed_with_etag(store) -> None:
+    from insights_generator.api import app
+
+    ref = store.put("s1", "chart.html", b"<html>chart</html>", "text/html; charset=utf-8")
+    client = TestClient(app)
+
+    compressed = client.get(ref["url"], headers={"Accept-Encoding": "gzip"})
+    identity = client.get(ref["url"], headers={"Accept-Encoding": "identity"})
+    cached = client.get(ref["url"], headers={"If-None-Match": compressed.headers["etag"]})
+
+    assert compressed.status_code == 200
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == b"<html>chart</html>"
+    assert compressed.headers["etag"] == f'"{ref["sha256"]}"'
+    assert compressed.headers["cache-control"] == "private, no-cache"
+    assert "content-encoding" not in identity.headers
+    assert identity.content == b"<html>chart</html>"
+    assert cached.status_code == 304
+    assert client.get("/artifacts/s1/missing.html").status_code == 404
+    assert client.get("/artifacts/s1/..%2Fsecret").status_code == 404
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import FrameRegistry, register_frame, set_frame_registry
+from insights_generator.graph import build_batch_runner
+
+
+PROMPTS = [
+    "show me the trend of revenue over time",
+    "show the trend of units",
+    "any anomalies in revenue?",
+    "what is the revenue trend",
+    "help",
+]
+
+
+def build_frame(rows: int = 2_000) -> pd.DataFrame:
+    rng = np.random.default_rng(49)
+    revenue = rng.normal(100.0, 5.0, size=rows)
+    revenue[rows // 2 :] += 30.0
+    return pd.DataFrame(
+        {
+            "revenue": revenue,
+            "units": rng.integers(1, 40, size=rows),
+            "cost": rng.lognormal(2.0, 0.4, size=rows),
+            "region": rng.choice(["north", "south"], size=rows),
+        }
+    )
+
+
+class CountingClient:
+    """Records how many LLM calls are in flight at once."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke_text(self, prompt: str) -> str:
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return ""
+
+
+def test_batch_matches_single_runs_and_shares_charts(tmp_path) -> None:
+    from insights_generator import api
+
+    set_artifact_store(ArtifactStore(tmp_path / "artifacts"))
+    set_frame_registry(FrameRegistry(tmp_path / "frames"))
+    try:
+        client = TestClient(api.app)
+        csv = build_frame().to_csv(index=False).encode("utf-8")
+        batch = client.post(
+            "/analyze/batch",
+            files={"file": ("data.csv", csv, "text/csv")},
+            data={"prompts": PROMPTS},
+        ).json()
+        singles = [
+            client.post("/analyze", files={"file": ("data.csv", csv, "text/csv")}, data={"user_prompt": prompt}).json()
+            for prompt in PROMPTS
+        ]
+        pending = batch["results"][-1]
+        anomalies = client.get(f"/anomalies/{batch['results'][2]['session_id']}", params={"column": "revenue"})
+        answer = client.post(
+            "/clarify", json={"session_id": pending["session_id"], "clarification": "show the cost distribution"}
+        ).json()
+    finally:
+        set_artifact_store(None)
+        set_frame_registry(None)
+
+    results = batch["results"]
+    assert len(results) == len(PROMPTS)
+    for result, single in zip(results, singles):
+        assert result["needs_clarification"] == single["needs_clarification"]
+        assert result.get("analytics") == single.get("analytics")
+        assert result.get("insights") == single.get("insights")
+        assert [chart["name"] for chart in result.get("visualizations", [])] == [
+            chart["name"] for chart in single.get("visualizations", [])
+        ]
+
+    revenue_trend, units_trend, _, revenue_again, _ = (result.get("visualizations", []) for result in results)
+    assert revenue_trend[0]["json_url"] == revenue_again[0]["json_url"]
+    assert units_trend[0]["json_url"].endswith("/trend-2.json")
+    assert pending["needs_clarification"] is True
+    assert anomalies.status_code == 200 and anomalies.json()["session_id"] == f"{batch['batch_id']}-2"
+    assert anomalies.json()["total"] > 0
+    assert answer["needs_clarification"] is False and answer["analytics"]["row_count"] == 2_000
+
+
+def test_batch_bounds_llm_concurrency(tmp_path) -> None:
+    set_artifact_store(ArtifactStore(tmp_path))
+    chat = CountingClient()
+    run_batch = build_batch_runner(chat, concurrency=2)
+    prompts = [f"show the trend of revenue, take {index}" for index in range(6)]
+    try:
+        states = run_batch("batch", register_frame(build_frame(), owner="batch"), prompts)
+    finally:
+        set_artifact_store(None)
+
+    # One intent and one insight call per prompt, never more than two at a time.
+    assert chat.calls == 2 * len(prompts)
+    assert chat.peak == 2
+    assert all(state["execution_plan"]["charts"] == ["trend"] for state in states)
+    assert len({state["visualizations"][0]["json_url"] for state in states}) == 1
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from insights_generator.model_router import CoalescingClient, ainvoke_text
+
+
+class SlowCountingClient:
+    def __init__(self, delay_seconds: float = 0.2) -> None:
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke_text(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay_seconds)
+        return f"answer:{prompt}"
+
+
+class ExplodingClient:
+    def invoke_text(self, prompt: str) -> str:
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+
+def test_concurrent_identical_sync_calls_share_one_provider_call() -> None:
+    inner = SlowCountingClient()
+    client = CoalescingClient(inner=inner, model_name="m", temperature=0.0)
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(client.invoke_text, ["same prompt"] * 50))
+
+    assert inner.calls == 1
+    assert set(results) == {"answer:same prompt"}
+    stats = client.stats()
+    assert stats["requests"] == 50
+    assert stats["coalesced"] == 49
+    assert stats["in_flight"] == 0
+
+
+def test_async_callers_coalesce_with_each_other() -> None:
+    inner = SlowCountingClient()
+    client = CoalescingClient(inner=inner)
+
+    async def run() -> list[str]:
+        return await asyncio.gather(*[ainvoke_text(client, "p") for _ in range(20)])
+
+    results = asyncio.run(run())
+
+    assert inner.calls == 1
+    assert results == ["answer:p"] * 20
+    assert client.stats()["coalesced"] == 19
+
+
+def test_distinct_prompts_are_not_coalesced() -> None:
+    inner = SlowCountingClient(delay_seconds=0.05)
+    client = CoalescingClient(inner=inner)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(client.invoke_text, ["a", "b", "a", "b"]))
+
+    assert inner.calls == 2
+    assert results == ["answer:a", "answer:b", "answer:a", "answer:b"]
+
+
+def test_leader_exception_is_shared_with_followers() -> None:
+    client = CoalescingClient(inner=ExplodingClient())
+
+    def call(_: int) -> str:
+        try:
+            client.invoke_text("p")
+            return "ok"
+        except RuntimeError as exc:
+            return str(exc)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(call, range(5)))
+
+    assert results == ["boom"] * 5
+    assert client.stats()["in_flight"] == 0
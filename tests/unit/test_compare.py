@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from insights_generator.analytics.compare import compare_profiles
+from insights_generator.analytics.incremental import IncrementalAnalytics
+from insights_generator.profile_store import PROFILE_STORE
+
+
+def weeks(rows: int = 300) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(21)
+    last_week = pd.DataFrame(
+        {"revenue": rng.normal(100, 10, rows), "cost": rng.normal(50, 5, rows), "region": ["a", "b", "c"] * (rows // 3)}
+    )
+    this_week = pd.DataFrame(
+        {"revenue": rng.normal(130, 10, rows), "cost": rng.normal(50, 5, rows), "units": rng.poisson(4, rows)}
+    )
+    return last_week, this_week
+
+
+def exact_ks(a: np.ndarray, b: np.ndarray) -> float:
+    grid = np.sort(np.concatenate([a, b]))
+    cdf_a = np.searchsorted(np.sort(a), grid, side="right") / a.size
+    cdf_b = np.searchsorted(np.sort(b), grid, side="right") / b.size
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def test_compare_profiles_flags_shifted_columns_only() -> None:
+    last_week, this_week = weeks()
+
+    comparison = compare_profiles(
+        IncrementalAnalytics.from_dataframe(last_week), IncrementalAnalytics.from_dataframe(this_week)
+    )
+    revenue, cost = comparison["columns"]["revenue"], comparison["columns"]["cost"]
+
+    assert comparison["shifted_columns"] == ["revenue"]
+    assert revenue["shift"] == "major" and cost["shift"] == "none"
+    assert revenue["mean"]["delta"] == this_week["revenue"].mean() - last_week["revenue"].mean()
+    assert revenue["quantiles"]["p50"]["current"] == this_week["revenue"].median()
+    assert revenue["anomaly_rate"]["current_vs_baseline_fences"] > 0.3
+    # Sketches under the compression limit are exact, so KS matches the textbook statistic.
+    assert abs(revenue["ks"] - exact_ks(last_week["revenue"].to_numpy(), this_week["revenue"].to_numpy())) < 1e-9
+    assert abs(cost["ks"] - exact_ks(last_week["cost"].to_numpy(), this_week["cost"].to_numpy())) < 1e-9
+    assert comparison["added_columns"] == ["units"] and comparison["removed_columns"] == ["region"]
+    assert comparison["row_count"] == {"baseline": 300, "current": 300, "delta": 0}
+
+
+def test_compare_endpoint_reuses_dataset_and_upload_stats() -> None:
+    from insights_generator.api import app
+
+    last_week, this_week = weeks()
+    client = TestClient(app)
+    PROFILE_STORE.clear()
+    dataset_id = client.post(
+        "/datasets", files={"file": ("last.csv", last_week.to_csv(index=False).encode(), "text/csv")}
+    ).json()["dataset_id"]
+    upload = {"current_file": ("this.csv", this_week.to_csv(index=False).encode(), "text/csv")}
+
+    first = client.post("/compare", data={"baseline_dataset_id": dataset_id}, files=upload).json()
+    second = client.post("/compare", data={"baseline_dataset_id": dataset_id}, files=upload).json()
+
+    assert first["baseline"]["stats"] == "cached" and first["baseline"]["source"] == "dataset"
+    assert first["current"]["stats"] == "computed"
+    assert second["current"]["stats"] == "cached"
+    assert second["comparison"] == first["comparison"]
+    assert first["comparison"]["shifted_columns"] == ["revenue"]
+    assert "revenue: major distribution shift" in first["insights"]
+
+
+def test_compare_requires_exactly_one_source_per_side() -> None:
+    from insights_generator.api import app
+
+    client = TestClient(app)
+    csv = {"baseline_file": ("a.csv", b"revenue\n1\n2\n", "text/csv")}
+
+    neither = client.post("/compare", files=csv)
+    both = client.post("/compare", data={"baseline_dataset_id": "x"}, files=csv)
+    missing = client.post("/compare", data={"baseline_dataset_id": "nope", "current_dataset_id": "nope"})
+
+    assert neither.status_code == 400 and "current_file" in neither.json()["detail"]
+    assert both.status_code == 400
+    assert missing.status_code == 404
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights_generator.analytics.correlation import correlation_matrix, top_correlated_pairs
+
+
+def build_frame(rows: int = 500, noise_cols: int = 12) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    base = rng.normal(size=rows)
+    data = {f"noise_{i}": rng.normal(size=rows) for i in range(noise_cols)}
+    data["driver"] = base
+    data["linear"] = 3 * base + rng.normal(scale=0.1, size=rows)
+    data["monotone"] = np.exp(base)
+    data["inverse"] = -base + rng.normal(scale=0.5, size=rows)
+    return pd.DataFrame(data)
+
+
+def test_matrix_matches_pandas_pairwise_pearson_with_missing_values() -> None:
+    df = build_frame()
+    df.loc[df.index[::7], "linear"] = np.nan
+    df.loc[df.index[::11], "driver"] = np.nan
+    columns = ["driver", "linear", "inverse", "noise_0"]
+
+    ours = correlation_matrix(df, columns)
+
+    assert ours == pytest.approx(df[columns].corr().to_numpy(), abs=1e-4)
+
+
+def test_top_pairs_are_identical_across_block_sizes() -> None:
+    df = build_frame()
+    columns = df.columns.tolist()
+
+    unblocked = top_correlated_pairs(df, columns, top_k=5, block_size=len(columns))
+    blocked = top_correlated_pairs(df, columns, top_k=5, block_size=3)
+
+    assert blocked["top_pairs"] == unblocked["top_pairs"]
+
+
+def test_top_pairs_rank_strongest_relationships_and_report_spearman() -> None:
+    df = build_frame()
+
+    result = top_correlated_pairs(df, df.columns.tolist(), top_k=4, min_abs=0.5)
+    pairs = {(pair["x"], pair["y"]): pair for pair in result["top_pairs"]}
+
+    assert result["columns_considered"] == 16
+    assert len(result["top_pairs"]) <= 4
+    assert pairs[("driver", "linear")]["pearson"] == pytest.approx(df["driver"].corr(df["linear"]), abs=1e-4)
+    assert pairs[("driver", "monotone")]["spearman"] == pytest.approx(1.0)
+    assert pairs[("driver", "monotone")]["pearson"] < 0.9
+    assert all(not pair["x"].startswith("noise") for pair in result["top_pairs"])
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.agents.analytics_agent import run_analytics_agent
+from insights_generator.agents.planner_agent import METRIC_GROUPS, build_execution_plan
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import register_frame
+from insights_generator.graph import build_graph
+from insights_generator.model_router import HeuristicClient
+
+
+NUMERIC = ["revenue", "cost", "units"]
+
+
+def build_frame(rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    return pd.DataFrame(
+        {
+            "revenue": rng.normal(100, 10, rows),
+            "cost": rng.normal(50, 5, rows),
+            "units": rng.poisson(12, rows),
+            "segment": rng.choice(["a", "b"], rows),
+        }
+    )
+
+
+def test_trend_request_for_one_column_is_minimal() -> None:
+    plan = build_execution_plan(
+        {"requested_focus": ["trend"], "visualization_preferences": ["line"], "column_hints": ["show", "Revenue"]},
+        NUMERIC,
+    )
+
+    assert plan == {
+        "columns": ["revenue"],
+        "primary_column": "revenue",
+        "metrics": ["summary", "rolling"],
+        "charts": ["trend"],
+        "pruned": True,
+    }
+
+
+def test_summary_keeps_full_plan_and_correlations_keep_partner_columns() -> None:
+    summary = build_execution_plan({"requested_focus": ["summary"], "column_hints": []}, NUMERIC)
+    correlation = build_execution_plan({"requested_focus": ["correlation"], "column_hints": ["cost"]}, NUMERIC)
+
+    assert summary["metrics"] == list(METRIC_GROUPS) and not summary["pruned"]
+    assert correlation["columns"] == NUMERIC
+    assert correlation["primary_column"] == "cost"
+    assert correlation["charts"] == ["correlation"]
+
+
+def test_analytics_agent_skips_unplanned_work() -> None:
+    state = {
+        "dataset": register_frame(build_frame()),
+        "execution_plan": build_execution_plan({"requested_focus": ["trend"], "column_hints": ["units"]}, NUMERIC),
+    }
+
+    analytics = run_analytics_agent(state)["analytics"]
+
+    assert list(analytics["numeric_analytics"]) == ["units"]
+    assert "skew" not in analytics["numeric_analytics"]["units"]
+    assert "anomalies" not in analytics and "correlations" not in analytics
+    assert analytics["anomaly_summary"] == {}
+
+
+def test_graph_renders_only_planned_charts(tmp_path) -> None:
+    set_artifact_store(ArtifactStore(tmp_path))
+    try:
+        result = build_graph(HeuristicClient()).invoke(
+            {
+                "session_id": "plan-test",
+                "dataset": register_frame(build_frame()),
+                "user_prompt": "show me the trend of revenue over time",
+            }
+        )
+    finally:
+        set_artifact_store(None)
+
+    assert result["execution_plan"]["charts"] == ["trend"]
+    assert [chart["name"] for chart in result["visualizations"]] == ["trend"]
+    assert "Generated visualizations: trend." in result["insights"]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import FrameRegistry, set_frame_registry
+
+
+def build_frame(rows: int = 1_000) -> pd.DataFrame:
+    rng = np.random.default_rng(48)
+    return pd.DataFrame(
+        {
+            "revenue": rng.lognormal(mean=3.0, sigma=0.5, size=rows),
+            "units": rng.integers(1, 50, size=rows),
+            "region": rng.choice(["north", "south"], size=rows),
+        }
+    )
+
+
+def test_persisted_handle_resolves_in_another_registry(tmp_path) -> None:
+    df = build_frame()
+    registry = FrameRegistry(tmp_path)
+    handle = registry.register(df, owner="session")
+
+    path = registry.persist(handle)
+    other = FrameRegistry(tmp_path)
+
+    assert path is not None and path.is_file()
+    pd.testing.assert_frame_equal(other.resolve(handle), df)
+    # The persisted copy's numeric columns are views over the mapped file.
+    assert not other.resolve(handle)["revenue"].to_numpy().flags.owndata
+    registry.release("session")
+    assert not path.exists()
+    with pytest.raises(KeyError):
+        registry.resolve(handle)
+    with pytest.raises(KeyError):
+        registry.resolve("../../etc/passwd")
+
+
+def test_clarify_resumes_from_checkpoint_with_spilled_frame(tmp_path) -> None:
+    from insights_generator import api
+
+    set_artifact_store(ArtifactStore(tmp_path / "artifacts"))
+    registry = FrameRegistry(tmp_path / "frames")
+    set_frame_registry(registry)
+    try:
+        client = TestClient(api.app)
+        csv = build_frame().to_csv(index=False).encode("utf-8")
+        first = client.post("/analyze", files={"file": ("data.csv", csv, "text/csv")}, data={"user_prompt": "help"}).json()
+        session_id = first["session_id"]
+        thread = {"configurable": {"thread_id": session_id}}
+        pending = api.graph.get_state(thread).values
+        spilled = list((tmp_path / "frames").glob("*.arrow"))
+
+        answer = client.post("/clarify", json={"session_id": session_id, "clarification": "show the revenue trend"}).json()
+        resumed = api.graph.get_state(thread).values
+    finally:
+        set_artifact_store(None)
+        set_frame_registry(None)
+
+    assert first["needs_clarification"] is True
+    assert pending["user_prompt"] == "help" and pending["dataset"].startswith("frame-")
+    assert [path.stem for path in spilled] == [pending["dataset"]]
+    assert answer["needs_clarification"] is False
+    assert answer["analytics"]["row_count"] == 1_000
+    assert "trend" in [chart["name"] for chart in answer["visualizations"]]
+    # Finished runs drop their checkpoints, spilled frame and registry entries.
+    assert resumed == {}
+    assert list((tmp_path / "frames").glob("*.arrow")) == []
+    assert registry.stats() == {"frames": 0, "owners": 0}
+
+
+def test_clarify_without_checkpoint_starts_a_fresh_run(tmp_path) -> None:
+    from insights_generator import api
+
+    set_artifact_store(ArtifactStore(tmp_path / "artifacts"))
+    set_frame_registry(FrameRegistry(tmp_path / "frames"))
+    try:
+        client = TestClient(api.app)
+        csv = build_frame().to_csv(index=False).encode("utf-8")
+        first = client.post("/analyze", files={"file": ("data.csv", csv, "text/csv")}, data={"user_prompt": "help"}).json()
+        # As after a restart: the handle's spill file survives, the checkpoint does not.
+        api.checkpointer.delete_thread(first["session_id"])
+        set_frame_registry(FrameRegistry(tmp_path / "frames"))
+
+        answer = client.post(
+            "/clarify", json={"session_id": first["session_id"], "clarification": "show the revenue trend"}
+        ).json()
+    finally:
+        set_artifact_store(None)
+        set_frame_registry(None)
+
+    assert answer["needs_clarification"] is False
+    assert answer["analytics"]["row_count"] == 1_000
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights_generator.agents.analytics_agent import _numeric_column_analytics
+from insights_generator.analytics.incremental import IncrementalAnalytics
+from insights_generator.analytics.moments import QuantileSketch, RunningMoments
+
+
+def test_merged_moments_match_single_pass() -> None:
+    rng = np.random.default_rng(7)
+    a = rng.lognormal(size=500)
+    b = rng.lognormal(mean=1.0, size=300)
+
+    merged = RunningMoments.from_values(a).merge(RunningMoments.from_values(b))
+    full = pd.Series(np.concatenate([a, b]))
+
+    assert merged.count == 800
+    assert merged.mean == pytest.approx(full.mean())
+    assert merged.variance == pytest.approx(full.var(ddof=0))
+    assert merged.skew == pytest.approx(full.skew())
+
+
+def test_small_appends_reproduce_pandas_analytics_exactly() -> None:
+    first = pd.DataFrame({"revenue": [1.0, 3.0, 4.0, 100.0], "region": ["a", "b", "a", "c"]})
+    second = pd.DataFrame({"revenue": [2.0, 5.0, np.nan, 3.0], "region": ["b", "b", "c", "a"]})
+    combined = pd.concat([first, second], ignore_index=True)
+
+    state = IncrementalAnalytics.from_dataframe(first)
+    state.update(second)
+    analytics = state.to_analytics()
+
+    expected = _numeric_column_analytics(combined, "revenue")
+    actual = analytics["numeric_analytics"]["revenue"]
+    assert analytics["row_count"] == 8
+    assert analytics["categorical_columns"] == ["region"]
+    for key in ("count", "mean", "median", "std", "variance", "skew", "iqr", "anomaly_count", "min", "max"):
+        assert actual[key] == pytest.approx(expected[key]), key
+    assert actual["iqr_bounds"] == pytest.approx(expected["iqr_bounds"])
+    assert actual["anomaly_examples"] == expected["anomaly_examples"]
+    assert actual["mode"] == [3.0]
+
+
+def test_sketch_quantiles_stay_close_on_large_appends() -> None:
+    rng = np.random.default_rng(11)
+    chunks = [rng.normal(loc=50, scale=10, size=20_000) for _ in range(5)]
+    sketch = QuantileSketch()
+    for chunk in chunks:
+        sketch.update(chunk)
+    values = np.concatenate(chunks)
+
+    estimated = sketch.quantile([0.25, 0.5, 0.75], values.min(), values.max())
+
+    assert sketch.means.size < 400
+    assert estimated == pytest.approx(np.quantile(values, [0.25, 0.5, 0.75]), rel=5e-3)
+
+
+def test_append_with_mismatched_columns_is_rejected() -> None:
+    state = IncrementalAnalytics.from_dataframe(pd.DataFrame({"revenue": [1.0, 2.0]}))
+
+    with pytest.raises(ValueError, match="missing"):
+        state.update(pd.DataFrame({"cost": [1.0]}))
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+
+from insights_generator.agents.intent_agent import build_intent_agent
+from insights_generator.intent_cache import IntentCache, set_intent_cache, vectorize
+from insights_generator.model_router import llm_call_context
+
+
+ANOMALY_INTENT = {
+    "requested_focus": ["anomaly"],
+    "visualization_preferences": ["scatter"],
+    "needs_clarification": False,
+    "clarification_question": "",
+}
+
+
+class CountingClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke_text(self, prompt: str) -> str:
+        self.calls += 1
+        return json.dumps(ANOMALY_INTENT)
+
+
+def test_paraphrases_hit_and_different_requests_miss() -> None:
+    cache = IntentCache(max_entries=8, threshold=0.85)
+    cache.put("show anomalies in revenue", ANOMALY_INTENT, namespace="v1")
+
+    paraphrase = cache.lookup("Revenue outliers please", namespace="v1")
+    typo = cache.lookup("show anomalies in revenu", namespace="v1")
+
+    assert paraphrase is not None and paraphrase.intent == ANOMALY_INTENT
+    assert typo is not None and 0.85 <= typo.similarity < 1.0
+    assert cache.lookup("show the revenue trend", namespace="v1") is None
+    assert cache.lookup("revenue outliers please", namespace="v2") is None
+    assert abs(float(vectorize("anything") @ vectorize("anything")) - 1.0) < 1e-5
+
+
+def test_long_requests_differing_only_in_focus_miss() -> None:
+    cache = IntentCache(max_entries=8, threshold=0.85)
+    request = "show the weekly {} for enterprise customers in the north america region during fiscal 2024"
+    cache.put(request.format("revenue variance"), {"requested_focus": ["variance"]})
+
+    # The n-gram vectors alone are close enough to match.
+    assert float(vectorize(request.format("revenue trend")) @ vectorize(request.format("revenue variance"))) > 0.85
+    assert cache.lookup(request.format("revenue trend")) is None
+    assert cache.lookup(request.format("revenue volatility")) is not None
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used() -> None:
+    cache = IntentCache(max_entries=2)
+    cache.put("trend of revenue", {"requested_focus": ["trend"]})
+    cache.put("variance of cost", {"requested_focus": ["variance"]})
+    assert cache.lookup("revenue trend") is not None
+
+    cache.put("correlations between units and cost", {"requested_focus": ["correlation"]})
+
+    assert len(cache) == 2
+    assert cache.lookup("variance of cost") is None
+    assert cache.lookup("trend of revenue") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_intent_agent_skips_llm_for_cached_paraphrase() -> None:
+    client = CountingClient()
+    set_intent_cache(IntentCache(max_entries=16))
+    try:
+        agent = build_intent_agent(client, {})
+        first = agent({"user_prompt": "show anomalies in revenue"})
+        second = agent({"user_prompt": "cost outliers please", "clarification": ""})
+        third = agent({"user_prompt": "spikes in cost"})
+    finally:
+        set_intent_cache(None)
+
+    assert client.calls == 2
+    assert "cache" not in first["intent"] and "cache" not in second["intent"]
+    assert third["intent"]["requested_focus"] == ["anomaly"]
+    assert set(third["intent"]["cache"]) == {"similarity"}
+    assert third["intent"]["column_hints"] == ["spikes", "in", "cost"]
+
+
+def test_intent_cache_is_scoped_per_tenant() -> None:
+    client = CountingClient()
+    set_intent_cache(IntentCache(max_entries=16))
+    try:
+        agent = build_intent_agent(client, {})
+        with llm_call_context("interactive", "acme"):
+            agent({"user_prompt": "show anomalies in revenue"})
+            repeat = agent({"user_prompt": "show anomalies in revenue"})
+        with llm_call_context("interactive", "globex"):
+            other = agent({"user_prompt": "show anomalies in revenue"})
+    finally:
+        set_intent_cache(None)
+
+    assert "cache" in repeat["intent"]
+    assert "cache" not in other["intent"]
+    assert client.calls == 2
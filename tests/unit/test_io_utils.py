@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gzip
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+from starlette.datastructures import UploadFile
+
+from insights_generator.io_utils import SchemaCache, load_dataframe_from_upload, read_csv_table, source_key
+
+
+CSV = b"revenue,segment,note\n10.5,a,\n12.0,b,x\n9.25,a,y\n"
+
+
+def upload(data: bytes, filename: str) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def zstd_compress(data: bytes) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(sink, "zstd") as stream:
+        stream.write(data)
+    return sink.getvalue().to_pybytes()
+
+
+def test_compressed_csv_is_detected_from_magic_bytes() -> None:
+    expected = pd.read_csv(io.BytesIO(CSV))
+
+    for data in (gzip.compress(CSV), zstd_compress(CSV)):
+        # Misleading extension on purpose: the content decides.
+        frame = load_dataframe_from_upload(upload(data, "vendor_feed.bin"))
+        pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_parquet_without_extension_and_gzipped_parquet() -> None:
+    expected = pd.DataFrame({"revenue": [1.0, 2.0, 3.0], "segment": ["a", "b", "a"]})
+    buffer = io.BytesIO()
+    expected.to_parquet(buffer, index=False)
+
+    plain = load_dataframe_from_upload(upload(buffer.getvalue(), "export"))
+    packed = load_dataframe_from_upload(upload(gzip.compress(buffer.getvalue()), "export.gz"))
+
+    pd.testing.assert_frame_equal(plain, expected)
+    pd.testing.assert_frame_equal(packed, expected)
+
+
+def test_schema_cache_reuses_types_and_reinfers_on_mismatch() -> None:
+    cache = SchemaCache()
+    key = source_key("sales_2024-05-01.csv.gz")
+    assert key == source_key("sales_2024-05-02.csv")
+
+    first = read_csv_table(io.BytesIO(b"units\n1\n2\n"), source=key, cache=cache)
+    assert first.schema.field("units").type == pa.int64()
+
+    second = read_csv_table(io.BytesIO(b"units\n3\n4\n"), source=key, cache=cache)
+    assert cache.stats()["hits"] == 1
+    assert second.schema.field("units").type == pa.int64()
+
+    drifted = read_csv_table(io.BytesIO(b"units\n3.5\n4\n"), source=key, cache=cache)
+    assert drifted.schema.field("units").type == pa.float64()
+    assert cache.get(key)["units"] == pa.float64()
+
+
+def test_cached_string_type_does_not_hide_numeric_column() -> None:
+    cache = SchemaCache()
+    read_csv_table(io.BytesIO(b"units,region\nunknown,north\n2,south\n"), source="sales", cache=cache)
+    assert cache.get("sales")["units"] == pa.string()
+
+    numeric = read_csv_table(io.BytesIO(b"units,region\n3,north\n4,south\n"), source="sales", cache=cache)
+
+    assert numeric.schema.field("units").type == pa.int64()
+    assert numeric.schema.field("region").type == pa.string()
+    assert cache.get("sales")["units"] == pa.int64()
+
+
+def test_binary_garbage_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        load_dataframe_from_upload(upload(b"\x00\x01\x02\x03binary", "data.csv"))
+
+
+def mapped_path(address: int) -> str:
+    with open("/proc/self/maps", encoding="utf-8") as maps:
+        for line in maps:
+            parts = line.split(maxsplit=5)
+            low, high = (int(value, 16) for value in parts[0].split("-"))
+            if low <= address < high:
+                return parts[5].strip() if len(parts) > 5 else ""
+    return ""
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc to inspect mappings")
+def test_arrow_upload_is_memory_mapped_zero_copy(tmp_path) -> None:
+    table = pa.table({"revenue": np.arange(50_000, dtype=np.float64), "segment": ["a", "b"] * 25_000})
+    sink = io.BytesIO()
+    feather.write_feather(table, sink, compression="uncompressed")
+
+    frame = load_dataframe_from_upload(upload(sink.getvalue(), "export.bin"), spool_dir=str(tmp_path))
+
+    address = frame["revenue"].to_numpy().__array_interface__["data"][0]
+    assert str(tmp_path) in mapped_path(address)
+    assert list(tmp_path.iterdir()) == []
+    assert frame["revenue"].sum() == table.column("revenue").to_numpy().sum()
+
+
+def test_arrow_stream_and_compressed_feather_uploads() -> None:
+    expected = pd.DataFrame({"units": [1, 2, 3], "segment": ["a", "b", "a"]})
+    table = pa.Table.from_pandas(expected, preserve_index=False)
+
+    stream = pa.BufferOutputStream()
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+    file_sink = io.BytesIO()
+    feather.write_feather(table, file_sink)
+
+    from_stream = load_dataframe_from_upload(upload(stream.getvalue().to_pybytes(), "batch"))
+    from_gzip = load_dataframe_from_upload(upload(gzip.compress(file_sink.getvalue()), "batch.feather.gz"))
+
+    pd.testing.assert_frame_equal(from_stream, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(from_gzip, expected, check_dtype=False)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import io
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.job_queue import JobQueue, JobWorkerPool, set_job_queue
+
+
+CSV = b"revenue,cost,segment\n10,4,a\n12,5,b\n9,3,a\n30,7,b\n11,4,a\n"
+
+
+def wait_for(predicate, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("condition not met in time")
+
+
+def test_submit_claim_complete_round_trip(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool")
+    job_id = queue.submit(io.BytesIO(CSV), "data.csv", {"user_prompt": "revenue"})
+
+    job = queue.claim("w1")
+    assert job is not None and job.id == job_id
+    assert job.status == "running"
+    assert open(job.input_path, "rb").read() == CSV
+    assert queue.claim("w2") is None
+
+    queue.update_stage(job_id, "w1", "analytics")
+    assert queue.get(job_id).stage == "analytics"
+
+    assert queue.complete(job_id, "w1", {"insights": "ok"})
+    done = queue.get(job_id)
+    assert done.status == "complete"
+    assert done.attempts == 1
+    assert done.result == {"insights": "ok"}
+    assert not (tmp_path / "spool" / job_id).exists()
+    assert queue.stats()["complete"] == 1
+
+
+def test_expired_lease_is_reclaimed_after_restart(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", lease_seconds=0.05)
+    job_id = queue.submit(io.BytesIO(CSV), "data.csv", {})
+    assert queue.claim("crashed-worker").id == job_id
+
+    time.sleep(0.1)
+    restarted = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", lease_seconds=0.05)
+    reclaimed = restarted.claim("new-worker")
+    assert reclaimed is not None and reclaimed.id == job_id
+    assert reclaimed.attempts == 2
+    # The crashed worker's lease is gone: it can no longer finish the job.
+    assert not restarted.complete(job_id, "crashed-worker", {"insights": "stale"})
+    assert not restarted.fail(job_id, "crashed-worker", "stale")
+    assert restarted.complete(job_id, "new-worker", {"insights": "ok"})
+    assert restarted.get(job_id).result == {"insights": "ok"}
+
+
+def test_job_fails_after_max_attempts_and_finished_jobs_are_purged(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", lease_seconds=0.05, max_attempts=2)
+    job_id = queue.submit(io.BytesIO(CSV), "data.csv", {})
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker).id == job_id
+        time.sleep(0.1)
+
+    assert queue.claim("w3") is None
+    failed = queue.get(job_id)
+    assert failed.status == "failed" and failed.attempts == 2
+    assert failed.error == "Gave up after 2 attempts."
+    assert not (tmp_path / "spool" / job_id).exists()
+
+    kept = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", result_ttl_seconds=3600)
+    assert kept.purge() == 0
+    expiring = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", result_ttl_seconds=0.01)
+    time.sleep(0.05)
+    assert expiring.purge() == 1
+    assert expiring.get(job_id) is None
+
+
+def test_worker_pool_records_failures(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool")
+
+    def runner(job, on_stage):
+        on_stage("boom")
+        raise RuntimeError("bad input")
+
+    pool = JobWorkerPool(queue, runner, concurrency=1, poll_interval_seconds=0.01)
+    job_id = queue.submit(io.BytesIO(CSV), "data.csv", {})
+    pool.start()
+    try:
+        job = wait_for(lambda: (queue.get(job_id) if queue.get(job_id).status == "failed" else None))
+    finally:
+        pool.stop()
+    assert job.error == "bad input"
+
+
+def test_worker_survives_an_unrecordable_result(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", lease_seconds=0.1)
+    attempts = []
+
+    def runner(job, on_stage):
+        attempts.append(job.attempts)
+        # The first result cannot be serialized, so it cannot be recorded.
+        return {"insights": object()} if len(attempts) == 1 else {"insights": "ok"}
+
+    pool = JobWorkerPool(queue, runner, concurrency=1, poll_interval_seconds=0.01)
+    job_id = queue.submit(io.BytesIO(CSV), "data.csv", {})
+    pool.start()
+    try:
+        job = wait_for(lambda: (queue.get(job_id) if queue.get(job_id).status == "complete" else None))
+    finally:
+        pool.stop()
+    assert attempts == [1, 2]
+    assert job.result == {"insights": "ok"}
+
+
+@pytest.fixture
+def job_client(tmp_path):
+    set_artifact_store(ArtifactStore(tmp_path / "artifacts"))
+    set_job_queue(JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool"))
+    from insights_generator.api import app
+
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        set_job_queue(None)
+        set_artifact_store(None)
+
+
+def test_analyze_job_mode_runs_in_background(job_client) -> None:
+    response = job_client.post(
+        "/analyze",
+        files={"file": ("data.csv", CSV, "text/csv")},
+        data={"user_prompt": "Explain revenue and cost", "mode": "job", "fields": "insights"},
+    )
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "queued"
+
+    job = wait_for(lambda: (lambda j: j if j["status"] in ("complete", "failed") else None)(
+        job_client.get(body["status_url"]).json()
+    ))
+    assert job["status"] == "complete", job
+    assert job["result"]["session_id"] == body["job_id"]
+    assert "insights" in job["result"]
+    assert "analytics" not in job["result"]
+
+    metrics = job_client.get("/metrics").json()
+    assert metrics["jobs"]["complete"] == 1
+    assert job_client.get("/jobs/missing").status_code == 404
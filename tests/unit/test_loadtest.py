@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+
+from insights_generator.loadtest.fake_llm import FakeLLMServer
+from insights_generator.loadtest.runner import RequestResult, percentiles, summarize
+
+
+def _chat(base_url: str, prompt: str) -> httpx.Response:
+    return httpx.post(
+        f"{base_url}/chat/completions",
+        json={"model": "fake", "messages": [{"role": "user", "content": prompt}]},
+        timeout=5.0,
+    )
+
+
+def test_fake_llm_answers_intent_and_insight_prompts() -> None:
+    with FakeLLMServer(latency_ms=0, jitter_ms=0) as server:
+        vague = _chat(server.base_url, "You are an intent parser.\nUser request: 'analyze'")
+        specific = _chat(server.base_url, "You are an intent parser.\nUser request: 'show the revenue trend by region'")
+        insight = _chat(server.base_url, "Write insights for these analytics")
+
+    vague_intent = json.loads(vague.json()["choices"][0]["message"]["content"])
+    specific_intent = json.loads(specific.json()["choices"][0]["message"]["content"])
+    assert vague_intent["needs_clarification"] is True
+    assert specific_intent["needs_clarification"] is False
+    assert "fake-llm" in insight.json()["choices"][0]["message"]["content"]
+    assert server.stats() == {"calls": 3, "errors": 0}
+
+
+def test_fake_llm_injects_errors_at_configured_rate() -> None:
+    with FakeLLMServer(latency_ms=0, jitter_ms=0, error_rate=1.0) as server:
+        response = _chat(server.base_url, "anything")
+
+    assert response.status_code == 500
+    assert server.stats() == {"calls": 1, "errors": 1}
+
+
+def test_summary_reports_percentiles_throughput_and_rss() -> None:
+    results = [RequestResult("/analyze", 200, float(ms), 0.0) for ms in range(1, 101)]
+    results.append(RequestResult("/clarify", 503, 40.0, 0.0))
+
+    report = summarize(results, duration_seconds=10.0, rss_samples=[(0.0, 100), (0.5, 300), (1.0, 200)])
+
+    assert percentiles([5.0]) == {"p50": 5.0, "p90": 5.0, "p95": 5.0, "p99": 5.0}
+    analyze = report["endpoints"]["/analyze"]
+    assert analyze["latency_ms"]["p50"] == 50.0 and analyze["latency_ms"]["p99"] == 99.0
+    assert analyze["throughput_rps"] == 10.0
+    assert report["endpoints"]["/clarify"] == {**report["endpoints"]["/clarify"], "ok": 0, "statuses": {"503": 1}}
+    assert report["rss"]["peak_bytes"] == 300 and report["rss"]["final_bytes"] == 200
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights_generator.agents.analytics_agent import run_analytics_agent
+from insights_generator.agents.visualization_agent import run_visualization_agent
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import register_frame
+from insights_generator.mcp_charts import build_chart_specs
+from insights_generator.mcp_pool import MCPCallTimeout, MCPSessionPool, set_mcp_pool
+
+
+class StandInMCPServer:
+    """Local streamable-HTTP MCP server whose ``render_chart`` tool turns specs into Plotly figures.
+
+    Tool calls for charts listed in ``stream_charts`` are answered as an SSE stream.
+    """
+
+    def __init__(self, delays: dict[str, float] | None = None, stream_charts: tuple[str, ...] = ()) -> None:
+        self.delays = delays or {}
+        self.stream_charts = stream_charts
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls: list[dict] = []
+        self.sessions: set[str] = set()
+        self.initialized = 0
+        self.deleted: list[str] = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers=()) -> None:
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in headers:
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+            def do_DELETE(self) -> None:  # noqa: N802
+                with server._lock:
+                    server.deleted.append(self.headers.get("Mcp-Session-Id", ""))
+                    server.sessions.discard(self.headers.get("Mcp-Session-Id", ""))
+                self._send(200)
+
+            def do_POST(self) -> None:  # noqa: N802
+                message = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if message["method"] == "initialize":
+                    session_id = uuid.uuid4().hex
+                    with server._lock:
+                        server.sessions.add(session_id)
+                        server.initialized += 1
+                    result = {"protocolVersion": message["params"]["protocolVersion"], "capabilities": {"tools": {}}}
+                    body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}).encode("utf-8")
+                    self._send(200, body, headers=[("Mcp-Session-Id", session_id)])
+                    return
+                if self.headers.get("Mcp-Session-Id") not in server.sessions:
+                    self._send(404)
+                    return
+                if "id" not in message:
+                    self._send(202)
+                    return
+                reply = {"jsonrpc": "2.0", "id": message["id"], **server._handle(message["params"])}
+                if message["params"].get("arguments", {}).get("spec", {}).get("chart") in server.stream_charts:
+                    progress = {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}}
+                    events = "".join(f"data: {json.dumps(item)}\n\n" for item in (progress, reply))
+                    self._send(200, events.encode("utf-8"), "text/event-stream")
+                    return
+                self._send(200, json.dumps(reply).encode("utf-8"))
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/mcp"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def _handle(self, params: dict) -> dict:
+        with self._lock:
+            self.calls.append(params)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if params["name"] != "render_chart":
+                return {"error": {"code": -32602, "message": f"unknown tool {params['name']}"}}
+            spec = params["arguments"]["spec"]
+            time.sleep(self.delays.get(spec["chart"], 0.05))
+            if spec["type"] == "invalid":
+                return {"result": {"content": [{"type": "text", "text": "bad spec"}], "isError": True}}
+            figure = {"data": [{"type": spec["type"]}], "layout": {"title": {"text": spec["chart"]}}}
+            return {"result": {"content": [{"type": "text", "text": json.dumps(figure)}], "structuredContent": figure}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def expire_sessions(self) -> None:
+        with self._lock:
+            self.sessions.clear()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StandInMCPServer(delays={"trend": 2.0}, stream_charts=("variance",))
+    yield server
+    server.close()
+
+
+def build_frame(rows: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(9)
+    base = rng.normal(100, 10, rows)
+    return pd.DataFrame({"revenue": base, "cost": base * 0.6 + rng.normal(0, 1, rows)})
+
+
+def test_specs_are_aggregated_not_raw_rows() -> None:
+    df = build_frame(200_000)
+    analytics = run_analytics_agent({"session_id": "spec", "dataset": register_frame(df)})["analytics"]
+    plan = {"columns": ["revenue", "cost"], "primary_column": "revenue", "charts": ["distribution", "trend", "variance", "correlation"]}
+
+    specs = build_chart_specs(df, analytics, plan)
+
+    assert [spec["chart"] for spec in specs] == plan["charts"]
+    assert sum(specs[0]["counts"]) == 200_000
+    assert len(specs[1]["y"]) <= 201
+    assert specs[3]["columns"] == ["revenue", "cost"]
+    assert len(json.dumps(specs)) < 20_000
+
+
+def test_pool_keeps_connections_alive_and_surfaces_errors(server: StandInMCPServer) -> None:
+    pool = MCPSessionPool(max_connections_per_server=2, timeout_seconds=1.0)
+    spec = {"chart": "distribution", "type": "histogram"}
+    try:
+        for _ in range(5):
+            assert pool.call_tool(server=server.url, tool_name="render_chart", arguments={"spec": spec})["data"]
+        with pytest.raises(ValueError, match="unknown tool"):
+            pool.call_tool(server=server.url, tool_name="nope", arguments={})
+        with pytest.raises(MCPCallTimeout):
+            pool.call_tool(server=server.url, tool_name="render_chart", arguments={"spec": {"chart": "trend"}}, timeout_seconds=0.2)
+        assert pool.call_tool(server=server.url, tool_name="render_chart", arguments={"spec": spec})["data"]
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    assert server.connections == 2
+    assert stats["opened"] == 2 and stats["reused"] == 6
+    assert stats["failures"] == 1 and stats["timeouts"] == 1
+    assert server.initialized == stats["sessions"] == 1
+    assert server.calls[0] == {"name": "render_chart", "arguments": {"spec": spec}}
+    assert server.deleted and not server.sessions
+
+
+def test_pool_reads_sse_replies_and_reinitializes_expired_sessions(server: StandInMCPServer) -> None:
+    pool = MCPSessionPool(max_connections_per_server=1, timeout_seconds=1.0)
+    try:
+        streamed = pool.call_tool(
+            server=server.url, tool_name="render_chart", arguments={"spec": {"chart": "variance", "type": "box"}}
+        )
+        server.expire_sessions()
+        renewed = pool.call_tool(
+            server=server.url, tool_name="render_chart", arguments={"spec": {"chart": "distribution", "type": "histogram"}}
+        )
+        with pytest.raises(ValueError, match="bad spec"):
+            pool.call_tool(server=server.url, tool_name="render_chart", arguments={"spec": {"chart": "x", "type": "invalid"}})
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    assert streamed["data"] == [{"type": "box"}]
+    assert renewed["layout"]["title"]["text"] == "distribution"
+    assert server.initialized == stats["sessions"] == 2
+    assert stats["failures"] == 1 and stats["opened"] == 1
+
+
+def test_visualization_agent_runs_mcp_charts_concurrently(server: StandInMCPServer, tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("MCP_SERVERS", server.url)
+    monkeypatch.setenv("MCP_CALL_TIMEOUT_SECONDS", "0.5")
+    store = ArtifactStore(tmp_path)
+    set_artifact_store(store)
+    set_mcp_pool(MCPSessionPool(max_connections_per_server=4, timeout_seconds=0.5))
+    try:
+        state = run_analytics_agent({"session_id": "mcp", "dataset": register_frame(build_frame()), "use_mcp": True})
+        charts = run_visualization_agent(state)["visualizations"]
+    finally:
+        set_artifact_store(None)
+        set_mcp_pool(None)
+
+    mcp_charts = {chart["name"]: chart for chart in charts if chart["name"].startswith("mcp_")}
+    assert set(mcp_charts) == {"mcp_distribution", "mcp_anomaly", "mcp_variance", "mcp_trend", "mcp_correlation"}
+    assert mcp_charts["mcp_trend"]["meta"]["status"] == "timeout"
+    assert all(chart["meta"]["status"] == "ok" for name, chart in mcp_charts.items() if name != "mcp_trend")
+    assert store.get("mcp", "mcp_distribution.json") is not None
+    assert server.max_in_flight > 1
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from insights_generator.agents.intent_agent import build_intent_agent
+from insights_generator.config import ModelConfig
+from insights_generator.model_router import (
+    CircuitBreaker,
+    CoalescingClient,
+    HeuristicClient,
+    ResilientClient,
+    ScheduledClient,
+    collect_client_stats,
+    get_chat_client,
+)
+
+
+class FakeOpenAIServer:
+    """Minimal OpenAI-compatible /chat/completions stub with injectable latency."""
+
+    def __init__(self, content: str = "ok", delay_seconds: float = 0.0) -> None:
+        self.content = content
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", "0"))
+                self.rfile.read(length)
+                server.calls += 1
+                time.sleep(server.delay_seconds)
+                body = json.dumps(
+                    {
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "fake-model",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": server.content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                ).encode("utf-8")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def fake_server():
+    pytest.importorskip("langchain_openai")
+    server = FakeOpenAIServer()
+    yield server
+    server.close()
+
+
+def build_config(base_url: str, **overrides) -> ModelConfig:
+    values = {
+        "provider": "openai",
+        "model_name": "fake-model",
+        "temperature": 0.0,
+        "openai_api_key": "test-key",
+        "openai_base_url": base_url,
+        "anthropic_api_key": "",
+        "request_timeout_seconds": 2.0,
+        "max_concurrency": 4,
+        "breaker_failure_threshold": 2,
+        "breaker_reset_seconds": 60.0,
+    }
+    values.update(overrides)
+    return ModelConfig(**values)
+
+
+class FailingClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke_text(self, prompt: str) -> str:
+        self.calls += 1
+        raise RuntimeError("provider down")
+
+
+def test_resilient_openai_client_returns_provider_text(fake_server) -> None:
+    fake_server.content = "hello from fake"
+    client = get_chat_client(build_config(fake_server.base_url))
+
+    text = client.invoke_text("hi")
+
+    assert isinstance(client, CoalescingClient)
+    assert isinstance(client.inner, ScheduledClient)
+    assert isinstance(client.inner.inner, ResilientClient)
+    assert text == "hello from fake"
+    assert collect_client_stats(client)["resilience"]["succeeded"] == 1
+    assert collect_client_stats(client)["scheduler"]["classes"]["interactive"]["dispatched"] == 1
+
+
+def test_deadline_exceeded_returns_empty_quickly(fake_server) -> None:
+    fake_server.delay_seconds = 1.5
+    client = get_chat_client(build_config(fake_server.base_url, request_timeout_seconds=0.2))
+
+    started = time.monotonic()
+    text = client.invoke_text("hi")
+    elapsed = time.monotonic() - started
+
+    assert text == ""
+    assert elapsed < 1.0
+    assert collect_client_stats(client)["resilience"]["deadline_exceeded"] == 1
+
+
+def test_open_breaker_short_circuits_without_calling_provider(fake_server) -> None:
+    fake_server.delay_seconds = 1.0
+    client = get_chat_client(build_config(fake_server.base_url, request_timeout_seconds=0.1))
+
+    client.invoke_text("a")
+    client.invoke_text("b")
+    calls_before = fake_server.calls
+    started = time.monotonic()
+    text = client.invoke_text("c")
+
+    assert text == ""
+    assert time.monotonic() - started < 0.05
+    stats = collect_client_stats(client)["resilience"]
+    assert stats["breaker_state"] == "open"
+    assert stats["short_circuited"] == 1
+    assert fake_server.calls == calls_before
+
+
+def test_breaker_half_open_probe_closes_on_success() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0.0)
+
+    breaker.record_failure()
+    first_probe = breaker.allow()
+    second_probe = breaker.allow()
+    breaker.record_success()
+
+    assert first_probe is True
+    assert second_probe is False
+    assert breaker.state == "closed"
+
+
+class GatedClient:
+    """Blocks the first call until ``gate`` is set; later calls echo the prompt."""
+
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def invoke_text(self, prompt: str) -> str:
+        self.calls += 1
+        if self.calls == 1:
+            self.gate.wait(timeout=5)
+        return prompt
+
+
+def test_saturated_calls_never_take_the_half_open_probe() -> None:
+    inner = GatedClient()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0.0)
+    resilient = ResilientClient(inner=inner, deadline_seconds=0.05, max_concurrency=1, breaker=breaker)
+    client = ScheduledClient(inner=resilient, max_in_flight=1, queue_timeout_seconds=0.05)
+
+    abandoned = client.invoke_text("slow")
+    held = client.stats()["in_flight"]
+    saturated = client.invoke_text("probe")
+    inner.gate.set()
+    deadline = time.monotonic() + 5
+    while client.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    recovered = client.invoke_text("probe")
+
+    # The call abandoned at its deadline keeps its slot until the provider
+    # returns, so the next call times out in the queue without touching the
+    # breaker and the probe is still there for the call after it.
+    assert abandoned == "" and held == 1
+    assert saturated == "" and client.stats()["classes"]["interactive"]["timed_out"] == 1
+    assert recovered == "probe" and inner.calls == 2
+    assert breaker.state == "closed"
+
+
+def test_intent_agent_falls_back_to_heuristic_on_provider_failure() -> None:
+    inner = FailingClient()
+    client = ResilientClient(inner=inner, deadline_seconds=1.0, max_concurrency=1)
+    agent = build_intent_agent(client, {})
+
+    state = agent({"user_prompt": "show anomaly and variance for revenue"})
+
+    assert inner.calls == 1
+    assert state["intent"]["requested_focus"] == ["anomaly", "variance"]
+    assert state["needs_clarification"] is False
+
+
+def test_unconfigured_provider_uses_heuristic_client() -> None:
+    client = get_chat_client(build_config("", provider="none"))
+
+    assert isinstance(client, HeuristicClient)
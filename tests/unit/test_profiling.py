@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import dataclasses
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.config import ProfilingConfig
+from insights_generator.profiling import _PROFILE_LOCK, RequestProfile
+
+
+def artifact_text(store: ArtifactStore, session_id: str, name: str) -> str:
+    return gzip.decompress(store.get(session_id, name).gzip_path.read_bytes()).decode("utf-8")
+
+
+def spin(seconds: float) -> None:
+    import time
+
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_attributes_samples_and_allocations_to_nodes(tmp_path) -> None:
+    store = ArtifactStore(tmp_path)
+    config = ProfilingConfig(sample_interval_ms=1.0)
+
+    with RequestProfile("profile-unit", config) as profile:
+        profile.on_stage("load")
+        blob = bytearray(8 * 1024 * 1024)
+        del blob
+        profile.on_stage("compute")
+        spin(0.1)
+    stored = profile.store(store)
+    summary = profile.summary()
+
+    nodes = {node["node"]: node for node in summary["nodes"]}
+    assert list(nodes) == ["load", "compute"]
+    assert nodes["load"]["alloc_peak_bytes"] >= 8 * 1024 * 1024
+    assert nodes["load"]["alloc_net_bytes"] < 1024 * 1024
+    assert nodes["compute"]["samples"] > 10
+    assert summary["top_frames"]["self"][0]["frame"].startswith("spin (unit/test_profiling.py")
+    collapsed = artifact_text(store, "profile-unit", "profile.collapsed.txt")
+    first = collapsed.splitlines()[0]
+    assert first.startswith("node:compute;") and first.rsplit(" ", 1)[1].isdigit()
+    assert stored["collapsed_url"].endswith("/profile.collapsed.txt")
+
+
+def test_analyze_profiles_when_header_is_set(tmp_path, monkeypatch) -> None:
+    from insights_generator import api
+    from insights_generator.api import app
+
+    monkeypatch.setattr(api, "config", dataclasses.replace(api.config, profiling=ProfilingConfig(enabled=True)))
+    store = ArtifactStore(tmp_path)
+    set_artifact_store(store)
+    rng = np.random.default_rng(2)
+    csv = pd.DataFrame({"revenue": rng.normal(100, 10, 500), "cost": rng.normal(50, 5, 500)}).to_csv(index=False)
+    client = TestClient(app)
+    try:
+        plain = client.post(
+            "/analyze",
+            files={"file": ("data.csv", csv.encode(), "text/csv")},
+            data={"user_prompt": "show the distribution and variance of revenue"},
+        ).json()
+        profiled = client.post(
+            "/analyze",
+            files={"file": ("data.csv", csv.encode(), "text/csv")},
+            data={"user_prompt": "show the distribution and variance of revenue", "fields": "insights"},
+            headers={"X-Profile": "1"},
+        ).json()
+        summary = json.loads(artifact_text(store, profiled["session_id"], "profile.json"))
+    finally:
+        set_artifact_store(None)
+
+    assert "profile" not in plain
+    assert [node["node"] for node in profiled["profile"]["nodes"]] == [
+        "intent",
+        "plan",
+        "analytics",
+        "visualization",
+        "insight",
+    ]
+    assert profiled["profile"]["summary_url"].endswith("/profile.json")
+    assert summary["samples"] > 0 and summary["nodes"][2]["alloc_peak_bytes"] > 0
+
+
+def test_profiling_can_be_disabled(monkeypatch) -> None:
+    from insights_generator import api
+
+    monkeypatch.setattr(api, "config", dataclasses.replace(api.config, profiling=ProfilingConfig(enabled=False)))
+    client = TestClient(api.app)
+
+    response = client.post(
+        "/analyze",
+        files={"file": ("data.csv", b"revenue\n1\n2\n", "text/csv")},
+        data={"profile": "true"},
+    )
+
+    assert response.status_code == 403
+
+
+def test_busy_profiler_runs_the_request_unprofiled(tmp_path, monkeypatch) -> None:
+    from insights_generator import api
+
+    profiling = ProfilingConfig(enabled=True, lock_timeout_seconds=0.05)
+    monkeypatch.setattr(api, "config", dataclasses.replace(api.config, profiling=profiling))
+    set_artifact_store(ArtifactStore(tmp_path))
+    client = TestClient(api.app)
+    _PROFILE_LOCK.acquire()
+    try:
+        response = client.post(
+            "/analyze",
+            files={"file": ("data.csv", b"revenue\n1\n2\n3\n", "text/csv")},
+            data={"user_prompt": "show the distribution of revenue"},
+            headers={"X-Profile": "1"},
+        )
+    finally:
+        _PROFILE_LOCK.release()
+        set_artifact_store(None)
+
+    assert response.status_code == 200
+    assert response.json()["profile"] == {"skipped": "Another request is being profiled."}
+    assert response.json()["analytics"]["row_count"] == 3
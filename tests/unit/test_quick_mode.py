@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import dataclasses
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from insights_generator.analytics.anomalies import detect_anomalies
+from insights_generator.analytics.sampling import confidence_intervals, sample_frame
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+
+
+def build_frame(rows: int = 5_000) -> pd.DataFrame:
+    rng = np.random.default_rng(21)
+    return pd.DataFrame(
+        {
+            "revenue": rng.lognormal(mean=3.0, sigma=0.6, size=rows),
+            "segment": rng.choice(["smb", "mid", "ent"], size=rows, p=[0.6, 0.3, 0.1]),
+        }
+    )
+
+
+def test_stratified_sample_keeps_segment_proportions_and_order() -> None:
+    df = build_frame()
+
+    sample, info = sample_frame(df, 500)
+
+    assert info["method"] == "stratified"
+    assert info["stratified_by"] == "segment"
+    assert info["population_rows"] == 5_000
+    assert abs(info["sample_rows"] - 500) <= 3
+    assert sample.index.is_monotonic_increasing
+    shares = sample["segment"].value_counts(normalize=True)
+    expected = df["segment"].value_counts(normalize=True)
+    assert shares.to_dict() == pytest.approx(expected.to_dict(), abs=0.01)
+
+
+def test_intervals_cover_population_values() -> None:
+    df = build_frame()
+    sample, info = sample_frame(df, 1_000)
+    index = detect_anomalies(sample, ["revenue"])
+
+    intervals = confidence_intervals(sample, ["revenue"], info["population_rows"], index)["revenue"]
+
+    assert intervals["mean"]["low"] <= df["revenue"].mean() <= intervals["mean"]["high"]
+    assert intervals["median"]["low"] <= df["revenue"].median() <= intervals["median"]["high"]
+    rate = intervals["anomaly_rate"]
+    assert 0.0 <= rate["low"] <= rate["estimate"] <= rate["high"] <= 1.0
+
+
+def test_quick_mode_returns_sample_then_refined_result(tmp_path, monkeypatch) -> None:
+    from insights_generator import api
+
+    set_artifact_store(ArtifactStore(tmp_path))
+    monkeypatch.setattr(api, "config", dataclasses.replace(api.config, quick_sample_rows=300))
+    client = TestClient(api.app)
+    csv = build_frame(2_000).to_csv(index=False).encode("utf-8")
+
+    quick = client.post(
+        "/analyze",
+        files={"file": ("big.csv", csv, "text/csv")},
+        data={"user_prompt": "show anomalies and trend for revenue", "mode": "quick"},
+    ).json()
+    refined = client.get(f"/results/{quick['session_id']}").json()
+    set_artifact_store(None)
+
+    assert quick["analytics"]["sample"]["population_rows"] == 2_000
+    assert quick["analytics"]["row_count"] < 2_000
+    assert "revenue" in quick["analytics"]["confidence_intervals"]
+    assert quick["refinement"]["status"] == "refining"
+    assert refined["status"] == "complete"
+    assert refined["result"]["analytics"]["row_count"] == 2_000
+    assert "sample" not in refined["result"]["analytics"]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights_generator.agents.visualization_agent import run_visualization_agent
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import register_frame
+from insights_generator.repl_pool import ReplPool, SharedFrame, set_repl_pool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ReplPool(workers=1, timeout_seconds=1.5, memory_limit_bytes=256 * 1024 * 1024).start()
+    yield pool
+    pool.close()
+
+
+def build_frame(rows: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    return pd.DataFrame({"revenue": rng.normal(100, 10, rows), "segment": rng.choice(["a", "b"], rows)})
+
+
+def test_worker_reads_shared_frame_and_returns_figure(pool: ReplPool) -> None:
+    df = build_frame()
+    with SharedFrame(df) as frame:
+        result = pool.execute("print(len(df), df['segment'].nunique()); fig = px.box(df, x='segment', y='revenue')", frame)
+        second = pool.execute("print(round(df['revenue'].sum(), 6))", frame)
+
+    assert result.ok, result.error
+    assert result.stdout.split() == ["2000", "2"]
+    assert json.loads(result.figure_json)["data"][0]["type"] == "box"
+    assert float(second.stdout) == pytest.approx(round(df["revenue"].sum(), 6))
+    assert second.worker_pid == result.worker_pid
+
+
+MAPPED_PATH_CODE = """\
+address = df["revenue"].to_numpy().__array_interface__["data"][0]
+for line in open("/proc/self/maps"):
+    parts = line.split(maxsplit=5)
+    low, high = (int(value, 16) for value in parts[0].split("-"))
+    if low <= address < high:
+        print(parts[5].strip() if len(parts) > 5 else "")
+"""
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc to inspect mappings")
+def test_numeric_columns_are_views_over_shared_memory(pool: ReplPool) -> None:
+    df = build_frame().assign(cost=lambda frame: frame["revenue"] / 2)
+    with SharedFrame(df) as frame:
+        result = pool.execute(MAPPED_PATH_CODE, frame)
+
+    assert result.ok, result.error
+    assert frame.name.lstrip("/") in result.stdout
+
+
+def test_timeout_and_memory_limit(pool: ReplPool) -> None:
+    with SharedFrame(build_frame(10)) as frame:
+        too_big = pool.execute("x = np.ones(512 * 1024 * 1024 // 8)", frame)
+        slow = pool.execute("while True:\n    pass", frame)
+        recovered = pool.execute("fig = None\nprint('ok')", frame)
+
+    assert not too_big.ok and "MemoryError" in too_big.error
+    assert slow.timed_out and not slow.ok
+    assert recovered.ok and recovered.stdout.strip() == "ok"
+    assert recovered.worker_pid != slow.worker_pid
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_starts_lazily_and_stays_closed() -> None:
+    lazy = ReplPool(workers=1, timeout_seconds=1.5)
+    assert lazy.stats()["workers"] == 0
+
+    with SharedFrame(build_frame(10)) as frame:
+        first = lazy.execute("fig = None", frame)
+        lazy.close()
+        started = time.monotonic()
+        after_close = lazy.execute("fig = None", frame)
+
+    assert first.ok
+    assert not after_close.ok and time.monotonic() - started < 1
+    assert lazy.stats()["workers"] == 0 and lazy.stats()["idle"] == 0
+
+
+def test_visualization_agent_adds_repl_chart(pool: ReplPool, tmp_path) -> None:
+    store = ArtifactStore(tmp_path)
+    set_artifact_store(store)
+    set_repl_pool(pool)
+    try:
+        state = {
+            "session_id": "repl",
+            "dataset": register_frame(build_frame()),
+            "use_python_repl": True,
+            "analytics": {"numeric_columns": ["revenue"]},
+            "execution_plan": {"charts": ["trend"], "primary_column": "revenue"},
+        }
+        charts = run_visualization_agent(state)["visualizations"]
+    finally:
+        set_artifact_store(None)
+        set_repl_pool(None)
+
+    assert [chart["name"] for chart in charts] == ["trend", "repl"]
+    assert charts[1]["meta"]["ok"] and charts[1]["json_url"]
+    figure = json.loads(gzip.decompress(store.get("repl", "repl.json").gzip_path.read_bytes()))
+    assert figure["layout"]["title"]["text"] == "Custom view of revenue"
+    assert store.get("repl", "repl.json") is not None
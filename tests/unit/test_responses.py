@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.responses import dumps, select_fields
+
+
+CSV = b"revenue,cost,region\n1,2,a\n3,4,b\n100,5,a\n4,3,b\n5,6,a\n"
+
+
+@pytest.fixture
+def client(tmp_path):
+    from insights_generator.api import app
+
+    set_artifact_store(ArtifactStore(tmp_path))
+    yield TestClient(app)
+    set_artifact_store(None)
+
+
+def analyze(client: TestClient, **form):
+    data = {"user_prompt": "show the trend and anomalies across all metrics", **form}
+    return client.post("/analyze", files={"file": ("data.csv", CSV, "text/csv")}, data=data)
+
+
+def test_dumps_handles_numpy_scalars_and_non_finite_floats() -> None:
+    payload = {"count": np.int64(3), "mean": np.float32(1.5), "cv": float("inf"), "rows": np.arange(2)}
+
+    assert json.loads(dumps(payload)) == {"count": 3, "mean": 1.5, "cv": None, "rows": [0, 1]}
+
+
+def test_select_fields_keeps_identity_and_requested_columns() -> None:
+    payload = {
+        "session_id": "s",
+        "needs_clarification": False,
+        "insights": "text",
+        "analytics": {
+            "row_count": 4,
+            "numeric_analytics": {"revenue": {"mean": 1}, "cost": {"mean": 2}},
+            "anomaly_summary": {"revenue": 1, "cost": 0},
+        },
+    }
+
+    only_insights = select_fields(payload, fields="insights")
+    revenue_only = select_fields(payload, fields="analytics.numeric_analytics", columns="revenue")
+
+    assert only_insights == {"session_id": "s", "needs_clarification": False, "insights": "text"}
+    assert revenue_only["analytics"] == {"numeric_analytics": {"revenue": {"mean": 1}}}
+
+
+def test_analyze_fields_and_columns_parameters(client) -> None:
+    response = analyze(client, fields="insights,analytics.numeric_analytics", columns="cost")
+
+    body = response.json()
+    assert response.status_code == 200
+    assert set(body) == {"session_id", "needs_clarification", "insights", "analytics"}
+    assert list(body["analytics"]["numeric_analytics"]) == ["cost"]
+
+
+def test_analyze_arrow_and_columnar_formats(client) -> None:
+    arrow = analyze(client, response_format="arrow")
+    columnar = analyze(client, response_format="columnar").json()
+
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert table.column("column").to_pylist() == ["revenue", "cost"]
+    assert table.column("mean").to_pylist() == pytest.approx([22.6, 4.0])
+    assert table.schema.metadata[b"session_id"] == arrow.headers["x-session-id"].encode()
+    assert columnar["analytics"]["numeric_analytics"]["column"] == ["revenue", "cost"]
+    assert analyze(client, response_format="xml").status_code == 400
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.agents.analytics_agent import run_analytics_agent
+from insights_generator.agents.insight_agent import _heuristic_insight
+from insights_generator.agents.planner_agent import build_execution_plan
+from insights_generator.analytics.rolling import rolling_analytics, rolling_mean_std, rolling_quartiles
+from insights_generator.frame_registry import register_frame
+
+
+def seasonal_frame(rows: int = 3000) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    position = np.arange(rows)
+    high_season = (position >= 1500) & (position < 2200)
+    revenue = np.where(high_season, 160.0, 100.0) + rng.normal(0, 5, rows)
+    revenue[[400, 1800]] = [180.0, 240.0]
+    cost = rng.normal(10, 1, rows)
+    cost[[50, 51]] = np.nan
+    return pd.DataFrame({"revenue": revenue, "cost": cost, "region": ["a", "b", "c"] * (rows // 3)})
+
+
+def test_kernels_match_pandas_rolling_on_all_columns() -> None:
+    df = seasonal_frame()
+    values = df[["revenue", "cost"]].to_numpy()
+    window = 60
+
+    mean, std = rolling_mean_std(values, window)
+    q1, median, q3 = rolling_quartiles(values, window)
+
+    centered = df[["revenue", "cost"]].rolling(window, center=True, min_periods=1)
+    inner = slice(window, len(df) - window)
+    np.testing.assert_allclose(mean[inner], centered.mean().to_numpy()[inner], rtol=1e-9)
+    np.testing.assert_allclose(std[inner], centered.std(ddof=0).to_numpy()[inner], rtol=1e-6)
+    # Block-aligned windows: quartiles stay close to the exact rolling ones
+    # except within a block of a level shift.
+    error = np.abs(median[inner] - centered.median().to_numpy()[inner])
+    assert np.nanmax(error[:, 1]) < 0.5
+    assert np.nanmedian(error[:, 0]) < 1.0
+    assert np.all(q1[inner] <= median[inner]) and np.all(median[inner] <= q3[inner])
+
+
+def test_local_fences_separate_spikes_from_seasonal_drift() -> None:
+    df = seasonal_frame()
+
+    result = rolling_analytics(df, ["revenue", "cost"], window=100)
+    revenue = result.summary["by_column"]["revenue"]
+
+    local_rows = set(np.flatnonzero(result.local_outliers[:, 0]).tolist())
+    assert {400, 1800} <= local_rows
+    assert revenue["global_anomaly_count"] > 600
+    assert revenue["drift_flagged_count"] >= 0.95 * revenue["global_anomaly_count"]
+    assert revenue["local_anomaly_rate"] < 0.03
+    assert [point["row"] for point in revenue["change_points"]] == [1500, 2200]
+    assert revenue["change_points"][0]["mean_after"] > revenue["change_points"][0]["mean_before"] + 50
+    assert result.summary["by_column"]["cost"]["change_points"] == []
+    assert result.summary["change_point_columns"] == ["revenue"]
+
+
+def test_rolling_feeds_anomaly_index_and_insights() -> None:
+    df = seasonal_frame()
+    plan = build_execution_plan({"requested_focus": ["anomaly"], "column_hints": []}, ["revenue", "cost"])
+
+    state = run_analytics_agent({"dataset": register_frame(df), "execution_plan": plan})
+    analytics = state["analytics"]
+
+    assert plan["metrics"] == ["summary", "anomalies", "rolling"]
+    assert analytics["anomalies"]["by_column"]["revenue"]["local_iqr"] == (
+        analytics["rolling"]["by_column"]["revenue"]["local_anomaly_count"]
+    )
+    text = _heuristic_insight(state)
+    assert "Level shifts (change points): revenue at row 1500" in text
+    assert "global outliers are mostly drift: revenue" in text
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from insights_generator.model_router import (
+    CircuitBreaker,
+    ResilientClient,
+    ScheduledClient,
+    TokenBucket,
+    llm_call_context,
+)
+
+
+class GatedRecordingClient:
+    """Blocks the first call until released, then records the order prompts reach the provider."""
+
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.order: list[str] = []
+        self._lock = threading.Lock()
+
+    def invoke_text(self, prompt: str) -> str:
+        with self._lock:
+            self.order.append(prompt)
+        self.gate.wait(timeout=5)
+        return prompt
+
+
+def _call(client: ScheduledClient, prompt: str, priority: str, tenant: str = "t") -> threading.Thread:
+    def run() -> None:
+        with llm_call_context(priority, tenant):
+            client.invoke_text(prompt)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiting(client: ScheduledClient, expected: int) -> None:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if sum(c["waiting"] for c in client.stats()["classes"].values()) == expected:
+            return
+        time.sleep(0.005)
+    raise AssertionError("calls did not queue in time")
+
+
+def _enqueue_in_order(client: ScheduledClient, calls: list[tuple[str, str, str]]) -> list[threading.Thread]:
+    inner = client.inner
+    threads = [_call(client, "blocker", "batch", "t")]
+    while not inner.order:
+        time.sleep(0.005)
+    for count, (prompt, priority, tenant) in enumerate(calls, start=1):
+        threads.append(_call(client, prompt, priority, tenant))
+        _wait_for_waiting(client, count)
+    return threads
+
+
+def test_interactive_calls_overtake_queued_batch_calls() -> None:
+    client = ScheduledClient(inner=GatedRecordingClient(), max_in_flight=1)
+    threads = _enqueue_in_order(
+        client,
+        [
+            ("batch-1", "batch", "t"),
+            ("batch-2", "batch", "t"),
+            ("analyze", "interactive", "t"),
+            ("clarify", "clarify", "t"),
+        ],
+    )
+    client.inner.gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert client.inner.order == ["blocker", "clarify", "analyze", "batch-1", "batch-2"]
+    assert client.stats()["classes"]["clarify"]["dispatched"] == 1
+
+
+def test_tenants_share_a_priority_class_round_robin() -> None:
+    client = ScheduledClient(inner=GatedRecordingClient(), max_in_flight=1)
+    threads = _enqueue_in_order(
+        client,
+        [("a1", "batch", "a"), ("a2", "batch", "a"), ("a3", "batch", "a"), ("b1", "batch", "b"), ("b2", "batch", "b")],
+    )
+    client.inner.gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert client.inner.order == ["blocker", "a1", "b1", "a2", "b2", "a3"]
+
+
+def test_token_bucket_paces_calls_and_queue_timeout_gives_up() -> None:
+    recorder = GatedRecordingClient()
+    recorder.gate.set()
+    paced = ScheduledClient(inner=recorder, bucket=TokenBucket(rate_per_second=20.0, capacity=1))
+    started = time.monotonic()
+    for index in range(5):
+        paced.invoke_text(f"p{index}")
+    assert time.monotonic() - started >= 0.18
+    # Counted once per call that waited for a token, not per wake-up.
+    assert paced.stats()["rate_limited_waits"] == 4
+
+    starved = ScheduledClient(
+        inner=recorder,
+        bucket=TokenBucket(rate_per_second=1 / 60, capacity=1),
+        queue_timeout_seconds=0.1,
+    )
+    assert starved.invoke_text("first") == "first"
+    with llm_call_context("clarify"):
+        assert starved.invoke_text("second") == ""
+    assert starved.stats()["classes"]["clarify"]["timed_out"] == 1
+
+
+def test_open_breaker_turns_calls_away_before_they_take_a_token() -> None:
+    recorder = GatedRecordingClient()
+    recorder.gate.set()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=60.0)
+    resilient = ResilientClient(inner=recorder, breaker=breaker)
+    client = ScheduledClient(inner=resilient, bucket=TokenBucket(rate_per_second=1 / 60, capacity=2))
+
+    breaker.record_failure()
+    assert client.invoke_text("refused") == ""
+    tokens = client.stats()["tokens_available"]
+    breaker.record_success()
+
+    assert tokens == 2
+    assert client.invoke_text("allowed") == "allowed"
+    assert recorder.order == ["allowed"]
+    assert client.stats()["classes"]["interactive"]["queued"] == 1
+    assert resilient.stats()["short_circuited"] == 1
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+from insights_generator.agents.analytics_agent import run_analytics_agent
+from insights_generator.agents.visualization_agent import run_visualization_agent
+from insights_generator.artifact_store import ArtifactStore, set_artifact_store
+from insights_generator.frame_registry import register_frame
+
+
+def test_charts_render_concurrently_with_timings_and_safe_html(tmp_path) -> None:
+    rng = np.random.default_rng(3)
+    base = rng.normal(100, 10, 400)
+    df = pd.DataFrame({"</script>revenue": base, "cost": base * 0.5 + rng.normal(0, 1, 400)})
+    store = ArtifactStore(tmp_path)
+    set_artifact_store(store)
+    try:
+        state = run_analytics_agent({"session_id": "viz", "dataset": register_frame(df)})
+        charts = run_visualization_agent(state)["visualizations"]
+    finally:
+        set_artifact_store(None)
+
+    assert [chart["name"] for chart in charts] == ["distribution", "anomaly", "variance", "trend", "correlation"]
+    for chart in charts:
+        timing = chart["meta"]["timing_ms"]
+        assert set(timing) == {"build", "serialize", "write", "total"}
+        assert timing["total"] >= timing["build"] >= 0
+
+    html = gzip.decompress(store.get("viz", "distribution.html").gzip_path.read_bytes()).decode()
+    figure = json.loads(gzip.decompress(store.get("viz", "distribution.json").gzip_path.read_bytes()))
+    assert '<script src="plotly.min.js"></script>' in html
+    assert html.count("</script>") == 2
+    assert figure["layout"]["title"]["text"] == "Distribution of </script>revenue"